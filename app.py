@@ -1,38 +1,51 @@
 from __future__ import annotations
+import json
 import os
+import time
+from datetime import timedelta
 from decimal import Decimal
 from typing import Dict
 
 import altair as alt
+import numpy as np
 import pandas as pd
 import streamlit as st
-from sqlalchemy import select, text, func
-
-from db.init_db import init_db
-from db.session import SessionLocal, get_db_path
-from db.models import Transaction, Price, Setting
+from sqlalchemy import select, text
+
+from db.init_db import bootstrap
+from db.session import ReadSession, SessionLocal, get_db_path, read_engine
+from db.models import Price, Setting
+from db.positions import load_positions, record_tx
+from db.queries import EQUITY_SERIES_SQL, PRICE_SERIES_SQL, RECENT_PRICES_SQL, TxFilter, tx_page
+from db.readonly import latest_prices_sql
+from utils.assets import ASSETS, ASSETS_META, asset_label
 from utils.decimal import D, q2, q4
-from utils.logging import setup_logging
-from utils.time import iso_now_tr
+from utils.export import export_to_tempfile
+from utils.fx_matrix import TRY, UNITS, base_label, cross_rates, rebase_series
+from utils.logging import setup_logging, tail as tail_logs
+from utils.quote_board import price_rows, publish_rows, read_board
+from utils.rate_limit import RateLimiter
+from utils.scenarios import run_scenarios
+from utils.tick_ring import TickRing
+from utils.lttb import lttb_indices
+from utils.time import iso_now_tr, now_tr
+from utils.tx_import import PROFILES, import_transactions
 
 
 # ✅ Warmup için router
-from providers.router import ProviderRouter
+from providers.router import get_router
+from providers.metals_metalsdev import METALS_DEV_QUOTA
+from service.alerts import parse_rules
+from service.hf_ticks import parse_assets as parse_hf_assets
+from service.refresh import REQUEST_KEY, TICK_KEY, refresh_pending, request_refresh, service_alive, start_local_refresh
 
 logger = setup_logging("app", os.getenv("LOG_DIR", "logs"))
 
-ASSETS_META = {
-    "XAU_G": {"name": "Gram Altın", "unit": "gr"},
-    "XAG_G": {"name": "Gram Gümüş", "unit": "gr"},
-    "XCU_G": {"name": "Bakır", "unit": "gr"},
-    "USDTRY": {"name": "USD/TRY", "unit": "USD"},
-    "EURTRY": {"name": "EUR/TRY", "unit": "EUR"},
-}
-ASSETS = list(ASSETS_META.keys())
-
+REFRESH_POLL_S = 2      # "Şimdi Güncelle" sonrası yeni tick yoklama aralığı
+REFRESH_TIMEOUT_S = 120
+HF_WINDOW_S = 15 * 60   # canlı grafik penceresi
 
-def asset_label(a: str) -> str:
-    return ASSETS_META.get(a, {"name": a})["name"]
+EXPORT_KINDS = {"transactions": "İşlemler", "prices": "Fiyat Geçmişi", "snapshots": "Snapshot'lar"}
 
 
 def get_settings(db) -> Dict[str, str]:
@@ -49,105 +62,120 @@ def set_setting(db, key: str, value: str):
 
 
 def latest_prices(db) -> pd.DataFrame:
-    q = text(
-        """
-    SELECT p1.*
-    FROM prices p1
-    JOIN (
-      SELECT asset, MAX(id) AS max_id
-      FROM prices
-      GROUP BY asset
-    ) p2
-    ON p1.asset = p2.asset AND p1.id = p2.max_id
+    sql, params = latest_prices_sql(ASSETS)
+    return pd.read_sql(text(sql), db.bind, params=params)
+
+
+def load_latest_prices(settings: Dict[str, str]) -> pd.DataFrame:
     """
+    Önce servisin yazdığı fiyat panosu (mmap, SQLite'a gitmez). Pano yoksa veya iki tick
+    boyunca güncellenmediyse SQLite; okunan son fiyatlar panoya tohumlanır.
+    """
+    max_age_s = 2 * 60 * float(settings.get("update_interval_min", "30"))
+    rows = read_board(max_age_s)
+    if rows is not None:
+        return pd.DataFrame(list(rows.values()), columns=["asset", "price", "price_buy", "price_sell", "ts", "source", "is_stale"])
+    with ReadSession() as db:
+        df = latest_prices(db)
+    try:
+        publish_rows({r["asset"]: r for r in df.to_dict("records")})
+    except Exception as e:
+        logger.warning(f"Quote board seed failed (ignored): {e}")
+    return df
+
+
+def insert_manual_price(db, asset: str, price: Decimal, source: str = "manual") -> Price:
+    p = Price(
+        ts=iso_now_tr(),
+        asset=asset,
+        price=str(price),
+        currency="TRY",
+        source=source,
+        is_stale=0,
+        error_msg=None,
     )
-    return pd.read_sql(q, db.bind)
-
-
-def insert_manual_price(db, asset: str, price: Decimal, source: str = "manual"):
-    db.add(
-        Price(
-            ts=iso_now_tr(),
-            asset=asset,
-            price=str(price),
-            currency="TRY",
-            source=source,
-            is_stale=0,
-            error_msg=None,
-        )
-    )
+    db.add(p)
+    return p
 
 
-def insert_tx(asset: str, side: str, qty: Decimal, unit_price: Decimal, fee: Decimal, note: str | None):
-    """Transaction insert (kalıcı)."""
-    with SessionLocal() as db:
-        db.add(
-            Transaction(
-                ts=iso_now_tr(),
-                asset=asset,
-                side=side,
-                qty=str(qty),
-                unit_price=str(unit_price),
-                fee=str(fee),
-                currency="TRY",
-                note=note,
-            )
+CHART_RANGES = {"1 hafta": 7, "1 ay": 30, "3 ay": 90, "1 yıl": 365, "Tümü": None}
+CHART_WIDTH_PX = 1200  # wide layout'ta tam genişlik grafik (yaklaşık)
+
+
+def chart_points(width_px: int, days: int | None) -> int:
+    """Seri başına hedef nokta: uzun aralıkta ~2 px'e bir; 1 aya kadar (yakınlaştırılarak bakılır) piksel başına bir."""
+    return width_px if days is not None and days <= 30 else width_px // 2
+
+
+def _range_start(days: int | None) -> str:
+    return "" if days is None else (now_tr() - timedelta(days=days)).isoformat(timespec="seconds")
+
+
+def _decimate(df: pd.DataFrame, y: str, points: int) -> pd.DataFrame:
+    """LTTB: zaman ekseni epoch ns, görsel şekil korunur; payload seri başına en fazla `points`."""
+    if len(df) <= points:
+        return df
+    x = pd.to_datetime(df["ts"], utc=True).astype("int64").to_numpy()
+    return df.iloc[lttb_indices(x, df[y].to_numpy(dtype=float), points)]
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def price_series(asset: str, days: int | None, points: int, last_ts: str) -> pd.DataFrame:
+    """(varlık, aralık, nokta) başına önbellek; last_ts yeni tick gelince geçersiz kılar."""
+    with ReadSession() as db:
+        df = pd.read_sql(
+            text(PRICE_SERIES_SQL),
+            db.bind, params={"a": asset, "s": _range_start(days)},
         )
-        db.commit()
+    df["price_num"] = df["price"].astype(float)
+    return _decimate(df, "price_num", points).assign(asset=asset)
 
 
-def load_transactions_df(db) -> pd.DataFrame:
-    tx = db.execute(select(Transaction).order_by(Transaction.id.asc())).scalars().all()
-    if not tx:
-        return pd.DataFrame(columns=["id", "ts", "asset", "side", "qty", "unit_price", "fee", "currency", "note"])
-    return pd.DataFrame(
-        [
-            {
-                "id": t.id,
-                "ts": t.ts,
-                "asset": t.asset,
-                "side": t.side,
-                "qty": t.qty,
-                "unit_price": t.unit_price,
-                "fee": t.fee,
-                "currency": t.currency,
-                "note": t.note,
-            }
-            for t in tx
-        ]
-    )
+@st.cache_data(show_spinner=False, max_entries=32)
+def equity_series(days: int | None, points: int, base: str, last_ts: str) -> pd.DataFrame:
+    with ReadSession() as db:
+        snaps = pd.read_sql(
+            text(EQUITY_SERIES_SQL),
+            db.bind, params={"s": _range_start(days)},
+        )
+    if snaps.empty:
+        return snaps
+    # her snapshot kendi tick kuruyla: TL seri / baz fiyat serisi (vektörel)
+    base_px = [1.0] * len(snaps) if base == TRY else [
+        float(json.loads(b).get(base) or "nan") for b in snaps["breakdown_json"]
+    ]
+    snaps["value"] = rebase_series(snaps["total_value_try"].astype(float).to_numpy(), base_px)
+    return _decimate(snaps.dropna(subset=["value"])[["ts", "value"]], "value", points)
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def scenario_risk(weights: tuple, day: str, n_paths: int, method: str) -> dict | None:
+    """
+    1 TL'lik portföy (varlık -> ağırlık) için Monte Carlo VaR/CVaR özeti; PnL ölçekle doğrusal
+    olduğundan çağıran toplam değerle çarpar. Ağırlıklar yuvarlanmış ve getiriler günlük
+    olduğundan anahtar her tick'te değil, dağılım veya gün değişince değişir. Yol başına PnL
+    dizileri önbelleğe girmez: yalnız ufuk istatistikleri ve son ufkun 60 kutulu histogramı.
+    """
+    with ReadSession() as db:
+        res = run_scenarios(db, dict(weights), n_paths=n_paths, method=method)
+    if res is None:
+        return None
+    h = res.stats[-1].days
+    counts, edges = np.histogram(res.pnl[h], bins=60)
+    return {
+        "stats": res.stats, "hist_days": h, "hist_counts": counts, "hist_edges": edges,
+        "n_paths": res.n_paths, "n_obs": res.n_obs, "seed": res.seed, "excluded": res.excluded,
+    }
 
 
-def compute_inventory_and_pnl(tx: pd.DataFrame, price_map: Dict[str, Decimal]) -> pd.DataFrame:
-    state: Dict[str, Dict[str, Decimal]] = {}
-    rows = []
-    for _, r in tx.iterrows():
-        asset = r["asset"]
-        side = r["side"]
-        qty = D(r["qty"])
-        unit_price = D(r["unit_price"])
-        fee = D(r["fee"])
-
-        st_ = state.get(asset, {"qty": Decimal("0"), "avg": Decimal("0"), "realized": Decimal("0")})
-
-        if side == "BUY":
-            total_cost = qty * unit_price + fee
-            new_qty = st_["qty"] + qty
-            if new_qty > 0:
-                st_["avg"] = (st_["avg"] * st_["qty"] + total_cost) / new_qty
-            st_["qty"] = new_qty
-        else:
-            if qty > st_["qty"]:
-                raise ValueError(f"{asset_label(asset)} stok yetersiz: elde {st_['qty']} var, satmak istedin {qty}")
-            proceeds = qty * unit_price - fee
-            cost = qty * st_["avg"]
-            st_["realized"] += (proceeds - cost)
-            st_["qty"] -= qty
-            if st_["qty"] == 0:
-                st_["avg"] = Decimal("0")
+def insert_tx(asset: str, side: str, qty: Decimal, unit_price: Decimal, fee: Decimal, note: str | None):
+    """Transaction insert (kalıcı). Stok kontrolü pozisyon satırına karşı, aynı yazma transaction'ında."""
+    with SessionLocal() as db:
+        record_tx(db, asset, side, qty, unit_price, fee, note)
 
-        state[asset] = st_
 
+def inventory_frame(state: Dict[str, Dict[str, Decimal]], price_map: Dict[str, Decimal]) -> pd.DataFrame:
+    rows = []
     for asset, st_ in state.items():
         qty = st_["qty"]
         avg = st_["avg"]
@@ -186,110 +214,48 @@ def compute_inventory_and_pnl(tx: pd.DataFrame, price_map: Dict[str, Decimal]) -
     return pd.DataFrame(rows)
 
 
-def warmup_prices_if_missing():
-    """
-    İlk açılışta:
-    - DB'de hiç fiyat yoksa veya bazı varlıkların fiyatı yoksa
-    - 1 kez fiyat çekip prices tablosuna yazar.
-    """
+def warmup_prices(assets, settings: Dict[str, str]) -> bool:
+    """Eksik varlıklar için bir kez fiyat çekip prices tablosuna yazar. Yazıldıysa True."""
     try:
-        with SessionLocal() as db:
-            cnt = db.execute(select(func.count(Price.id))).scalar() or 0
-            if cnt == 0:
-                missing = ASSETS[:]
-            else:
-                existing = set(pd.read_sql(text("SELECT DISTINCT asset FROM prices"), db.bind)["asset"].tolist())
-                missing = [a for a in ASSETS if a not in existing]
-
-        if not missing:
-            return
-
-        with SessionLocal() as db:
-            settings = get_settings(db)
-
-        router = ProviderRouter(
-            fx_primary=os.getenv("FX_PRIMARY", settings.get("fx_primary", "exchangerate_host")),
-            fx_fallback=os.getenv("FX_FALLBACK", settings.get("fx_fallback", "frankfurter")),
-            metals_primary=os.getenv("METALS_PRIMARY", settings.get("metals_primary", "kapalicarsi_apiluna")),
-            metals_fallback=os.getenv("METALS_FALLBACK", settings.get("metals_fallback", "metals_dev")),
-            copper_provider=os.getenv("COPPER_PROVIDER", settings.get("copper_provider", "kitco")),
-            timeout_s=10,
-        )
-
+        router = get_router(timeout_s=10, settings=settings)
         ts = iso_now_tr()
-        quotes, sources = router.get_all_quotes_try(missing, manual_prices=None)
-
+        quotes, sources = router.get_all_quotes_try(list(assets), manual_prices=None)
+        rows = [
+            Price(ts=ts, asset=a, price=str(q["mid"]), price_buy=str(q["bid"]), price_sell=str(q["ask"]),
+                  currency="TRY", source=sources.get(a, "warmup"), is_stale=0, error_msg=None)
+            for a, q in quotes.items() if q.get("mid") is not None
+        ]
+        if not rows:
+            return False
+        board_rows = price_rows(rows)
         with SessionLocal() as db:
-            wrote_any = False
-            for a in missing:
-                if a in quotes:
-                    q = quotes[a]
-                    mid = q.get("mid")
-                    if mid is None:
-                        continue
-                    db.add(
-                        Price(
-                            ts=ts,
-                            asset=a,
-                            price=str(mid),
-                            currency="TRY",
-                            source=sources.get(a, "warmup"),
-                            is_stale=0,
-                            error_msg=None,
-                        )
-                    )
-                    wrote_any = True
-            if wrote_any:
-                db.commit()
-
+            db.add_all(rows)
+            db.commit()
+        publish_rows(board_rows, create=False)
+        return True
     except Exception as e:
         logger.warning(f"Warmup price fetch failed (ignored): {e}")
+        return False
 
 
 # ---------------- UI ----------------
 st.set_page_config(page_title="Yatırım Takip (TR)", layout="wide")
-init_db(seed=False)
-def warmup_prices_if_missing():
-    try:
-        with SessionLocal() as db:
-            cnt = db.execute(select(func.count(Price.id))).scalar() or 0
-            if cnt == 0:
-                missing = list(ASSETS_META.keys())
-            else:
-                existing = set(pd.read_sql(text("SELECT DISTINCT asset FROM prices"), db.bind)["asset"].tolist())
-                missing = [a for a in ASSETS_META.keys() if a not in existing]
-
-        if not missing:
-            return
+bootstrap()
 
-        router = ProviderRouter(timeout_s=10)
-        ts = iso_now_tr()
-        quotes, sources = router.get_all_quotes_try(missing, manual_prices=None)
-
-        with SessionLocal() as db:
-            wrote = False
-            for a in missing:
-                if a in quotes:
-                    mid = quotes[a]["mid"]
-                    db.add(Price(ts=ts, asset=a, price=str(mid), currency="TRY",
-                                 source=sources.get(a, "warmup"), is_stale=0, error_msg=None))
-                    wrote = True
-            if wrote:
-                db.commit()
-    except Exception as e:
-        logger.warning(f"Warmup failed (ignored): {e}")
-
-with st.spinner("İlk açılış fiyatları çekiliyor..."):
-    warmup_prices_if_missing()
-
-# ✅ İlk açılışta fiyatlar boşsa doldur
-with st.spinner("İlk açılış fiyatları çekiliyor..."):
-    warmup_prices_if_missing()
-
-with SessionLocal() as db:
+with ReadSession() as db:
     settings = get_settings(db)
-    prices_df = latest_prices(db)
-    tx_df = load_transactions_df(db)
+    positions = load_positions(db)
+prices_df = load_latest_prices(settings)
+
+# ✅ İlk açılışta fiyatı olmayan varlıklar: son-fiyat sorgusundan tespit, oturum başına tek deneme
+missing = [a for a in ASSETS if a not in set(prices_df["asset"])] if not prices_df.empty else ASSETS[:]
+if missing and not st.session_state.get("warmup_tried"):
+    st.session_state["warmup_tried"] = True
+    with st.spinner("İlk açılış fiyatları çekiliyor..."):
+        if warmup_prices(missing, settings):
+            with ReadSession() as db:
+                prices_df = latest_prices(db)
+            publish_rows({r["asset"]: r for r in prices_df.to_dict("records")})
 
 price_map: Dict[str, Decimal] = {}
 source_map: Dict[str, str] = {}
@@ -337,6 +303,12 @@ cards = [
     ("ALTIN", "XAU_G", 2, "TL / gr"),
     ("GÜMÜŞ", "XAG_G", 2, "TL / gr"),
     ("BAKIR", "XCU_G", 4, "TL / gr"),
+    ("22 AYAR", "XAU_22_BILEZIK", 2, "TL / gr"),
+    ("ÇEYREK", "XAU_CEYREK", 2, "TL / adet"),
+    ("YARIM", "XAU_YARIM", 2, "TL / adet"),
+    ("TAM", "XAU_TAM", 2, "TL / adet"),
+    ("CUMHURİYET", "XAU_CUMHURIYET", 2, "TL / adet"),
+    ("ONS", "XAU_ONS", 2, "TL / ons"),
     ("USD/TRY", "USDTRY", 4, "TL / 1 USD"),
     ("EUR/TRY", "EURTRY", 4, "TL / 1 EUR"),
 ]
@@ -353,12 +325,48 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
+# Çapraz kur matrisi: aynı fiyat seti için önbellekten (tick başına bir kez kurulur)
+rates = cross_rates(price_map)
 colA, colB = st.columns([1, 4])
+with colB:
+    base = st.selectbox(
+        "Baz birim",
+        [u for u in UNITS if rates.has(u)],
+        format_func=lambda u: base_label(u) if u != TRY else "TL (TRY)",
+        key="base_unit",
+    )
+base_lbl = base_label(base)
 with colA:
+    # Bloklamaz: istek settings'e yazılır, servis (yoksa arka plan thread'i) tick'i çeker
     if st.button("🔄 Şimdi Güncelle", key="btn_refresh_prices"):
-        with st.spinner("Güncelleniyor..."):
-            warmup_prices_if_missing()
-        st.rerun()
+        with SessionLocal() as db:
+            req = request_refresh(db)
+            # kira kontrolü aynı transaction'da: commit sonrası ikinci bir BEGIN IMMEDIATE açılmaz
+            alive = service_alive(db)
+            db.commit()
+        if not alive:
+            start_local_refresh()
+        st.session_state["refresh_req"] = req
+        st.session_state["refresh_req_t"] = time.monotonic()
+
+    @st.fragment(run_every=REFRESH_POLL_S if st.session_state.get("refresh_req") else None)
+    def refresh_status():
+        """Yeni tick commit edilene kadar birkaç saniyede bir yoklar; gelince sayfa yeni fiyatlarla yenilenir."""
+        req = st.session_state.get("refresh_req")
+        if not req:
+            return
+        with ReadSession() as db:
+            s = db.get(Setting, TICK_KEY)
+        if not refresh_pending({REQUEST_KEY: req, TICK_KEY: s.value if s else ""}):
+            del st.session_state["refresh_req"]
+            st.rerun()
+        elif time.monotonic() - st.session_state["refresh_req_t"] > REFRESH_TIMEOUT_S:
+            del st.session_state["refresh_req"]
+            st.caption("⚠️ Güncelleme zaman aşımı; mevcut fiyatlar gösteriliyor.")
+        else:
+            st.caption("⏳ Güncelleniyor… (mevcut fiyatlar gösteriliyor)")
+
+    refresh_status()
 
 if stale_assets:
     st.warning("⚠️ Stale fiyatlar: " + ", ".join(stale_assets))
@@ -371,7 +379,10 @@ pnl_alert = None
 total_value = realized = unreal = total_pnl = None
 
 try:
-    inventory_df = compute_inventory_and_pnl(tx_df, price_map)
+    inventory_df = inventory_frame(
+        {a: {"qty": p.qty, "avg": p.avg_cost_try, "realized": p.realized_try} for a, p in positions.items()},
+        price_map,
+    )
     total_value = sum([D(x) for x in inventory_df["value_try"]])
     realized = sum([D(x) for x in inventory_df["realized_try"]])
     unreal = sum([D(x) for x in inventory_df["unrealized_try"]])
@@ -386,10 +397,14 @@ except Exception as e:
 with tabs[0]:
     st.subheader("Özet")
     c1, c2, c3, c4 = st.columns(4)
-    c1.metric("Portföy Değeri (TRY)", fmt(total_value, 2) if total_value is not None else "—")
-    c2.metric("Realized (TRY)", fmt(realized, 2) if realized is not None else "—")
-    c3.metric("Unrealized (TRY)", fmt(unreal, 2) if unreal is not None else "—")
-    c4.metric("Toplam PnL (TRY)", fmt(total_pnl, 2) if total_pnl is not None else "—")
+    summary = [None] * 4
+    if total_value is not None:
+        # 4 toplam tek çarpımla baz birime (kur: güncel tick)
+        summary = [D(round(float(v), 4)) for v in rates.convert([total_value, realized, unreal, total_pnl], base)]
+    c1.metric(f"Portföy Değeri ({base_lbl})", fmt(summary[0], 2) if summary[0] is not None else "—")
+    c2.metric(f"Realized ({base_lbl})", fmt(summary[1], 2) if summary[1] is not None else "—")
+    c3.metric(f"Unrealized ({base_lbl})", fmt(summary[2], 2) if summary[2] is not None else "—")
+    c4.metric(f"Toplam PnL ({base_lbl})", fmt(summary[3], 2) if summary[3] is not None else "—")
 
     if pnl_alert:
         tp, thr = pnl_alert
@@ -481,15 +496,7 @@ with tabs[1]:
                 if unit_price_d <= 0:
                     raise ValueError("Birim fiyat pozitif olmalı.")
 
-            # stok kontrolü (simulate)
-            sim = tx_df.copy()
-            new_row = pd.DataFrame([{
-                "asset": asset, "side": side,
-                "qty": str(qty_d), "unit_price": str(unit_price_d), "fee": str(fee_d)
-            }])
-            sim2 = pd.concat([sim, new_row], ignore_index=True)
-            _ = compute_inventory_and_pnl(sim2, price_map)  # yetersiz stok varsa patlar
-
+            # stok kontrolü insert ile aynı transaction'da (yetersiz stokta ValueError)
             insert_tx(asset, side, qty_d, unit_price_d, fee_d, note or None)
             st.success("İşlem kaydedildi.")
             st.rerun()
@@ -497,28 +504,107 @@ with tabs[1]:
         except Exception as e:
             st.error(f"Kayıt hatası: {e}")
 
+    with st.expander("📥 Toplu İçe Aktar (CSV)"):
+        up = st.file_uploader("Ekstre / döküm (CSV)", type=["csv", "txt"], key="imp_file")
+        prof_name = st.selectbox("Profil", list(PROFILES.keys()), key="imp_profile")
+        dry = st.checkbox("Sadece doğrula (yazma)", value=True, key="imp_dry")
+        if up is not None and st.button("İçe Aktar", key="btn_import"):
+            with SessionLocal() as db:
+                rep = import_transactions(db, up, PROFILES[prof_name], dry_run=dry)
+            st.write(f"Satır: **{rep.total_rows}** • Yazılan: **{rep.inserted}** • Hatalı: **{len(rep.errors)}**")
+            for c in rep.conflicts:
+                st.error(c)
+            if rep.errors:
+                st.dataframe(pd.DataFrame(rep.errors, columns=["satır", "hata"]), use_container_width=True)
+            if rep.inserted:
+                st.success("İçe aktarma tamamlandı. Yenile.")
+
 with tabs[2]:
     st.subheader("İşlem Geçmişi")
-    if tx_df.empty:
+    h1, h2, h3, h4, h5 = st.columns([2, 1, 2, 2, 1])
+    filt = h1.selectbox(
+        "Varlık filtresi",
+        ["ALL"] + ASSETS,
+        format_func=lambda x: "Hepsi" if x == "ALL" else asset_label(x),
+        key="tx_filter_asset",
+    )
+    filt_side = h2.selectbox("İşlem", ["ALL", "BUY", "SELL"], format_func=lambda x: {"ALL": "Hepsi", "BUY": "ALIŞ", "SELL": "SATIŞ"}[x], key="tx_filter_side")
+    filt_range = h3.date_input("Tarih aralığı", value=(), key="tx_filter_range")
+    filt_note = h4.text_input("Not içinde ara", value="", key="tx_filter_note")
+    page_size = h5.selectbox("Sayfa", [25, 50, 100, 250], index=1, key="tx_page_size")
+
+    tx_flt = TxFilter(
+        asset=None if filt == "ALL" else filt,
+        side=None if filt_side == "ALL" else filt_side,
+        start=filt_range[0].isoformat() if len(filt_range) == 2 else None,
+        end=(filt_range[1] + timedelta(days=1)).isoformat() if len(filt_range) == 2 else None,
+        note=filt_note.strip() or None,
+    )
+    # Filtre değişirse ilk sayfaya dön; cursor yığını = önceki sayfaların başlangıçları
+    if st.session_state.get("tx_page_key") != (tx_flt, page_size):
+        st.session_state["tx_page_key"] = (tx_flt, page_size)
+        st.session_state["tx_cursors"] = [None]
+    cursors = st.session_state["tx_cursors"]
+
+    with ReadSession() as db:
+        page_rows, next_cursor = tx_page(db, tx_flt, after=cursors[-1], limit=page_size)
+
+    if not page_rows:
         st.info("İşlem yok.")
     else:
-        filt = st.selectbox(
-            "Varlık filtresi",
-            ["ALL"] + list(ASSETS_META.keys()),
-            format_func=lambda x: "Hepsi" if x == "ALL" else asset_label(x),
-            key="tx_filter_asset",
-        )
-        df = tx_df.copy()
-        if filt != "ALL":
-            df = df[df["asset"] == filt]
+        df = pd.DataFrame(page_rows)
         df["asset_name"] = df["asset"].apply(asset_label)
         st.dataframe(df[["id", "ts", "asset_name", "side", "qty", "unit_price", "fee", "note"]], use_container_width=True)
-        st.download_button(
-            "CSV Export",
-            data=df.to_csv(index=False).encode("utf-8-sig"),
-            file_name="transactions_export.csv",
-            key="dl_tx_csv",
+
+    n1, n2, n3 = st.columns([1, 1, 6])
+    if n1.button("◀ Önceki", key="btn_tx_prev", disabled=len(cursors) == 1):
+        cursors.pop()
+        st.rerun()
+    if n2.button("Sonraki ▶", key="btn_tx_next", disabled=next_cursor is None):
+        cursors.append(next_cursor)
+        st.rerun()
+    n3.caption(f"Sayfa {len(cursors)}")
+
+    with st.expander("⬇️ Dışa Aktar"):
+        ex_kind = st.selectbox(
+            "Veri",
+            list(EXPORT_KINDS.keys()),
+            format_func=lambda k: EXPORT_KINDS[k],
+            key="ex_kind",
+        )
+        ex_fmt = st.radio("Biçim", ["csv", "excel"], format_func=lambda f: "CSV" if f == "csv" else "Excel (TR)", horizontal=True, key="ex_fmt")
+        ex_asset = st.selectbox(
+            "Varlık",
+            ["ALL"] + ASSETS,
+            format_func=lambda x: "Hepsi" if x == "ALL" else asset_label(x),
+            key="ex_asset",
+            disabled=ex_kind == "snapshots",
         )
+        ex_range = st.date_input("Tarih aralığı (boş = hepsi)", value=(), key="ex_range")
+        ex_gz = st.checkbox("Sıkıştır (gzip)", value=False, key="ex_gz")
+
+        # Export yalnızca istenince üretilir ve indirme butonu yalnız bu run'da gösterilir: sonraki
+        # rerun'larda dosya yeniden okunup gönderilmez, Streamlit'in bellekteki kopyası da bırakılır.
+        # Geçici dosya butona verildikten hemen sonra silinir (oturum bitince diskte kalmaz).
+        if st.button("Hazırla", key="btn_export_prepare"):
+            start = end = None
+            if len(ex_range) == 2:
+                start = ex_range[0].isoformat()
+                end = (ex_range[1] + timedelta(days=1)).isoformat()
+            with st.spinner("Hazırlanıyor..."):
+                path, n = export_to_tempfile(
+                    read_engine, ex_kind, fmt=ex_fmt, compress=ex_gz,
+                    asset=None if ex_asset == "ALL" else ex_asset, start=start, end=end,
+                )
+            try:
+                with open(path, "rb") as f:
+                    st.download_button(
+                        f"İndir ({n} satır)", data=f, key="dl_export",
+                        file_name=f"{ex_kind}_export" + (".csv.gz" if ex_gz else ".csv"),
+                    )
+            finally:
+                os.remove(path)
+            st.caption("İndirme butonu bir sonraki etkileşime kadar geçerli; gerekirse yeniden hazırlayın.")
 
 with tabs[3]:
     st.subheader("Envanter")
@@ -533,16 +619,72 @@ with tabs[3]:
         inv["Değer"] = inv["value_try"].apply(lambda x: str(q2(D(x))))
         inv["Unreal"] = inv["unrealized_try"].apply(lambda x: str(q2(D(x))))
         inv["Realized"] = inv["realized_try"].apply(lambda x: str(q2(D(x))))
-        st.dataframe(inv[["Varlık", "Miktar", "Ort. Maliyet", "Güncel Fiyat", "Değer", "Unreal", "Realized"]], use_container_width=True)
+        cols = ["Varlık", "Miktar", "Ort. Maliyet", "Güncel Fiyat", "Değer", "Unreal", "Realized"]
+        if base != TRY:
+            inv[f"Değer ({base_lbl})"] = rates.convert(inv["value_try"].astype(float).to_numpy(), base).round(4)
+            cols.append(f"Değer ({base_lbl})")
+        st.dataframe(inv[cols], use_container_width=True)
 
 with tabs[4]:
+    range_lbl = st.radio("Aralık", list(CHART_RANGES), index=2, horizontal=True, key="chart_range")
+    range_days = CHART_RANGES[range_lbl]
+    points = chart_points(CHART_WIDTH_PX, range_days)
+    last_tick = "" if prices_df.empty else str(prices_df["ts"].max())
+
+    st.subheader(f"Portföy Değeri ({base_lbl})")
+    snaps = equity_series(range_days, points, base, last_tick)
+    if snaps.empty:
+        st.info("Snapshot yok (servis her tick'te portföy değerini kaydeder).")
+    else:
+        chart = alt.Chart(snaps).mark_line().encode(
+            x="ts:T",
+            y=alt.Y("value:Q", title=base_lbl),
+            tooltip=["ts:T", "value:Q"],
+        ).interactive()
+        st.altair_chart(chart, use_container_width=True)
+
+    st.subheader(f"Risk Senaryoları (Monte Carlo, {base_lbl})")
+    held = () if inventory_df.empty else tuple(
+        (r["asset"], float(r["value_try"])) for _, r in inventory_df.iterrows() if D(r["qty"]) != 0
+    )
+    if not held:
+        st.info("Açık pozisyon yok.")
+    else:
+        m1, m2 = st.columns(2)
+        n_paths = m1.selectbox("Yol sayısı", [10_000, 100_000, 500_000, 1_000_000], index=1,
+                               format_func=lambda n: f"{n:,}".replace(",", "."), key="mc_paths")
+        method = m2.radio("Yöntem", ["bootstrap", "normal"], horizontal=True, key="mc_method")
+        held_total = sum(v for _, v in held)  # fiyatı olmayan pozisyonların değeri 0
+        weights = tuple((a, round(v / held_total, 4)) for a, v in held if v) if held_total > 0 else ()
+        with st.spinner("Senaryolar hesaplanıyor..."):
+            res = scenario_risk(weights, str(prices_df["ts"].max())[:10], n_paths, method) if weights else None
+        if res is None:
+            st.info("Senaryo için yeterli fiyat geçmişi yok (varlık başına en az 20 günlük kapanış gerekir).")
+        else:
+            k = float(rates.convert(1.0, base)) * held_total
+            st.dataframe(pd.DataFrame([
+                {"Ufuk (gün)": s.days, "Ortalama": s.mean * k, "Medyan": s.p50 * k,
+                 "VaR %95": s.var95 * k, "CVaR %95": s.cvar95 * k, "VaR %99": s.var99 * k, "CVaR %99": s.cvar99 * k}
+                for s in res["stats"]
+            ]).round(2), use_container_width=True, hide_index=True)
+            edges = res["hist_edges"] * k
+            hist = pd.DataFrame({"pnl": (edges[:-1] + edges[1:]) / 2, "n": res["hist_counts"]})
+            st.altair_chart(alt.Chart(hist).mark_bar().encode(
+                x=alt.X("pnl:Q", title=f"{res['hist_days']} günlük PnL ({base_lbl})"), y=alt.Y("n:Q", title="yol"),
+            ), use_container_width=True)
+            paths_lbl = f"{res['n_paths']:,}".replace(",", ".")
+            note = f"{res['n_obs']} günlük ortak getiri, {paths_lbl} yol, seed {res['seed']}"
+            if res["excluded"]:
+                note += " • geçmişi yetersiz, sabit kabul edildi: " + ", ".join(res["excluded"])
+            st.caption(note)
+
     st.subheader("Analiz (Fiyat Serileri)")
-    with SessionLocal() as db:
-        p = pd.read_sql(text("SELECT ts, asset, price, is_stale FROM prices ORDER BY id DESC LIMIT 2000"), db.bind)
+    last_by_asset = {} if prices_df.empty else prices_df.set_index("asset")["ts"].astype(str).to_dict()
+    series = [price_series(a, range_days, points, ts) for a, ts in sorted(last_by_asset.items())]
+    p = pd.concat(series, ignore_index=True) if series else pd.DataFrame()
     if p.empty:
         st.info("Fiyat geçmişi yok.")
     else:
-        p["price_num"] = p["price"].apply(lambda x: float(D(x)))
         p["asset_name"] = p["asset"].apply(asset_label)
         chart = alt.Chart(p).mark_line().encode(
             x="ts:T",
@@ -551,6 +693,36 @@ with tabs[4]:
             tooltip=["ts:T", "asset_name:N", "price_num:Q", "is_stale:Q"],
         ).interactive()
         st.altair_chart(chart, use_container_width=True)
+        st.caption(f"{range_lbl}: varlık başına en fazla {points} nokta (LTTB)")
+
+    hf_assets = parse_hf_assets(settings.get("hf_assets", ""), ASSETS)
+    if hf_assets:
+        st.subheader("Canlı (HF tick)")
+
+        @st.fragment(run_every=max(1, int(settings.get("hf_interval_s", "5"))))
+        def hf_live():
+            """Servisin tick halkasını (memmap) doğrudan okur; SQLite'a gitmez."""
+            ring = TickRing.open_reader(hf_assets)
+            if ring is None:
+                st.info("HF tick halkası yok (servis HF modunda çalışmıyor).")
+                return
+            now = time.time()
+            frames = [
+                pd.DataFrame({"ts": pd.to_datetime(w["t"], unit="s", utc=True).tz_convert("Europe/Istanbul"),
+                              "price": w["mid"], "asset_name": asset_label(a)})
+                for a in hf_assets if len((w := ring.window(a, HF_WINDOW_S, now)))
+            ]
+            if not frames:
+                st.info("Son 15 dakikada HF tick yok.")
+                return
+            live = pd.concat(frames, ignore_index=True)
+            st.altair_chart(alt.Chart(live).mark_line().encode(
+                x=alt.X("ts:T", title=None), y=alt.Y("price:Q", scale=alt.Scale(zero=False), title=None),
+                tooltip=["ts:T", "asset_name:N", "price:Q"],
+            ).properties(height=160).facet(row=alt.Row("asset_name:N", title=None)).resolve_scale(y="independent"),
+                use_container_width=True)
+
+        hf_live()
 
 with tabs[5]:
     st.subheader("Ayarlar")
@@ -571,13 +743,13 @@ with tabs[5]:
     fx_primary = st.selectbox(
         "FX Primary",
         ["exchangerate_host", "frankfurter", "tcmb"],
-        index=["exchangerate_host", "frankfurter", "tcmb"].index(settings.get("fx_primary", "exchangerate_host")),
+        index=["exchangerate_host", "frankfurter", "tcmb"].index(settings.get("fx_primary", "frankfurter")),
         key="set_fx_primary",
     )
     fx_fallback = st.selectbox(
         "FX Fallback",
         ["frankfurter", "exchangerate_host", "tcmb"],
-        index=["frankfurter", "exchangerate_host", "tcmb"].index(settings.get("fx_fallback", "frankfurter")),
+        index=["frankfurter", "exchangerate_host", "tcmb"].index(settings.get("fx_fallback", "tcmb")),
         key="set_fx_fallback",
     )
     metals_primary = st.selectbox(
@@ -589,35 +761,93 @@ with tabs[5]:
     metals_fallback = st.selectbox(
         "Metals Fallback",
         ["manual", "metals_dev", "kapalicarsi_apiluna"],
-        index=["manual", "metals_dev", "kapalicarsi_apiluna"].index(settings.get("metals_fallback", "manual")),
+        index=["manual", "metals_dev", "kapalicarsi_apiluna"].index(settings.get("metals_fallback", "metals_dev")),
         key="set_metals_fallback",
     )
     copper_provider = st.selectbox(
         "Copper Provider",
-        ["kitco", "manual"],
-        index=["kitco", "manual"].index(settings.get("copper_provider", "kitco")),
+        ["copper_stooq", "manual"],
+        index=["copper_stooq", "manual"].index(settings.get("copper_provider", "copper_stooq")),
         key="set_copper_provider",
     )
 
+    alert_rules = st.text_area(
+        "Alarm kuralları (JSON, servis her tick'te değerlendirir)",
+        value=settings.get("alert_rules", "[]"),
+        height=120,
+        help='Örn: [{"id": "altin", "kind": "price_above", "asset": "XAU_G", "threshold": "5800", "hysteresis": "50"}] — '
+             "kind: price_above, price_below, pct_move, pnl_below, stale",
+        key="set_alert_rules",
+    )
+    alert_webhook = st.text_input("Alarm webhook URL (opsiyonel)", value=settings.get("alert_webhook_url", ""), key="set_alert_webhook")
+    h1, h2 = st.columns([3, 1])
+    hf_sel = h1.multiselect("HF tick varlıkları (boş = kapalı)", ASSETS, default=parse_hf_assets(settings.get("hf_assets", ""), ASSETS),
+                            format_func=asset_label, key="set_hf_assets")
+    hf_interval = h2.number_input("HF aralık (sn)", value=int(settings.get("hf_interval_s", "5")), min_value=1, step=1,
+                                  key="set_hf_interval")
+
     if st.button("💾 Ayarları Kaydet", key="btn_save_settings"):
-        with SessionLocal() as db:
-            set_setting(db, "update_interval_min", str(int(update_interval)))
-            set_setting(db, "pnl_alert_threshold_try", str(Decimal(str(pnl_thr))))
-            set_setting(db, "fx_primary", fx_primary)
-            set_setting(db, "fx_fallback", fx_fallback)
-            set_setting(db, "metals_primary", metals_primary)
-            set_setting(db, "metals_fallback", metals_fallback)
-            set_setting(db, "copper_provider", copper_provider)
-            db.commit()
-        st.success("Ayarlar kaydedildi. Interval değiştiyse servisi yeniden başlat.")
+        try:
+            parse_rules({"alert_rules": alert_rules})
+            rules_err = None
+        except Exception as e:
+            rules_err = str(e)
+        if rules_err:
+            st.error(f"Alarm kuralları geçersiz: {rules_err}")
+        else:
+            with SessionLocal() as db:
+                set_setting(db, "update_interval_min", str(int(update_interval)))
+                set_setting(db, "pnl_alert_threshold_try", str(Decimal(str(pnl_thr))))
+                set_setting(db, "fx_primary", fx_primary)
+                set_setting(db, "fx_fallback", fx_fallback)
+                set_setting(db, "metals_primary", metals_primary)
+                set_setting(db, "metals_fallback", metals_fallback)
+                set_setting(db, "copper_provider", copper_provider)
+                set_setting(db, "alert_rules", alert_rules.strip() or "[]")
+                set_setting(db, "alert_webhook_url", alert_webhook.strip())
+                set_setting(db, "hf_assets", ",".join(hf_sel))
+                set_setting(db, "hf_interval_s", str(int(hf_interval)))
+                db.commit()
+            st.success("Ayarlar kaydedildi. Interval / HF ayarları değiştiyse servisi yeniden başlat.")
 
 with tabs[6]:
     st.subheader("Servis / Log")
-    st.code(f"DB: {get_db_path()}\nServis: python service/run_service.py\nLog: logs/service.log")
-    with SessionLocal() as db:
-        recent = pd.read_sql(text("SELECT id, ts, asset, price, source, is_stale, error_msg FROM prices ORDER BY id DESC LIMIT 25"), db.bind)
+    st.code(f"DB: {get_db_path()}\nServis: python service/run_service.py\nLog: {os.getenv('LOG_DIR', 'logs')}/service.jsonl")
+    if os.getenv("METALS_DEV_API_KEY"):
+        try:
+            q = RateLimiter("metals_dev", METALS_DEV_QUOTA).status()
+            st.caption(
+                f"metals.dev kotası: bu ay {q['month_used']}/{METALS_DEV_QUOTA.monthly}, "
+                f"sonraki çağrı {timedelta(seconds=round(q['next_in_s']))} sonra"
+            )
+        except Exception as e:
+            st.caption(f"metals.dev kota durumu okunamadı: {e}")
+    for key, label in (("maint_last_report", "Son DB bakımı"), ("maint_last_full_report", "Son tam DB bakımı")):
+        if settings.get(key):
+            r = json.loads(settings[key])
+            st.caption(
+                f"{label}: {r['duration_ms']} ms, DB {r['before']['db'] / 1e6:.1f} → {r['after']['db'] / 1e6:.1f} MB, "
+                f"WAL {r['before']['wal'] / 1e6:.1f} → {r['after']['wal'] / 1e6:.1f} MB, checkpoint: {r['checkpoint'].get('mode') or '—'}"
+            )
+    with ReadSession() as db:
+        recent = pd.read_sql(text(RECENT_PRICES_SQL), db.bind)
     st.dataframe(recent, use_container_width=True)
 
+    # Son log kayıtları: servis / UI / CLI'nin ortak log halkasından (dosya okunmaz)
+    lc1, lc2 = st.columns([1, 3])
+    with lc1:
+        min_level = st.selectbox("Seviye", ["INFO", "WARNING", "ERROR", "DEBUG"], key="log_level")
+    logs = list(reversed(tail_logs(300, min_level=min_level)))
+    with lc2:
+        names = st.multiselect("Logger", sorted({r["logger"] for r in logs}), key="log_names")
+    if names:
+        logs = [r for r in logs if r["logger"] in names]
+    if logs:
+        cols = ["ts", "level", "logger", "msg", "tick_id", "provider", "latency_ms", "assets"]
+        st.dataframe(pd.DataFrame(logs).reindex(columns=cols), use_container_width=True, hide_index=True)
+    else:
+        st.caption("Henüz log kaydı yok.")
+
 with tabs[7]:
     st.subheader("Manuel Fiyat (Fail-safe)")
     a = st.selectbox("Varlık", list(ASSETS_META.keys()), format_func=asset_label, key="man_a")
@@ -628,8 +858,9 @@ with tabs[7]:
             if vd <= 0:
                 raise ValueError("Fiyat pozitif olmalı.")
             with SessionLocal() as db:
-                insert_manual_price(db, a, vd, source="manual")
+                board_rows = price_rows([insert_manual_price(db, a, vd, source="manual")])
                 db.commit()
+            publish_rows(board_rows, create=False)
             st.success("Manuel fiyat kaydedildi. Yenile.")
         except Exception as e:
             st.error(f"Hata: {e}")
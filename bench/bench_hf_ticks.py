@@ -0,0 +1,120 @@
+"""
+HF tick modu benchmark'ı: halka throughput'u ve SQLite yazma hızı (ağ gerektirmez).
+
+    python -m bench.bench_hf_ticks --hours 8 --interval-s 5 --flush-s 60 --thresholds-bp 0,1,2,5
+
+Sentetik rastgele yürüyüş fiyatları üreten bir router ile:
+- sürekli tick throughput'u (halka + pano, ticks/s),
+- simüle edilmiş bir işlem günü boyunca eşik başına yazılan satır / saat ve flush süresi,
+- karşılaştırma için tick başına ORM insert + commit (eski yol) maliyeti ölçülür.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from decimal import Decimal
+from typing import Dict, List
+
+import numpy as np
+
+ASSETS = ["XAU_G", "USDTRY"]
+START = {"XAU_G": 5690.0, "USDTRY": 41.83}
+
+
+class SyntheticRouter:
+    """Tick başına ~1 bp oynaklıkla rastgele yürüyüş; spread %0.3 (altın) / %0.05 (kur)."""
+
+    def __init__(self, seed: int = 7, vol_bp: float = 1.0):
+        self.rng = np.random.default_rng(seed)
+        self.mid = dict(START)
+        self.vol = vol_bp / 10_000
+
+    def get_all_quotes_try(self, assets, manual_prices=None):
+        quotes: Dict[str, dict] = {}
+        for a in assets:
+            self.mid[a] *= float(np.exp(self.rng.normal(0, self.vol)))
+            half = self.mid[a] * (0.0015 if a == "XAU_G" else 0.00025)
+            m = Decimal(repr(round(self.mid[a], 4)))
+            quotes[a] = {"mid": m, "bid": m - Decimal(repr(round(half, 4))), "ask": m + Decimal(repr(round(half, 4)))}
+        return quotes, {a: "synthetic" for a in assets}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="HF tick ring / batched flush benchmark")
+    ap.add_argument("--hours", type=float, default=8.0)
+    ap.add_argument("--interval-s", type=float, default=5.0)
+    ap.add_argument("--flush-s", type=float, default=60.0)
+    ap.add_argument("--thresholds-bp", default="0,1,2,5")
+    ap.add_argument("--throughput-s", type=float, default=2.0)
+    ap.add_argument("--baseline-ticks", type=int, default=500)
+    a = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench_hf_")
+    os.environ["DB_PATH"] = os.path.join(tmp, "bench.db")
+    os.environ.setdefault("LOG_DIR", os.path.join(tmp, "logs"))
+
+    from sqlalchemy import func, select
+
+    from db.init_db import init_db
+    from db.models import Price
+    from db.session import SessionLocal
+    from service.hf_ticks import HFTicker
+    from utils.tick_ring import TickRing
+
+    init_db()
+
+    # 1) sürekli throughput: yalnız tick (halka + pano), flush yok
+    ring = TickRing.open_writer(ASSETS, 4096, path=os.path.join(tmp, "tp.ticks"))
+    ticker = HFTicker(ASSETS, SyntheticRouter(), ring=ring)
+    n, t0 = 0, time.perf_counter()
+    while time.perf_counter() - t0 < a.throughput_s:
+        n += ticker.tick()
+    wall = time.perf_counter() - t0
+    print(f"tick throughput       : {n / wall:10.0f} asset-ticks/s  ({n / wall / len(ASSETS):.0f} tick/s)")
+
+    # 2) simüle işlem günü: eşik başına yazılan satırlar ve flush süreleri
+    steps = int(a.hours * 3600 / a.interval_s)
+    per_flush = max(1, int(a.flush_s / a.interval_s))
+    print(f"simulated session     : {a.hours:g} h, {steps} ticks/asset, flush every {a.flush_s:g}s")
+    print(f"{'bp':>5} {'rows':>8} {'rows/h':>8} {'of ticks':>9} {'commits/h':>10} {'flush p50':>10} {'flush p99':>10}")
+    for bp in [float(x) for x in a.thresholds_bp.split(",") if x.strip()]:
+        with SessionLocal() as db:
+            db.query(Price).delete()
+            db.commit()
+        ring = TickRing.open_writer(ASSETS, 4096, path=os.path.join(tmp, f"sim_{bp:g}.ticks"))
+        ticker = HFTicker(ASSETS, SyntheticRouter(), ring=ring, min_change_bp=bp)
+        flush_ms: List[float] = []
+        t_sim = time.time()
+        for i in range(1, steps + 1):
+            ticker.tick(now=t_sim + i * a.interval_s)
+            if i % per_flush == 0 or i == steps:
+                t = time.perf_counter()
+                ticker.flush()
+                flush_ms.append((time.perf_counter() - t) * 1000)
+        with SessionLocal() as db:
+            rows = db.execute(select(func.count()).select_from(Price)).scalar_one()
+        flush_ms.sort()
+        print(f"{bp:5g} {rows:8d} {rows / a.hours:8.0f} {rows / (steps * len(ASSETS)):9.1%} "
+              f"{ticker.stats['commits'] / a.hours:10.0f} "
+              f"{statistics.median(flush_ms):8.2f}ms {flush_ms[min(len(flush_ms) - 1, int(len(flush_ms) * 0.99))]:8.2f}ms")
+
+    # 3) eski yol: tick başına ORM satırı + commit
+    router = SyntheticRouter()
+    t0 = time.perf_counter()
+    for _ in range(a.baseline_ticks):
+        quotes, sources = router.get_all_quotes_try(ASSETS)
+        with SessionLocal() as db:
+            for asset, q in quotes.items():
+                db.add(Price(ts="2026-01-01T00:00:00+03:00", asset=asset, price=str(q["mid"]), currency="TRY",
+                             source=sources[asset], is_stale=0))
+            db.commit()
+    per_tick = (time.perf_counter() - t0) * 1000 / a.baseline_ticks
+    print(f"per-tick ORM commit   : {per_tick:8.2f} ms/tick, {len(ASSETS) * 3600 / a.interval_s:.0f} rows/h, "
+          f"{3600 / a.interval_s:.0f} commits/h at {a.interval_s:g}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Kapalıçarşı payload parse benchmark'ı (kaydedilmiş fixture üzerinde).
+
+    python -m bench.bench_kapalicarsi --scale 1,10,100 --repeat 200
+
+legacy: eski yöntem — her varlık için tüm listeyi substring ile tarayıp sayıyı her seferinde normalize eder.
+index : providers.metals_kapalicarsi_apiluna.parse_index — tek geçiş + O(1) lookup.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from decimal import Decimal
+from typing import Dict, List
+
+from providers.metals_kapalicarsi_apiluna import SUPPORTED, parse_index
+from utils.decimal import parse_decimal
+from utils.http_fixtures import fixture_relpath_for_url, load_fixture
+
+LEGACY_KEYWORDS: Dict[str, List[str]] = {
+    "XAU_G": ["gram alt", "gramalt", "altın", "altin"],
+    "XAG_G": ["gram güm", "gram gum", "gümüş", "gumus", "silver"],
+    "XAU_CEYREK": ["çeyrek", "ceyrek"],
+    "XAU_YARIM": ["yarım", "yarim"],
+    "XAU_TAM": ["tam alt"],
+    "XAU_CUMHURIYET": ["cumhuriyet"],
+    "XAU_22_BILEZIK": ["22 ayar", "bilezik"],
+}
+
+
+def _items(payload: dict) -> List[dict]:
+    out: List[dict] = []
+    for v in payload.values():
+        if isinstance(v, list):
+            out.extend(v)
+    return out
+
+
+def legacy_lookup(items: List[dict]) -> Dict[str, Decimal]:
+    out: Dict[str, Decimal] = {}
+    for asset, kws in LEGACY_KEYWORDS.items():
+        for it in items:
+            name = str(it.get("name") or it.get("adi") or it.get("kod") or "").lower()
+            if any(k in name for k in kws):
+                out[asset] = (parse_decimal(it["alis"]) + parse_decimal(it["satis"])) / Decimal("2")
+                break
+    return out
+
+
+def _time(fn, repeat: int) -> float:
+    t = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t) / repeat * 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Kapalıçarşı parse benchmark")
+    ap.add_argument("--fixtures", default="tests/fixtures/http")
+    ap.add_argument("--scale", default="1,10,100", help="payload listesi kaç kat çoğaltılsın")
+    ap.add_argument("--repeat", type=int, default=200)
+    a = ap.parse_args()
+
+    fx = load_fixture(a.fixtures, fixture_relpath_for_url("https://kapalicarsi.apiluna.org/"))
+    if fx is None:
+        raise SystemExit("kapalicarsi fixture yok; önce python -m bench.record_fixtures")
+    base = _items(json.loads(fx["body"]))
+
+    print(f"{'items':>7} {'legacy us':>10} {'index us':>9} {'lookup ns':>10} {'symbols':>8}")
+    for n in [int(x) for x in a.scale.split(",")]:
+        items = base * n
+        legacy_us = _time(lambda: legacy_lookup(items), a.repeat)
+        index_us = _time(lambda: parse_index(items), a.repeat)
+        idx = parse_index(items)
+        t = time.perf_counter()
+        for _ in range(a.repeat):
+            for s in SUPPORTED:
+                idx.get(s)
+        lookup_ns = (time.perf_counter() - t) / (a.repeat * len(SUPPORTED)) * 1e9
+        print(f"{len(items):>7} {legacy_us:>10.1f} {index_us:>9.1f} {lookup_ns:>10.1f} {len(idx):>8}")
+
+
+if __name__ == "__main__":
+    main()
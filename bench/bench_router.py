@@ -0,0 +1,96 @@
+"""
+ProviderRouter throughput / fallback benchmark'ı (ağ gerektirmez).
+
+    python -m bench.bench_router --iterations 50 --latency-ms 20 --error-rates 0,0.1,0.3
+
+Her senaryo için stand-in sunucu fixture'ları oynatır; router aynı fetch yolunu
+(retry session'lar dahil) kullanır. Varsayılan: süreç geneli router + keep-alive havuzu
+(get_router); `--fresh-router` her iterasyonda yeni router + yeni session kurar (eski yol).
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import time
+from typing import List
+
+from bench.standin_server import StandInConfig, StandInServer
+
+ASSETS = ["XAU_G", "XAG_G", "XCU_G", "USDTRY", "EURTRY"]
+
+
+def run_scenario(cfg: StandInConfig, iterations: int, fresh: bool = False) -> dict:
+    with StandInServer(cfg) as srv:
+        os.environ["HTTP_STANDIN_URL"] = srv.base_url
+        try:
+            from providers.router import ProviderRouter, get_router
+            from utils.http import build_retry_session, http_stats
+
+            lat: List[float] = []
+            got: List[int] = []
+            h0 = http_stats()
+            t0 = time.perf_counter()
+            for _ in range(iterations):
+                t = time.perf_counter()
+                if fresh:
+                    router = ProviderRouter(timeout_s=5)
+                    fresh_session = build_retry_session(timeout_s=5)
+                    for p in (*router.fx, router.metals, router.copper):
+                        p.session = fresh_session
+                else:
+                    router = get_router(timeout_s=5)
+                quotes, _sources = router.get_all_quotes_try(ASSETS, manual_prices=None)
+                lat.append((time.perf_counter() - t) * 1000)
+                got.append(len(quotes))
+            wall = time.perf_counter() - t0
+            h1 = http_stats()
+        finally:
+            os.environ.pop("HTTP_STANDIN_URL", None)
+
+        lat.sort()
+        return {
+            "error_rate": cfg.error_rate,
+            "ticks_per_s": iterations / wall if wall else 0.0,
+            "p50_ms": statistics.median(lat),
+            "p99_ms": lat[min(len(lat) - 1, int(len(lat) * 0.99))],
+            "avg_assets": sum(got) / len(got),
+            "upstream_requests": srv.stats.requests,
+            "errors_injected": srv.stats.errors_injected,
+            "new_conns": h1["new_connections"] - h0["new_connections"],
+            "handshake_ms": h1["handshake_ms"] - h0["handshake_ms"],
+        }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Offline ProviderRouter benchmark")
+    ap.add_argument("--fixtures", default="tests/fixtures/http")
+    ap.add_argument("--iterations", type=int, default=50)
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--error-rates", default="0")
+    ap.add_argument("--pad-bytes", type=int, default=0)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--fresh-router", action="store_true", help="her iterasyonda yeni router/session (karşılaştırma)")
+    a = ap.parse_args()
+
+    print(f"{'err':>5} {'ticks/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'assets':>7} {'reqs':>6} {'inj':>5} {'conns':>6} {'hs ms':>7}")
+    for er in [float(x) for x in a.error_rates.split(",")]:
+        cfg = StandInConfig(
+            fixture_dir=a.fixtures,
+            latency_ms=a.latency_ms,
+            jitter_ms=a.jitter_ms,
+            error_rate=er,
+            pad_bytes=a.pad_bytes,
+            seed=a.seed,
+        )
+        r = run_scenario(cfg, a.iterations, fresh=a.fresh_router)
+        print(
+            f"{r['error_rate']:>5.2f} {r['ticks_per_s']:>9.1f} {r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f} "
+            f"{r['avg_assets']:>7.2f} {r['upstream_requests']:>6} {r['errors_injected']:>5} "
+            f"{r['new_conns']:>6} {r['handshake_ms']:>7.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
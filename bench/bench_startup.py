@@ -0,0 +1,75 @@
+"""
+Uygulama açılış benchmark'ı: time-to-first-render ve rerun süresi (ağ gerektirmez).
+
+    python -m bench.bench_startup --reruns 20
+
+Geçici bir DB ve stand-in sunucu ile app.py'yi Streamlit AppTest üzerinden çalıştırır.
+Ayrıca init_db'nin ilk kurulum ve "şema güncel" yolları ayrı ölçülür.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from typing import List
+
+from bench.standin_server import StandInConfig, StandInServer
+
+
+def _ms(t0: float) -> float:
+    return (time.perf_counter() - t0) * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser(description="App time-to-first-render benchmark")
+    ap.add_argument("--fixtures", default="tests/fixtures/http")
+    ap.add_argument("--reruns", type=int, default=20)
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    a = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench_startup_")
+    # db.session engine'i import anında DB_PATH'i okur: import'lardan önce ayarla
+    os.environ["DB_PATH"] = os.path.join(tmp, "bench.db")
+    os.environ.setdefault("LOG_DIR", os.path.join(tmp, "logs"))
+
+    with StandInServer(StandInConfig(fixture_dir=a.fixtures, latency_ms=a.latency_ms)) as srv:
+        os.environ["HTTP_STANDIN_URL"] = srv.base_url
+        try:
+            from db.init_db import init_db
+
+            t = time.perf_counter()
+            init_db()
+            init_cold = _ms(t)
+            t = time.perf_counter()
+            init_db()
+            init_warm = _ms(t)
+
+            from streamlit.testing.v1 import AppTest
+
+            at = AppTest.from_file("app.py", default_timeout=60)
+            t = time.perf_counter()
+            at.run()
+            first = _ms(t)
+            if at.exception:
+                raise SystemExit(f"app raised: {[e.value for e in at.exception]}")
+
+            reruns: List[float] = []
+            for _ in range(a.reruns):
+                t = time.perf_counter()
+                at.run()
+                reruns.append(_ms(t))
+        finally:
+            os.environ.pop("HTTP_STANDIN_URL", None)
+
+        print(f"init_db (new DB)      : {init_cold:8.1f} ms")
+        print(f"init_db (schema ok)   : {init_warm:8.1f} ms")
+        print(f"first render (warmup) : {first:8.1f} ms  upstream requests={srv.stats.requests}")
+        if reruns:
+            reruns.sort()
+            print(f"rerun p50 / max       : {statistics.median(reruns):8.1f} / {reruns[-1]:.1f} ms  (n={len(reruns)})")
+
+
+if __name__ == "__main__":
+    main()
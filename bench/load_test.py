@@ -0,0 +1,305 @@
+"""
+Eşzamanlı yük testi: N UI okuru + servis tick yazarı + manuel işlem yazarı, geçici bir DB üzerinde.
+
+    python -m bench.load_test --readers 8 --duration-s 20 --tick-interval-ms 200 --manual-interval-ms 500
+
+Her okur süreci app.py'nin rerun başına çalıştırdığı sorguları (ayarlar, pozisyonlar, son
+fiyatlar, işlem sayfası, son fiyat satırları; `--miss-rate` olasılıkla fiyat / portföy
+serileri) aynı engine ayarlarıyla (db/session.py) koşar. Yazar süreçleri servis tick'ini
+(tüm varlıklar + snapshot + ayarlar, tek transaction) ve UI'dan girilen işlem / manuel
+fiyatı tekrar oynatır.
+
+busy_timeout varsayılan olarak 0'a çekilir ve kilitlenmeler harness içinde yeniden denenir:
+böylece "database is locked" durumları gecikmenin içinde kaybolmaz, sayılır. `--lock-deadline-s`
+aşılırsa işlem hata sayılır (üretimdeki busy_timeout=5000'in karşılığı). Üretim davranışını
+ölçmek için `--busy-timeout-ms 5000`.
+
+Rapor: işlem türü başına p50 / p99 / max gecikme, yeniden deneme ve hata sayıları, WAL boyutu.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+from multiprocessing import get_context
+from typing import Callable, Dict, List
+
+MB = 1024 * 1024
+
+
+class Stats:
+    def __init__(self):
+        self.lat: Dict[str, List[float]] = {}
+        self.retries: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+
+    def as_dict(self) -> dict:
+        return {"lat": self.lat, "retries": self.retries, "errors": self.errors}
+
+
+def _is_busy(e: Exception) -> bool:
+    msg = str(e).lower()
+    return "locked" in msg or "busy" in msg
+
+
+def _timed(stats: Stats, kind: str, fn: Callable[[], None], deadline_s: float) -> None:
+    """fn'i kilitlenmede yeniden dener; başarılı işlemin toplam süresi (bekleme dahil) kaydedilir."""
+    from sqlalchemy.exc import OperationalError
+
+    t0 = time.perf_counter()
+    tries = 0
+    while True:
+        try:
+            fn()
+            break
+        except (OperationalError, sqlite3.OperationalError) as e:
+            if not _is_busy(e):
+                raise
+            tries += 1
+            if time.perf_counter() - t0 > deadline_s:
+                stats.errors[kind] = stats.errors.get(kind, 0) + 1
+                stats.retries[kind] = stats.retries.get(kind, 0) + tries
+                return
+            time.sleep(0.001 * min(tries, 20))
+    stats.lat.setdefault(kind, []).append((time.perf_counter() - t0) * 1000)
+    stats.retries[kind] = stats.retries.get(kind, 0) + tries
+
+
+def _set_busy_timeout(ms: int) -> None:
+    """db/session.py'nin connect event'lerinden sonra çalışır: busy_timeout'u ezer."""
+    from sqlalchemy import event
+
+    from db.session import engine, read_engine
+
+    for eng in (engine, read_engine):
+        event.listen(eng, "connect", lambda dbapi_con, _rec: dbapi_con.execute(f"PRAGMA busy_timeout={int(ms)}"))
+
+
+def _reader(idx: int, cfg: dict, go, out) -> None:
+    import pandas as pd
+    from sqlalchemy import select, text
+
+    from db.models import Setting
+    from db.positions import load_positions
+    from db.queries import EQUITY_SERIES_SQL, PRICE_SERIES_SQL, RECENT_PRICES_SQL, TxFilter, tx_page
+    from db.readonly import latest_prices_sql
+    from db.session import ReadSession
+    from utils.assets import ASSETS
+    from utils.time import now_tr
+
+    _set_busy_timeout(cfg["busy_timeout_ms"])
+    rng = random.Random(idx)
+    stats = Stats()
+    start = (now_tr() - timedelta(days=90)).isoformat(timespec="seconds")
+
+    def rerun():
+        with ReadSession() as db:
+            db.execute(select(Setting)).scalars().all()
+            load_positions(db)
+            sql, params = latest_prices_sql(ASSETS)
+            pd.read_sql(text(sql), db.bind, params=params)
+            tx_page(db, TxFilter(), limit=50)
+            pd.read_sql(text(RECENT_PRICES_SQL), db.bind)
+
+    def series():
+        with ReadSession() as db:
+            for a in ASSETS:
+                pd.read_sql(text(PRICE_SERIES_SQL), db.bind, params={"a": a, "s": start})
+            pd.read_sql(text(EQUITY_SERIES_SQL), db.bind, params={"s": start})
+
+    go.wait()
+    end = time.monotonic() + cfg["duration_s"]
+    while time.monotonic() < end:
+        _timed(stats, "rerun", rerun, cfg["lock_deadline_s"])
+        if rng.random() < cfg["miss_rate"]:
+            _timed(stats, "series (cache miss)", series, cfg["lock_deadline_s"])
+        time.sleep(cfg["think_ms"] / 1000)
+    out.put(stats.as_dict())
+
+
+def _tick_writer(cfg: dict, go, out) -> None:
+    from db.positions import load_positions
+    from db.session import SessionLocal
+    from service.refresh import TICK_KEY
+    from service.run_service import insert_price, insert_snapshot, set_kv
+    from utils.assets import ASSETS
+    from utils.time import iso_now_tr
+
+    _set_busy_timeout(cfg["busy_timeout_ms"])
+    stats = Stats()
+    rng = random.Random(1)
+    px = {a: Decimal("100") for a in ASSETS}
+
+    def tick():
+        ts = iso_now_tr()
+        with SessionLocal() as db:
+            for a in ASSETS:
+                px[a] = (px[a] * Decimal(str(1 + rng.gauss(0, 0.001)))).quantize(Decimal("0.0001"))
+                insert_price(db, ts, a, px[a], "loadtest", 0, None, px[a] - 1, px[a] + 1)
+            insert_snapshot(db, ts, px, load_positions(db))
+            set_kv(db, "last_success_ts", ts)
+            set_kv(db, TICK_KEY, ts)
+            db.commit()
+
+    go.wait()
+    end = time.monotonic() + cfg["duration_s"]
+    while time.monotonic() < end:
+        _timed(stats, "service tick", tick, cfg["lock_deadline_s"])
+        time.sleep(cfg["tick_interval_ms"] / 1000)
+    out.put(stats.as_dict())
+
+
+def _manual_writer(cfg: dict, go, out) -> None:
+    from db.positions import record_tx
+    from db.session import SessionLocal
+    from service.run_service import insert_price
+    from utils.time import iso_now_tr
+
+    _set_busy_timeout(cfg["busy_timeout_ms"])
+    stats = Stats()
+
+    def manual_price():
+        with SessionLocal() as db:
+            insert_price(db, iso_now_tr(), "XCU_G", Decimal("0.45"), "manual", 0, None)
+            db.commit()
+
+    def tx():
+        with SessionLocal() as db:
+            record_tx(db, "XAU_G", "BUY", Decimal("0.1"), Decimal("5000"), Decimal("0"), "loadtest")
+
+    go.wait()
+    end = time.monotonic() + cfg["duration_s"]
+    i = 0
+    while time.monotonic() < end:
+        if i % 2:
+            _timed(stats, "manual price", manual_price, cfg["lock_deadline_s"])
+        else:
+            _timed(stats, "manual tx", tx, cfg["lock_deadline_s"])
+        i += 1
+        time.sleep(cfg["manual_interval_ms"] / 1000)
+    out.put(stats.as_dict())
+
+
+def seed(days: int, step_min: int = 30) -> None:
+    """Geçmiş: varlık başına `days` gün, `step_min` dakikada bir fiyat + snapshot ve birkaç işlem."""
+    import json
+
+    from sqlalchemy import insert
+
+    from db.init_db import init_db
+    from db.models import Price, Snapshot
+    from db.positions import record_tx
+    from db.session import SessionLocal
+    from utils.assets import ASSETS
+    from utils.time import now_tr
+
+    init_db()
+    t0 = now_tr() - timedelta(days=days)
+    steps = days * 24 * 60 // step_min
+    prices, snaps = [], []
+    for i in range(steps):
+        ts = (t0 + timedelta(minutes=step_min * i)).isoformat(timespec="seconds")
+        for j, a in enumerate(ASSETS):
+            p = str(Decimal(100 + j) + Decimal(i % 97) / 10)
+            prices.append({"ts": ts, "asset": a, "price": p, "price_buy": p, "price_sell": p, "currency": "TRY",
+                           "source": "seed", "is_stale": 0, "error_msg": None})
+        snaps.append({"ts": ts, "total_value_try": str(1000 + i % 50), "breakdown_json": json.dumps({"USDTRY": "41.8"})})
+    with SessionLocal() as db:
+        db.execute(insert(Price), prices)
+        db.execute(insert(Snapshot), snaps)
+        db.commit()
+        for k in range(50):
+            record_tx(db, "XAU_G", "BUY", Decimal("1"), Decimal("5000"), Decimal("0"), "seed",
+                      ts=(t0 + timedelta(hours=k)).isoformat(timespec="seconds"))
+
+
+def _pct(xs: List[float], q: float) -> float:
+    return xs[min(len(xs) - 1, int(len(xs) * q))]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="UI readers vs service writer SQLite load test")
+    ap.add_argument("--readers", type=int, default=4)
+    ap.add_argument("--duration-s", type=float, default=10.0)
+    ap.add_argument("--think-ms", type=float, default=50.0, help="okur rerun'ları arası bekleme")
+    ap.add_argument("--miss-rate", type=float, default=0.2, help="rerun'da seri önbelleği ıskalama olasılığı")
+    ap.add_argument("--tick-interval-ms", type=float, default=200.0)
+    ap.add_argument("--manual-interval-ms", type=float, default=500.0)
+    ap.add_argument("--busy-timeout-ms", type=int, default=0)
+    ap.add_argument("--lock-deadline-s", type=float, default=5.0)
+    ap.add_argument("--seed-days", type=int, default=90)
+    ap.add_argument("--db", default=None, help="varsayılan: geçici dizinde yeni DB")
+    ap.add_argument("--profile", default=None, help="SQLITE_PROFILE (default / low_mem / fast)")
+    a = ap.parse_args(argv)
+
+    tmp = tempfile.mkdtemp(prefix="load_test_")
+    # alt süreçler (spawn) ortamı devralır; db.session DB_PATH'i import anında okur
+    os.environ["DB_PATH"] = a.db or os.path.join(tmp, "load.db")
+    os.environ.setdefault("LOG_DIR", os.path.join(tmp, "logs"))
+    if a.profile:
+        os.environ["SQLITE_PROFILE"] = a.profile
+    db_path = os.environ["DB_PATH"]
+
+    t = time.perf_counter()
+    seed(a.seed_days)
+    print(f"seeded {a.seed_days} days in {time.perf_counter() - t:.1f}s -> {db_path}")
+
+    cfg = {k: getattr(a, k) for k in ("duration_s", "think_ms", "miss_rate", "tick_interval_ms", "manual_interval_ms",
+                                      "busy_timeout_ms", "lock_deadline_s")}
+    ctx = get_context("spawn")
+    go, out = ctx.Event(), ctx.Queue()
+    procs = [ctx.Process(target=_reader, args=(i, cfg, go, out)) for i in range(a.readers)]
+    procs += [ctx.Process(target=_tick_writer, args=(cfg, go, out)), ctx.Process(target=_manual_writer, args=(cfg, go, out))]
+    for p in procs:
+        p.start()
+    time.sleep(2.0)  # spawn + import'lar bitsin; ölçüm go ile aynı anda başlar
+
+    wal_path = db_path + "-wal"
+    wal = lambda: os.path.getsize(wal_path) if os.path.exists(wal_path) else 0  # noqa: E731
+    wal_start, wal_max = wal(), 0
+    go.set()
+    results = []
+    end = time.monotonic() + a.duration_s + 30
+    while len(results) < len(procs) and time.monotonic() < end:
+        wal_max = max(wal_max, wal())
+        try:
+            results.append(out.get(timeout=0.05))
+        except Exception:
+            pass
+    for p in procs:
+        p.join(timeout=5)
+
+    lat: Dict[str, List[float]] = {}
+    retries: Dict[str, int] = {}
+    errors: Dict[str, int] = {}
+    for r in results:
+        for k, v in r["lat"].items():
+            lat.setdefault(k, []).extend(v)
+        for k, v in r["retries"].items():
+            retries[k] = retries.get(k, 0) + v
+        for k, v in r["errors"].items():
+            errors[k] = errors.get(k, 0) + v
+
+    print(f"readers={a.readers} duration={a.duration_s:g}s busy_timeout={a.busy_timeout_ms}ms profile={os.getenv('SQLITE_PROFILE', 'default')}")
+    print(f"{'op':22s} {'n':>7} {'ops/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'retries':>8} {'locked':>7}")
+    for k in sorted(set(lat) | set(errors)):
+        xs = sorted(lat.get(k, []))
+        if xs:
+            print(f"{k:22s} {len(xs):7d} {len(xs) / a.duration_s:8.1f} {statistics.median(xs):8.2f} "
+                  f"{_pct(xs, 0.99):8.2f} {xs[-1]:8.2f} {retries.get(k, 0):8d} {errors.get(k, 0):7d}")
+        else:
+            print(f"{k:22s} {0:7d} {'-':>8} {'-':>8} {'-':>8} {'-':>8} {retries.get(k, 0):8d} {errors.get(k, 0):7d}")
+    print(f"WAL: start {wal_start / MB:.2f} MB, max {wal_max / MB:.2f} MB, end {wal() / MB:.2f} MB; "
+          f"DB {os.path.getsize(db_path) / MB:.2f} MB")
+    if len(results) < len(procs):
+        print(f"warning: {len(procs) - len(results)} worker(s) did not report")
+
+
+if __name__ == "__main__":
+    main()
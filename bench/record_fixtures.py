@@ -0,0 +1,53 @@
+"""
+Canlı upstream cevaplarını fixture olarak kaydeder.
+
+    python -m bench.record_fixtures --out tests/fixtures/http
+
+API key gibi gizli query parametreleri fixture'a yazılmaz (utils/http_fixtures.SECRET_PARAMS).
+"""
+from __future__ import annotations
+
+import argparse
+import os
+
+
+def record_all(out_dir: str) -> dict:
+    os.environ["HTTP_RECORD_DIR"] = out_dir
+    os.environ.pop("HTTP_STANDIN_URL", None)
+
+    # Session'lar HTTP_RECORD_DIR'e göre kurulduğu için import/instance env'den sonra
+    from providers.copper_stooq import CopperStooqProvider
+    from providers.fx_exchangerate_host import ExchangerateHostFX
+    from providers.fx_frankfurter import FrankfurterFXProvider
+    from providers.fx_tcmb import TCMBFX
+    from providers.metals_kapalicarsi_apiluna import KapaliCarsiApilunaProvider
+    from providers.metals_metalsdev import MetalsDevProvider
+
+    calls = {
+        "kapalicarsi_apiluna": lambda: KapaliCarsiApilunaProvider().get_prices_try(["XAU_G", "XAG_G"]),
+        "frankfurter": lambda: FrankfurterFXProvider().get_prices_try(["USDTRY", "EURTRY"]),
+        "tcmb": lambda: TCMBFX().get_prices_try(["USDTRY", "EURTRY"]),
+        "exchangerate_host": lambda: ExchangerateHostFX().get_prices_try(["USDTRY", "EURTRY"]),
+        "metals_dev": lambda: MetalsDevProvider().get_prices_try(["XAU_G", "XAG_G"]),
+        "copper_stooq": lambda: CopperStooqProvider().get_usd_per_lb(),
+    }
+    result = {}
+    for name, fn in calls.items():
+        try:
+            fn()
+            result[name] = "ok"
+        except Exception as e:
+            result[name] = f"failed: {e}"
+    return result
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Record live provider responses as fixtures")
+    ap.add_argument("--out", default="tests/fixtures/http")
+    a = ap.parse_args()
+    for name, status in record_all(a.out).items():
+        print(f"{name:22s} {status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Yerel stand-in upstream sunucusu: kaydedilmiş fixture'ları tekrar oynatır.
+
+    python -m bench.standin_server --fixtures tests/fixtures/http --port 8765 \
+        --latency-ms 50 --jitter-ms 20 --error-rate 0.1 --pad-bytes 0
+
+Provider'ları buraya yönlendirmek için:
+    HTTP_STANDIN_URL=http://127.0.0.1:8765 python service/run_service.py
+
+İstek yolu: /<host>/<path>?<query>  (bkz. utils/http_fixtures.standin_url)
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+from urllib.parse import urlsplit
+
+from utils.http_fixtures import fixture_relpath, load_fixture
+
+
+@dataclass
+class StandInConfig:
+    fixture_dir: str = "tests/fixtures/http"
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0          # 0..1, bu oranda 503 döner
+    error_status: int = 503
+    pad_bytes: int = 0               # cevabın sonuna eklenen boşluk (payload boyutu)
+    list_scale: int = 1              # JSON cevaplardaki listeleri N kat çoğaltır
+    seed: int | None = None
+
+
+@dataclass
+class StandInStats:
+    requests: int = 0
+    connections: int = 0
+    served: int = 0
+    errors_injected: int = 0
+    not_found: int = 0
+    webhooks: List[dict] = field(default_factory=list)
+
+
+def _scale_lists(obj, n: int):
+    if isinstance(obj, dict):
+        return {k: _scale_lists(v, n) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_scale_lists(v, n) for v in obj] * n
+    return obj
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_Server"
+    # keep-alive: tüm cevaplar Content-Length taşır; istemci bağlantıyı yeniden kullanabilir
+    protocol_version = "HTTP/1.1"
+    # başlık ve gövde ayrı yazılır: Nagle + delayed ACK canlı bağlantıda ~40 ms bekletir
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.stats_lock:
+            self.server.stats.connections += 1
+
+    def log_message(self, fmt, *args):  # sessiz
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str = "text/plain"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        cfg, stats = self.server.cfg, self.server.stats
+        with self.server.stats_lock:
+            stats.requests += 1
+
+        if cfg.latency_ms or cfg.jitter_ms:
+            delay = cfg.latency_ms + self.server.rng.uniform(0, cfg.jitter_ms)
+            time.sleep(max(delay, 0) / 1000.0)
+
+        if cfg.error_rate and self.server.rng.random() < cfg.error_rate:
+            with self.server.stats_lock:
+                stats.errors_injected += 1
+            return self._send(cfg.error_status, b"injected error")
+
+        u = urlsplit(self.path)
+        host, _, path = u.path.lstrip("/").partition("/")
+        fx = load_fixture(cfg.fixture_dir, fixture_relpath(host, "/" + path, u.query))
+        if fx is None:
+            with self.server.stats_lock:
+                stats.not_found += 1
+            return self._send(404, f"no fixture for {host}/{path}".encode("utf-8"))
+
+        body = fx["body"]
+        ctype = fx.get("content_type") or "application/octet-stream"
+        if cfg.list_scale > 1 and "json" in ctype:
+            body = json.dumps(_scale_lists(json.loads(body), cfg.list_scale), ensure_ascii=False)
+        raw = body.encode("utf-8") + b" " * cfg.pad_bytes
+
+        with self.server.stats_lock:
+            stats.served += 1
+        self._send(int(fx.get("status", 200)), raw, ctype)
+
+    def do_POST(self):
+        # Webhook stand-in: gövdeyi saklar, 204 döner
+        n = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(n) if n else b""
+        try:
+            payload = json.loads(raw.decode("utf-8") or "null")
+        except ValueError:
+            payload = raw.decode("utf-8", "replace")
+        with self.server.stats_lock:
+            self.server.stats.webhooks.append({"path": self.path, "payload": payload})
+        self._send(204, b"")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, addr, cfg: StandInConfig):
+        super().__init__(addr, _Handler)
+        self.cfg = cfg
+        self.stats = StandInStats()
+        self.stats_lock = threading.Lock()
+        self.rng = random.Random(cfg.seed)
+
+
+class StandInServer:
+    """Test/bench içinden kullanım: with StandInServer(cfg) as srv: srv.base_url"""
+
+    def __init__(self, cfg: StandInConfig | None = None, host: str = "127.0.0.1", port: int = 0):
+        self._srv = _Server((host, port), cfg or StandInConfig())
+        self._thread: threading.Thread | None = None
+
+    @property
+    def cfg(self) -> StandInConfig:
+        return self._srv.cfg
+
+    @property
+    def stats(self) -> StandInStats:
+        return self._srv.stats
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._srv.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StandInServer":
+        self._thread = threading.Thread(target=self._srv.serve_forever, name="standin", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._srv.shutdown()
+        self._srv.server_close()
+
+    def __enter__(self) -> "StandInServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Fixture replay stand-in upstream server")
+    ap.add_argument("--fixtures", default="tests/fixtures/http")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--error-status", type=int, default=503)
+    ap.add_argument("--pad-bytes", type=int, default=0)
+    ap.add_argument("--list-scale", type=int, default=1)
+    ap.add_argument("--seed", type=int, default=None)
+    a = ap.parse_args()
+
+    cfg = StandInConfig(
+        fixture_dir=a.fixtures,
+        latency_ms=a.latency_ms,
+        jitter_ms=a.jitter_ms,
+        error_rate=a.error_rate,
+        error_status=a.error_status,
+        pad_bytes=a.pad_bytes,
+        list_scale=a.list_scale,
+        seed=a.seed,
+    )
+    srv = StandInServer(cfg, host=a.host, port=a.port)
+    print(f"stand-in listening on {srv.base_url} (fixtures: {cfg.fixture_dir})")
+    try:
+        srv._srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv._srv.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Terminal / cron için hafif CLI (Streamlit açmadan).
+
+    python -m cli quote [XAU_G USDTRY ...] [--json] [--max-age-min 90]
+    python -m cli value [--json]
+    python -m cli refresh [XAU_G ...]
+    python -m cli export transactions --format excel --out islemler.csv
+    python -m cli backfill gaps --lookback-days 30
+
+quote önce servisin fiyat panosunu (utils/quote_board) okur, pano yoksa veya
+eskiyse SQLite'a düşer. quote/value SQLAlchemy yüklemez (salt-okunur sqlite3);
+ağır modüller (ORM, requests, provider'lar) yalnız ihtiyaç duyan alt komutta import edilir.
+Çıkış kodları: 0 tamam, 1 hata, 2 eksik/stale/eski fiyat (health-check için).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, List
+
+from utils.assets import ASSETS, asset_label
+from utils.decimal import q2, q4
+
+EXIT_OK, EXIT_ERROR, EXIT_STALE = 0, 1, 2
+
+
+def _fmt(v: Decimal | None, asset: str = "") -> str:
+    if v is None:
+        return "—"
+    return str(q4(v) if asset in ("USDTRY", "EURTRY", "XCU_G") else q2(v))
+
+
+def _assets(args_assets: List[str]) -> List[str]:
+    unknown = [a for a in args_assets if a not in ASSETS]
+    if unknown:
+        raise SystemExit(f"unknown asset(s): {', '.join(unknown)} (known: {', '.join(ASSETS)})")
+    return args_assets or ASSETS
+
+
+def cmd_quote(a) -> int:
+    from utils.quote_board import DEFAULT_MAX_AGE_S, read_board
+    from utils.time import now_tr
+
+    assets = _assets(a.assets)
+    # servis panosu (mmap) taze ise SQLite'a hiç dokunulmaz
+    rows = None if a.no_board else read_board(DEFAULT_MAX_AGE_S)
+    if rows is None:
+        from db import readonly
+
+        with readonly.connect() as con:
+            rows = readonly.latest_prices(con, assets)
+
+    now = now_tr()
+    bad = []
+    out = []
+    for asset in assets:
+        r = rows.get(asset)
+        age_min = None
+        if r:
+            age_min = (now - datetime.fromisoformat(r["ts"])).total_seconds() / 60
+        is_bad = r is None or int(r["is_stale"] or 0) == 1 or (a.max_age_min is not None and age_min > a.max_age_min)
+        if is_bad:
+            bad.append(asset)
+        out.append((asset, r, age_min, is_bad))
+
+    if a.json:
+        print(json.dumps(
+            [
+                {"asset": asset, "price": r and r["price"], "bid": r and r["price_buy"], "ask": r and r["price_sell"],
+                 "ts": r and r["ts"], "source": r and r["source"], "age_min": None if age is None else round(age, 1), "ok": not is_bad}
+                for asset, r, age, is_bad in out
+            ],
+            ensure_ascii=False,
+        ))
+    else:
+        for asset, r, age, is_bad in out:
+            price = _fmt(Decimal(r["price"]), asset) if r else "—"
+            age_s = "—" if age is None else str(timedelta(minutes=round(age)))[:-3]
+            flag = "  !" if is_bad else ""
+            print(f"{asset:<15} {price:>14}  {(r or {}).get('source') or '—':<20} {age_s:>9}{flag}")
+    return EXIT_STALE if bad else EXIT_OK
+
+
+def cmd_value(a) -> int:
+    from db import readonly
+    from utils.pnl import valuation_from_prices
+
+    with readonly.connect() as con:
+        inv = {k: v for k, v in readonly.positions(con).items() if v.qty != 0}
+        rows = readonly.latest_prices(con, sorted(inv)) if inv else {}
+    mids = {k: Decimal(r["price"]) for k, r in rows.items()}
+    breakdown, total, unrealized, realized = valuation_from_prices(inv, mids)
+    missing = sorted(set(inv) - set(mids))
+
+    if a.json:
+        print(json.dumps(
+            {"total_value_try": str(total), "unrealized_try": str(unrealized), "realized_try": str(realized),
+             "missing_prices": missing, "assets": breakdown},
+            ensure_ascii=False,
+        ))
+    else:
+        for asset, b in sorted(breakdown.items()):
+            print(f"{asset_label(asset):<20} {Decimal(b['qty']):>12} x {_fmt(Decimal(b['mid_price_try']), asset):>12} = {_fmt(Decimal(b['value_try'])):>14}")
+        print(f"{'Toplam':<20} {_fmt(total):>42}")
+        print(f"{'Unrealized':<20} {_fmt(unrealized):>42}")
+        print(f"{'Realized':<20} {_fmt(realized):>42}")
+        if missing:
+            print("Fiyatı olmayan: " + ", ".join(missing), file=sys.stderr)
+    return EXIT_STALE if missing else EXIT_OK
+
+
+def cmd_refresh(a) -> int:
+    from db.init_db import init_db
+    from sqlalchemy import select
+
+    from db.models import Price, Setting
+    from db.session import ReadSession, SessionLocal
+    from providers.router import get_router
+    from utils.quote_board import price_rows, publish_rows
+    from utils.time import iso_now_tr
+
+    assets = _assets(a.assets)
+    init_db()
+    with ReadSession() as db:
+        settings = {r.key: r.value for r in db.execute(select(Setting)).scalars()}
+    quotes, sources = get_router(timeout_s=a.timeout, settings=settings).get_all_quotes_try(assets, manual_prices=None)
+    ts = iso_now_tr()
+    rows = [
+        Price(ts=ts, asset=asset, price=str(q["mid"]), price_buy=str(q["bid"]), price_sell=str(q["ask"]),
+              currency="TRY", source=sources.get(asset, "cli"), is_stale=0, error_msg=None)
+        for asset, q in quotes.items()
+    ]
+    board_rows = price_rows(rows)
+    with SessionLocal() as db:
+        db.add_all(rows)
+        db.commit()
+    publish_rows(board_rows, create=False)
+    for asset in assets:
+        q = quotes.get(asset)
+        print(f"{asset:<15} {_fmt(q and q['mid'], asset):>14}  {sources.get(asset, 'FAILED')}")
+    if not quotes:
+        return EXIT_ERROR
+    return EXIT_STALE if len(quotes) < len(assets) else EXIT_OK
+
+
+def cmd_export(a) -> int:
+    from db.session import read_engine
+    from utils.export import write_export
+
+    filters = dict(asset=a.asset, start=a.start, end=a.end)
+    if a.out == "-":
+        n = write_export(sys.stdout.buffer, read_engine, a.kind, fmt=a.format, compress=a.gzip, **filters)
+        sys.stdout.buffer.flush()
+    else:
+        with open(a.out, "wb") as f:
+            n = write_export(f, read_engine, a.kind, fmt=a.format, compress=a.gzip, **filters)
+    print(f"{n} rows exported", file=sys.stderr)
+    return EXIT_OK
+
+
+def cmd_backfill(a) -> int:
+    from db.init_db import init_db
+    from service import backfill
+
+    init_db()
+    if a.source == "tcmb":
+        n = backfill.backfill_tcmb(a.start, a.end, max_workers=a.workers, only_gaps=not a.all)
+        print(f"{n} rows written")
+    else:
+        written: Dict[str, int] = backfill.backfill_gaps(lookback_days=a.lookback_days)
+        print(written or "no gaps")
+    return EXIT_OK
+
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(prog="python -m cli", description="Yatırım Takip headless CLI")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    q = sub.add_parser("quote", help="DB'deki son fiyatlar")
+    q.add_argument("assets", nargs="*")
+    q.add_argument("--json", action="store_true")
+    q.add_argument("--max-age-min", type=float, default=None, help="bundan eski fiyat varsa çıkış kodu 2")
+    q.add_argument("--no-board", action="store_true", help="fiyat panosunu atla, doğrudan SQLite'tan oku")
+    q.set_defaults(func=cmd_quote)
+
+    v = sub.add_parser("value", help="portföy değeri ve PnL")
+    v.add_argument("--json", action="store_true")
+    v.set_defaults(func=cmd_value)
+
+    r = sub.add_parser("refresh", help="provider'lardan fiyat çek ve yaz")
+    r.add_argument("assets", nargs="*")
+    r.add_argument("--timeout", type=int, default=10)
+    r.set_defaults(func=cmd_refresh)
+
+    kinds = ("transactions", "prices", "snapshots")  # utils.export.EXPORTS (import etmeden)
+    e = sub.add_parser("export", help="CSV / Excel (TR) export")
+    e.add_argument("kind", choices=kinds)
+    e.add_argument("--format", choices=("csv", "excel"), default="csv")
+    e.add_argument("--gzip", action="store_true")
+    e.add_argument("--asset")
+    e.add_argument("--start")
+    e.add_argument("--end")
+    e.add_argument("--out", default="-", help="dosya yolu; '-' = stdout")
+    e.set_defaults(func=cmd_export)
+
+    b = sub.add_parser("backfill", help="geçmiş fiyat doldurma")
+    bsub = b.add_subparsers(dest="source", required=True)
+    t = bsub.add_parser("tcmb", help="TCMB günlük kur arşivi")
+    t.add_argument("--start", required=True, type=date.fromisoformat)
+    t.add_argument("--end", default=date.today().isoformat(), type=date.fromisoformat)
+    t.add_argument("--workers", type=int, default=8)
+    t.add_argument("--all", action="store_true", help="mevcut günleri de yeniden yaz")
+    g = bsub.add_parser("gaps", help="son N gündeki boşlukları doldur")
+    g.add_argument("--lookback-days", type=int, default=30)
+    b.set_defaults(func=cmd_backfill)
+    return ap
+
+
+def main(argv: List[str] | None = None) -> int:
+    a = build_parser().parse_args(argv)
+    try:
+        return a.func(a)
+    except FileNotFoundError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return EXIT_ERROR
+
+
+if __name__ == "__main__":
+    sys.exit(main())
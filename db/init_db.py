@@ -1,26 +1,62 @@
 from __future__ import annotations
-from sqlalchemy import select
-from db.session import engine, SessionLocal
+import threading
+from sqlalchemy import insert
+from db.session import engine
 from db.models import Base, Setting
-from db.migrate import migrate_sqlite
-from db.session import get_db_path
+from db.migrate import SCHEMA_VERSION, current_version, run_migrations
+from utils.time import iso_now_tr
 
 DEFAULT_SETTINGS = {
     "update_interval_min": "30",
     "pnl_alert_threshold_try": "-5000",
     "cost_method": "WAVG",
-    "fx_primary": "exchangerate_host",
-    "fx_fallback": "frankfurter",
+    "fx_primary": "frankfurter",
+    "fx_fallback": "tcmb",
     "metals_primary": "kapalicarsi_apiluna",
-    "metals_fallback": "manual",
-    "copper_provider": "kitco",
+    "metals_fallback": "metals_dev",
+    "copper_provider": "copper_stooq",
+    "backfill_lookback_days": "30",
+    "backfill_interval_h": "6",
+    "alert_rules": "[]",
+    "alert_webhook_url": "",
+    "lease_ttl_s": "60",
+    "refresh_poll_s": "5",
+    "hf_assets": "",
+    "hf_interval_s": "5",
+    "hf_flush_s": "60",
+    "hf_min_change_bp": "2",
+    "hf_capacity": "4096",
+    "maint_interval_min": "15",
+    "maint_full_interval_h": "24",
+    "maint_wal_threshold_mb": "16",
+    "maint_vacuum_free_mb": "8",
 }
 
-def init_db(seed: bool = False) -> None:
-    Base.metadata.create_all(bind=engine)
-    migrate_sqlite(get_db_path())
-    with SessionLocal() as db:
-        for k, v in DEFAULT_SETTINGS.items():
-            if db.get(Setting, k) is None:
-                db.add(Setting(key=k, value=v))
-        db.commit()
+_bootstrapped: set = set()
+_bootstrap_lock = threading.Lock()
+
+
+def init_db() -> None:
+    """
+    Şema güncelse yalnız sürüm kontrolü yapılır; değilse create_all + eksik migration'lar
+    tek transaction'da uygulanır. Varsayılan ayarlar INSERT OR IGNORE ile eklenir.
+    """
+    with engine.begin() as conn:
+        if current_version(conn) < SCHEMA_VERSION:
+            Base.metadata.create_all(bind=conn)
+            run_migrations(conn, iso_now_tr())
+        conn.execute(
+            insert(Setting.__table__).prefix_with("OR IGNORE"),
+            [{"key": k, "value": v} for k, v in DEFAULT_SETTINGS.items()],
+        )
+
+
+def bootstrap() -> bool:
+    """init_db'yi süreç başına bir kez çalıştırır (Streamlit her rerun'da app.py'yi yeniden yürütür)."""
+    key = str(engine.url)
+    with _bootstrap_lock:
+        if key in _bootstrapped:
+            return False
+        init_db()
+        _bootstrapped.add(key)
+        return True
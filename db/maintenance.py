@@ -0,0 +1,154 @@
+"""
+SQLite bakım işleri: WAL checkpoint, ANALYZE / PRAGMA optimize, incremental vacuum.
+
+WAL modunda checkpoint'i normalde yazan bağlantı otomatik yapar (1000 sayfa); ancak
+açık bir okuma transaction'ı (uzun süren Streamlit rerun'ı) checkpoint'in WAL başına
+dönmesini engeller ve `-wal` dosyası büyümeye devam eder. Servis bu yüzden WAL boyutunu
+izler: eşik aşılınca PASSIVE checkpoint (okurları beklemez), tüm frame'ler aktarıldıysa
+TRUNCATE ile dosyayı sıfırlar; WAL sert limiti de aştıysa okurları busy_timeout kadar
+bekleyerek TRUNCATE dener.
+
+Bağlantı başına cache_size / mmap_size / journal_size_limit değerleri SQLITE_PROFILE
+ortam değişkeniyle seçilen profilden gelir (bkz. PROFILES).
+
+    python -m db.maintenance            # checkpoint (+ optimize)
+    python -m db.maintenance --full     # + ANALYZE + incremental vacuum
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from db.paths import get_db_path
+from utils.logging import setup_logging
+
+logger = setup_logging("maintenance", os.getenv("LOG_DIR", "logs"))
+
+MB = 1024 * 1024
+
+# cache_size < 0: KiB cinsinden. mmap_size: bayt (0 = kapalı).
+# read_cache_size: salt-okunur engine bağlantıları (UI sorguları) için daha büyük sayfa önbelleği.
+PROFILES: Dict[str, Dict[str, int]] = {
+    "default": {"cache_size": -8000, "read_cache_size": -32000, "mmap_size": 0, "journal_size_limit": 64 * MB},
+    "low_mem": {"cache_size": -2000, "read_cache_size": -4000, "mmap_size": 0, "journal_size_limit": 8 * MB},
+    "fast": {"cache_size": -16000, "read_cache_size": -64000, "mmap_size": 256 * MB, "journal_size_limit": 64 * MB},
+}
+
+
+def profile_name() -> str:
+    name = os.getenv("SQLITE_PROFILE", "default")
+    return name if name in PROFILES else "default"
+
+
+def apply_profile(cursor, name: Optional[str] = None, read: bool = False) -> None:
+    """Bağlantı açılışında çağrılır (db/session.py connect event'leri)."""
+    prof = PROFILES[name or profile_name()]
+    cursor.execute(f"PRAGMA cache_size={int(prof['read_cache_size' if read else 'cache_size'])};")
+    cursor.execute(f"PRAGMA mmap_size={int(prof['mmap_size'])};")
+    if not read:
+        cursor.execute(f"PRAGMA journal_size_limit={int(prof['journal_size_limit'])};")
+
+
+def file_sizes(db_path: str) -> Dict[str, int]:
+    out = {}
+    for suffix in ("", "-wal", "-shm"):
+        p = Path(db_path + suffix)
+        out["db" if not suffix else suffix[1:]] = p.stat().st_size if p.exists() else 0
+    return out
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    # autocommit: checkpoint ve VACUUM transaction içinde çalışmaz
+    con = sqlite3.connect(db_path, isolation_level=None, timeout=5)
+    con.execute("PRAGMA busy_timeout=5000")
+    apply_profile(con)
+    return con
+
+
+def checkpoint(con: sqlite3.Connection, db_path: str, threshold_bytes: int, hard_limit_bytes: int) -> dict:
+    """WAL eşiği aşmadıysa hiçbir şey yapmaz. Sonuç: mod, busy, wal frame / aktarılan frame."""
+    wal = file_sizes(db_path)["wal"]
+    if wal < threshold_bytes:
+        return {"mode": None}
+    busy, log, done = con.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+    mode = "PASSIVE"
+    # her şey aktarıldıysa TRUNCATE ucuzdur; sert limit aşıldıysa okurları bekleyerek dene
+    if (busy == 0 and log == done) or wal >= hard_limit_bytes:
+        busy, log, done = con.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+        mode = "TRUNCATE"
+    return {"mode": mode, "busy": busy, "wal_frames": log, "checkpointed": done}
+
+
+def vacuum(con: sqlite3.Connection, free_threshold_bytes: int, max_pages: int = 2000) -> dict:
+    """
+    auto_vacuum=INCREMENTAL ise boş sayfaları adım adım (max_pages) geri verir. Eski DB'ler
+    auto_vacuum=NONE ile oluşmuştur; boş alan eşiği aşınca bir kez tam VACUUM ile
+    INCREMENTAL'a çevrilir.
+    """
+    page_size = con.execute("PRAGMA page_size").fetchone()[0]
+    free = con.execute("PRAGMA freelist_count").fetchone()[0]
+    mode = con.execute("PRAGMA auto_vacuum").fetchone()[0]
+    if free * page_size < free_threshold_bytes:
+        return {"vacuum": None, "free_pages": free}
+    if mode == 2:
+        # satır döndürmeyen pragma: execute() tek adım atar (tek sayfa); executescript sonuna kadar yürütür
+        con.executescript(f"PRAGMA incremental_vacuum({int(max_pages)});")
+        return {"vacuum": "incremental", "free_pages": free}
+    con.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    con.execute("VACUUM")
+    return {"vacuum": "full", "free_pages": free}
+
+
+def run_maintenance(
+    db_path: Optional[str] = None,
+    full: bool = False,
+    wal_threshold_mb: float = 16,
+    vacuum_free_mb: float = 8,
+) -> dict:
+    """
+    Hafif tur: WAL checkpoint + PRAGMA optimize. full=True: + ANALYZE + vacuum.
+    Önce/sonra dosya boyutları ve süre ile rapor döner (servis settings'e yazar).
+    """
+    db_path = db_path or get_db_path()
+    t0 = time.perf_counter()
+    before = file_sizes(db_path)
+    report: dict = {"full": full, "profile": profile_name(), "before": before}
+    con = _connect(db_path)
+    try:
+        threshold = int(wal_threshold_mb * MB)
+        report["checkpoint"] = checkpoint(con, db_path, threshold, hard_limit_bytes=4 * threshold)
+        if full:
+            con.execute("ANALYZE")
+            report.update(vacuum(con, int(vacuum_free_mb * MB)))
+            report["checkpoint_after_vacuum"] = checkpoint(con, db_path, 0, hard_limit_bytes=0)
+        else:
+            # yalnız istatistiği eskimiş tablolar için ANALYZE çalıştırır (ucuz)
+            con.execute("PRAGMA optimize")
+    finally:
+        con.close()
+    report["after"] = file_sizes(db_path)
+    report["duration_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+    logger.info(
+        f"Maintenance ({'full' if full else 'light'}) {report['duration_ms']} ms: "
+        f"db {before['db']}->{report['after']['db']} B, wal {before['wal']}->{report['after']['wal']} B, "
+        f"checkpoint={report['checkpoint'].get('mode')}"
+    )
+    return report
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="SQLite bakım")
+    ap.add_argument("--db", default=None)
+    ap.add_argument("--full", action="store_true")
+    ap.add_argument("--wal-threshold-mb", type=float, default=16)
+    a = ap.parse_args(argv)
+    print(json.dumps(run_maintenance(a.db, full=a.full, wal_threshold_mb=a.wal_threshold_mb), indent=2))
+
+
+if __name__ == "__main__":
+    main()
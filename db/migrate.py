@@ -1,35 +1,105 @@
 from __future__ import annotations
 
 import os
-import sqlite3
-from pathlib import Path
+from typing import Callable, List, Tuple
 
+from sqlalchemy import func, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from db.models import Position, RateLimit, ServiceLease, Transaction
+from db.positions import rebuild_positions
 from utils.logging import setup_logging
 
 logger = setup_logging("migrate", os.getenv("LOG_DIR", "logs"))
 
-def _column_exists(cur: sqlite3.Cursor, table: str, col: str) -> bool:
-    cur.execute(f"PRAGMA table_info({table});")
-    cols = [r[1] for r in cur.fetchall()]
-    return col in cols
-
-def migrate_sqlite(db_path: str) -> None:
-    """Lightweight SQLite migrations (safe to run every startup)."""
-    Path(os.path.dirname(db_path) or ".").mkdir(parents=True, exist_ok=True)
-    con = sqlite3.connect(db_path)
-    try:
-        cur = con.cursor()
-
-        # prices: add price_buy/price_sell if missing
-        cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='prices';")
-        if cur.fetchone():
-            if not _column_exists(cur, "prices", "price_buy"):
-                cur.execute("ALTER TABLE prices ADD COLUMN price_buy TEXT;")
-                logger.info("Migrated: prices.price_buy added")
-            if not _column_exists(cur, "prices", "price_sell"):
-                cur.execute("ALTER TABLE prices ADD COLUMN price_sell TEXT;")
-                logger.info("Migrated: prices.price_sell added")
-
-        con.commit()
-    finally:
-        con.close()
+# Sürüm kaydı: her migration bir kez çalışır, sonraki açılışlarda sürüm kontrolüyle atlanır.
+SCHEMA_VERSION_DDL = "CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL, applied_at TEXT NOT NULL)"
+
+
+def _table_exists(conn: Connection, table: str) -> bool:
+    q = text("SELECT 1 FROM sqlite_master WHERE type='table' AND name=:t")
+    return conn.execute(q, {"t": table}).first() is not None
+
+
+def _column_exists(conn: Connection, table: str, col: str) -> bool:
+    return any(r[1] == col for r in conn.exec_driver_sql(f"PRAGMA table_info({table})"))
+
+
+def _m1_price_bid_ask(conn: Connection) -> None:
+    # prices: add price_buy/price_sell if missing (sürüm kaydından önceki DB'ler)
+    if not _table_exists(conn, "prices"):
+        return
+    for col in ("price_buy", "price_sell"):
+        if not _column_exists(conn, "prices", col):
+            conn.exec_driver_sql(f"ALTER TABLE prices ADD COLUMN {col} TEXT")
+            logger.info(f"Migrated: prices.{col} added")
+
+
+def _m2_keyset_indexes(conn: Connection) -> None:
+    if _table_exists(conn, "prices"):
+        conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_prices_asset_ts_id ON prices (asset, ts, id)")
+    # transactions: keyset pagination indexleri
+    if _table_exists(conn, "transactions"):
+        conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_transactions_ts_id ON transactions (ts, id)")
+        conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_transactions_asset_ts_id ON transactions (asset, ts, id)")
+
+
+def _m3_positions_from_ledger(conn: Connection) -> None:
+    # positions tablosu sonradan eklendi: mevcut defterden bir kez doldur
+    db = Session(bind=conn)
+    if db.execute(select(func.count()).select_from(Position)).scalar() == 0 \
+            and db.execute(select(func.count()).select_from(Transaction)).scalar():
+        rebuild_positions(db)
+        db.flush()
+
+
+def _m4_rate_limits(conn: Connection) -> None:
+    RateLimit.__table__.create(conn, checkfirst=True)
+
+
+def _m5_leases(conn: Connection) -> None:
+    ServiceLease.__table__.create(conn, checkfirst=True)
+
+
+def _m6_provider_settings(conn: Connection) -> None:
+    # kaldırılan sağlayıcıyı (kitco) gösteren ayarlar yerine geçene çekilir; diğer seçimler
+    # kullanıcının açık tercihi olabileceğinden (varsayılandan ayırt edilemez) olduğu gibi kalır
+    if not _table_exists(conn, "settings"):
+        return
+    for k, old, new in (("copper_provider", "kitco", "copper_stooq"),):
+        if conn.execute(text("UPDATE settings SET value = :new WHERE key = :k AND value = :old"),
+                        {"k": k, "old": old, "new": new}).rowcount:
+            logger.info(f"Migrated: setting {k} {old} -> {new}")
+
+
+# (sürüm, açıklama, fonksiyon) — yalnız sona ekle, mevcut sürümleri değiştirme
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "prices.price_buy/price_sell", _m1_price_bid_ask),
+    (2, "keyset indexes on prices/transactions", _m2_keyset_indexes),
+    (3, "positions rebuilt from transactions", _m3_positions_from_ledger),
+    (4, "rate_limits table", _m4_rate_limits),
+    (5, "leases table", _m5_leases),
+    (6, "removed provider settings", _m6_provider_settings),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn: Connection) -> int:
+    if not _table_exists(conn, "schema_version"):
+        return 0
+    return conn.execute(text("SELECT MAX(version) FROM schema_version")).scalar() or 0
+
+
+def run_migrations(conn: Connection, applied_at: str) -> int:
+    """Eksik migration'ları sırayla uygular (çağıran transaction içinde). Son sürümü döner."""
+    conn.exec_driver_sql(SCHEMA_VERSION_DDL)
+    v = current_version(conn)
+    for ver, desc, fn in MIGRATIONS:
+        if ver <= v:
+            continue
+        fn(conn)
+        conn.execute(text("INSERT INTO schema_version (version, applied_at) VALUES (:v, :ts)"), {"v": ver, "ts": applied_at})
+        logger.info(f"Schema migrated to v{ver}: {desc}")
+        v = ver
+    return v
@@ -1,6 +1,6 @@
 from __future__ import annotations
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
-from sqlalchemy import Integer, String, Text
+from sqlalchemy import Float, Index, Integer, String, Text
 
 class Base(DeclarativeBase):
     pass
@@ -17,6 +17,12 @@ class Transaction(Base):
     currency: Mapped[str] = mapped_column(String, nullable=False, default="TRY")
     note: Mapped[str | None] = mapped_column(Text, nullable=True)
 
+    # İşlem Geçmişi keyset pagination: (ts, id) sırası + varlık filtresi
+    __table_args__ = (
+        Index("ix_transactions_ts_id", "ts", "id"),
+        Index("ix_transactions_asset_ts_id", "asset", "ts", "id"),
+    )
+
 class Price(Base):
     __tablename__ = "prices"
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
@@ -32,6 +38,9 @@ class Price(Base):
     is_stale: Mapped[int] = mapped_column(Integer, nullable=False, default=0)  # 0/1
     error_msg: Mapped[str | None] = mapped_column(Text, nullable=True)
 
+    # Son fiyat = (ts, id) en büyük satır; geçmişe dönük backfill satırları "son" sayılmaz
+    __table_args__ = (Index("ix_prices_asset_ts_id", "asset", "ts", "id"),)
+
 
 class Setting(Base):
     __tablename__ = "settings"
@@ -44,3 +53,36 @@ class Snapshot(Base):
     ts: Mapped[str] = mapped_column(String, nullable=False)
     total_value_try: Mapped[str] = mapped_column(String, nullable=False)
     breakdown_json: Mapped[str] = mapped_column(Text, nullable=False)
+
+class Position(Base):
+    """İşlem defterinin varlık bazında özeti; her işlem insert'iyle aynı transaction'da güncellenir."""
+    __tablename__ = "positions"
+    asset: Mapped[str] = mapped_column(String, primary_key=True)
+    qty: Mapped[str] = mapped_column(String, nullable=False, default="0")
+    avg_cost_try: Mapped[str] = mapped_column(String, nullable=False, default="0")
+    realized_try: Mapped[str] = mapped_column(String, nullable=False, default="0")
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)  # compare-and-swap
+    last_ts: Mapped[str | None] = mapped_column(String, nullable=True)
+
+
+class RateLimit(Base):
+    """Anahtarlı provider'ların token bucket + kota durumu; süreçler arası paylaşılır (bkz. utils/rate_limit.py)."""
+    __tablename__ = "rate_limits"
+    provider: Mapped[str] = mapped_column(String, primary_key=True)
+    tokens: Mapped[float] = mapped_column(Float, nullable=False)
+    updated_at: Mapped[float] = mapped_column(Float, nullable=False)        # epoch saniye
+    day: Mapped[str] = mapped_column(String, nullable=False)               # YYYY-MM-DD (TR)
+    day_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    month: Mapped[str] = mapped_column(String, nullable=False)             # YYYY-MM (TR)
+    month_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    blocked_until: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)  # 429 / Retry-After
+
+
+class ServiceLease(Base):
+    """Lider kiralaması: tek bir servis örneği tick yazar; epoch her el değiştirmede artar (bkz. service/lease.py)."""
+    __tablename__ = "leases"
+    name: Mapped[str] = mapped_column(String, primary_key=True)
+    holder: Mapped[str | None] = mapped_column(String, nullable=True)
+    epoch: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    expires_at: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)    # epoch saniye
+    heartbeat_at: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+import os
+
+
+def get_db_path() -> str:
+    # Yerel için öneri: proje içinde data/ klasörü
+    # Cloud için öneri: /tmp (kalıcı değil ama çalışır)
+    default = "data/yatirim.db"
+    p = os.getenv("DB_PATH", default)
+
+    # Cloud ortamlarında /mount/src bazen read-only / garip olabiliyor.
+    # Eğer yazılamazsa otomatik /tmp'ye düşmek istersen:
+    # p = os.getenv("DB_PATH", "/tmp/yatirim.db")
+
+    return p
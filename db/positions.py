@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from db.models import Position, Transaction
+from utils.pnl import InventoryRow, apply_tx_wavg, compute_inventory_wavg
+from utils.time import iso_now_tr
+
+
+class PositionConflict(RuntimeError):
+    """Pozisyon satırı eşzamanlı olarak değişti ve tekrar denemeler tükendi."""
+
+
+class _StaleVersion(Exception):
+    pass
+
+
+def _row(asset: str, p: Optional[Position]) -> InventoryRow:
+    if p is None:
+        return InventoryRow(asset=asset, qty=Decimal("0"), avg_cost_try=Decimal("0"), realized_try=Decimal("0"))
+    return InventoryRow(asset=asset, qty=Decimal(p.qty), avg_cost_try=Decimal(p.avg_cost_try), realized_try=Decimal(p.realized_try))
+
+
+def load_positions(db) -> Dict[str, InventoryRow]:
+    return {p.asset: _row(p.asset, p) for p in db.execute(select(Position)).scalars()}
+
+
+def rebuild_positions(db, assets: Optional[Iterable[str]] = None) -> Dict[str, InventoryRow]:
+    """
+    Pozisyonları defterden (ts, id sırasıyla) yeniden hesaplar. Commit etmez.
+    Defter stok blokajını ihlal ediyorsa ValueError fırlatır.
+    """
+    stmt = select(Transaction.ts, Transaction.asset, Transaction.side, Transaction.qty, Transaction.unit_price, Transaction.fee)
+    wanted: Optional[List[str]] = list(assets) if assets is not None else None
+    if wanted is not None:
+        stmt = stmt.where(Transaction.asset.in_(wanted))
+    stmt = stmt.order_by(Transaction.ts.asc(), Transaction.id.asc()).execution_options(yield_per=1000)
+
+    last_ts: Dict[str, str] = {}
+
+    def _iter():
+        for r in db.execute(stmt):
+            last_ts[r.asset] = r.ts
+            yield r._mapping
+
+    state = compute_inventory_wavg(_iter())
+    targets = wanted if wanted is not None else list(state.keys())
+    for asset in targets:
+        row = state.get(asset) or _row(asset, None)
+        vals = dict(qty=str(row.qty), avg_cost_try=str(row.avg_cost_try), realized_try=str(row.realized_try), last_ts=last_ts.get(asset))
+        p = db.get(Position, asset)
+        if p is None:
+            db.add(Position(asset=asset, version=1, **vals))
+        else:
+            for k, v in vals.items():
+                setattr(p, k, v)
+            p.version += 1
+    db.flush()
+    return state
+
+
+def record_tx(
+    db,
+    asset: str,
+    side: str,
+    qty: Decimal,
+    unit_price: Decimal,
+    fee: Decimal,
+    note: str | None = None,
+    ts: str | None = None,
+    retries: int = 3,
+) -> int:
+    """
+    İşlemi ekler ve pozisyonu aynı transaction içinde günceller.
+    Stok kontrolü defteri taramaz; güncel pozisyon satırına karşı yapılır (O(1)).
+    Pozisyon version'ı compare-and-swap ile yazılır: arada başka bir oturum
+    yazdıysa geri alınır ve güncel durumla tekrar denenir. Stok yetersizse ValueError.
+    """
+    last_err: Exception | None = None
+    for _ in range(retries):
+        ts_ = ts or iso_now_tr()
+        pos = db.execute(select(Position).where(Position.asset == asset).execution_options(populate_existing=True)).scalar_one_or_none()
+        backdated = pos is not None and pos.last_ts is not None and ts_ < pos.last_ts
+        row = _row(asset, pos)
+        if not backdated:
+            apply_tx_wavg(row, side, qty, unit_price, fee)  # yetersiz stokta ValueError
+
+        try:
+            tx = Transaction(ts=ts_, asset=asset, side=side, qty=str(qty), unit_price=str(unit_price), fee=str(fee), currency="TRY", note=note)
+            db.add(tx)
+            db.flush()
+            if backdated:
+                # Geçmiş tarihli tekil işlem: o varlığın defteri yeniden oynatılır
+                rebuild_positions(db, [asset])
+            else:
+                vals = dict(qty=str(row.qty), avg_cost_try=str(row.avg_cost_try), realized_try=str(row.realized_try), last_ts=ts_)
+                if pos is None:
+                    db.execute(insert(Position).values(asset=asset, version=1, **vals))
+                else:
+                    res = db.execute(
+                        update(Position)
+                        .where(Position.asset == asset, Position.version == pos.version)
+                        .values(version=pos.version + 1, **vals)
+                        .execution_options(synchronize_session=False)
+                    )
+                    if res.rowcount != 1:
+                        raise _StaleVersion(asset)
+            db.commit()
+            return tx.id
+        except (_StaleVersion, IntegrityError) as e:
+            db.rollback()
+            last_err = e
+        except OperationalError as e:
+            db.rollback()
+            if "locked" not in str(e).lower():
+                raise
+            last_err = e
+        except Exception:
+            db.rollback()
+            raise
+    raise PositionConflict(f"{asset} pozisyonu eşzamanlı güncellendi, tekrar deneyin ({last_err})")
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, select, tuple_
+
+from db.models import Transaction
+
+TX_COLUMNS = ["id", "ts", "asset", "side", "qty", "unit_price", "fee", "currency", "note"]
+
+# UI'nın rerun başına (önbellek ıskasında) çalıştırdığı sorgular; bench/load_test.py aynılarını koşar
+PRICE_SERIES_SQL = "SELECT ts, price, is_stale FROM prices WHERE asset = :a AND ts >= :s AND price != '0' ORDER BY ts, id"
+EQUITY_SERIES_SQL = "SELECT ts, total_value_try, breakdown_json FROM snapshots WHERE total_value_try != '0' AND ts >= :s ORDER BY id"
+RECENT_PRICES_SQL = "SELECT id, ts, asset, price, source, is_stale, error_msg FROM prices ORDER BY id DESC LIMIT 25"
+
+# (ts, id) — sayfanın son satırı; bir sonraki sayfa bunun "altından" başlar
+Cursor = Tuple[str, int]
+
+
+@dataclass(frozen=True)
+class TxFilter:
+    asset: Optional[str] = None
+    side: Optional[str] = None
+    start: Optional[str] = None      # ts >= start (ISO, tarih öneki yeterli)
+    end: Optional[str] = None        # ts < end
+    note: Optional[str] = None       # not içinde geçen metin
+
+
+def _like_escape(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def tx_page(db, flt: TxFilter, after: Optional[Cursor] = None, limit: int = 50) -> Tuple[List[dict], Optional[Cursor]]:
+    """
+    Yeni -> eski işlem sayfası (keyset pagination). Filtreler SQL'e iner,
+    yalnız görünen sayfa okunur. (satırlar, sonraki sayfa cursor'ı | None) döner.
+    """
+    conds = []
+    if flt.asset:
+        conds.append(Transaction.asset == flt.asset)
+    if flt.side:
+        conds.append(Transaction.side == flt.side)
+    if flt.start:
+        conds.append(Transaction.ts >= flt.start)
+    if flt.end:
+        conds.append(Transaction.ts < flt.end)
+    if flt.note:
+        conds.append(Transaction.note.like(f"%{_like_escape(flt.note)}%", escape="\\"))
+    if after is not None:
+        conds.append(tuple_(Transaction.ts, Transaction.id) < tuple_(*after))
+
+    cols = [getattr(Transaction, c) for c in TX_COLUMNS]
+    stmt = (
+        select(*cols)
+        .where(and_(True, *conds))
+        .order_by(Transaction.ts.desc(), Transaction.id.desc())
+        .limit(limit + 1)  # +1: bir sonraki sayfa var mı?
+    )
+    rows = [dict(r._mapping) for r in db.execute(stmt)]
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, (rows[-1]["ts"], rows[-1]["id"])
+
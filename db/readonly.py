@@ -0,0 +1,53 @@
+"""
+SQLAlchemy'siz, salt-okunur DB erişimi (CLI / health-check).
+
+ORM import'u tek başına ~250 ms sürdüğü için kısa ömürlü süreçler
+doğrudan sqlite3 ile okur; SQL'ler uygulamayla ortaktır.
+"""
+from __future__ import annotations
+
+import sqlite3
+from decimal import Decimal
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from db.paths import get_db_path
+from utils.pnl import InventoryRow
+
+
+def latest_prices_sql(assets: List[str]) -> Tuple[str, dict]:
+    """
+    Varlık başına (ts, id) en büyük satır. Her varlık ix_prices_asset_ts_id üzerinde
+    tek index araması (LIMIT 1) — tabloyu GROUP BY ile taramaz.
+    """
+    parts, params = [], {}
+    for i, a in enumerate(assets):
+        parts.append(f"SELECT * FROM (SELECT * FROM prices WHERE asset = :a{i} ORDER BY ts DESC, id DESC LIMIT 1)")
+        params[f"a{i}"] = a
+    return " UNION ALL ".join(parts), params
+
+
+def connect(path: Optional[str] = None) -> sqlite3.Connection:
+    """mode=ro bağlantı; DB yoksa oluşturmaz, FileNotFoundError fırlatır."""
+    p = Path(path or get_db_path())
+    if not p.is_file():
+        raise FileNotFoundError(f"DB not found: {p}")
+    con = sqlite3.connect(f"{p.resolve().as_uri()}?mode=ro", uri=True)
+    con.row_factory = sqlite3.Row
+    con.execute("PRAGMA busy_timeout=5000")
+    return con
+
+
+def latest_prices(con: sqlite3.Connection, assets: List[str]) -> Dict[str, dict]:
+    sql, params = latest_prices_sql(assets)
+    return {r["asset"]: dict(r) for r in con.execute(sql, params)}
+
+
+def positions(con: sqlite3.Connection) -> Dict[str, InventoryRow]:
+    rows = con.execute("SELECT asset, qty, avg_cost_try, realized_try FROM positions")
+    return {
+        r["asset"]: InventoryRow(
+            asset=r["asset"], qty=Decimal(r["qty"]), avg_cost_try=Decimal(r["avg_cost_try"]), realized_try=Decimal(r["realized_try"])
+        )
+        for r in rows
+    }
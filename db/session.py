@@ -1,41 +1,80 @@
 # db/session.py
 from __future__ import annotations
 
-import os
 from pathlib import Path
 
 from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
 
-def get_db_path() -> str:
-    # Yerel için öneri: proje içinde data/ klasörü
-    # Cloud için öneri: /tmp (kalıcı değil ama çalışır)
-    default = "data/yatirim.db"
-    p = os.getenv("DB_PATH", default)
-
-    # Cloud ortamlarında /mount/src bazen read-only / garip olabiliyor.
-    # Eğer yazılamazsa otomatik /tmp'ye düşmek istersen:
-    # p = os.getenv("DB_PATH", "/tmp/yatirim.db")
-
-    return p
+from db.maintenance import apply_profile
+from db.paths import get_db_path
 
 DB_PATH = get_db_path()
 Path(DB_PATH).parent.mkdir(parents=True, exist_ok=True)
 
-engine = create_engine(
-    f"sqlite:///{DB_PATH}",
-    future=True,
-    connect_args={"check_same_thread": False},
-    pool_pre_ping=True,
-)
-
-# PRAGMA’ları import-time connect ile değil, her bağlantıda uygula
-@event.listens_for(engine, "connect")
-def _set_sqlite_pragma(dbapi_connection, connection_record):
-    cursor = dbapi_connection.cursor()
-    cursor.execute("PRAGMA journal_mode=WAL;")
-    cursor.execute("PRAGMA synchronous=NORMAL;")
-    cursor.execute("PRAGMA busy_timeout=5000;")
-    cursor.close()
+
+def make_write_engine(path: str) -> Engine:
+    """
+    Küçük havuz; her transaction BEGIN IMMEDIATE ile başlar (yazma kilidi baştan alınır,
+    okuma->yazma yükseltmesinde SQLITE_BUSY yerine busy_timeout kadar beklenir).
+    Dosya tabanlı SQLite'ta bağlantı kopmaz: pool_pre_ping her checkout'ta boşa sorgu atardı.
+    """
+    eng = create_engine(
+        f"sqlite:///{path}",
+        future=True,
+        connect_args={"check_same_thread": False},
+        pool_size=2,
+        max_overflow=2,
+        pool_timeout=10,
+    )
+
+    # PRAGMA’ları import-time connect ile değil, her bağlantıda uygula
+    @event.listens_for(eng, "connect")
+    def _set_sqlite_pragma(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL;")
+        cursor.execute("PRAGMA synchronous=NORMAL;")
+        cursor.execute("PRAGMA busy_timeout=5000;")
+        # yalnız yeni DB'de etkili (tablolardan önce); eskiler db/maintenance.vacuum ile çevrilir
+        cursor.execute("PRAGMA auto_vacuum=INCREMENTAL;")
+        apply_profile(cursor)  # SQLITE_PROFILE: cache_size / mmap_size / journal_size_limit
+        cursor.close()
+        # pysqlite'ın kendi (ertelenmiş) BEGIN'ini kapat; transaction'ı begin event'i açar
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(eng, "begin")
+    def _begin_immediate(conn):
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+    return eng
+
+
+def make_read_engine(path: str) -> Engine:
+    """
+    mode=ro + query_only: yazma kilidi hiç alınmaz, servis yazarken WAL snapshot'ından okunur.
+    DB dosyası önce yazma engine'iyle (bootstrap / init_db) oluşturulmuş olmalı.
+    """
+    eng = create_engine(
+        f"sqlite:///file:{Path(path).resolve()}?mode=ro&uri=true",
+        future=True,
+        connect_args={"check_same_thread": False},
+    )
+
+    @event.listens_for(eng, "connect")
+    def _set_sqlite_read_pragma(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA query_only=1;")
+        cursor.execute("PRAGMA busy_timeout=5000;")
+        apply_profile(cursor, read=True)
+        cursor.close()
+
+    return eng
+
+
+engine = make_write_engine(DB_PATH)
+read_engine = make_read_engine(DB_PATH)
 
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+# UI / export okumaları: çok sayıda oturum aynı anda okusa da yazma kilidine dokunmaz
+ReadSession = sessionmaker(bind=read_engine, autoflush=False, autocommit=False, future=True)
@@ -1,41 +1,53 @@
 from __future__ import annotations
 
 from decimal import Decimal
+from typing import Dict, Tuple
 
 from providers.base import PriceProvider, ProviderError
-from utils.http import build_retry_session
+from utils.http import shared_session
 
-LB_TO_GRAM = Decimal("453.59237")  # 1 lb = 453.59237 gram
+# Stooq sembolü -> (close çarpanı -> USD/lb). Birim sembole / feed'e bağlıdır, değerden tahmin edilmez;
+# feed birimi değişirse buradan güncellenir.
+SYMBOL_UNITS: Dict[str, Decimal] = {
+    "hg.f": Decimal("1"),  # COMEX HG vadeli: USD/lb
+}
+# Makul USD/lb aralığı: dışındaki değer (ör. cent/lb'ye geçiş) sessizce yazılmaz, hata olur
+PLAUSIBLE_USD_LB: Tuple[Decimal, Decimal] = (Decimal("0.5"), Decimal("50"))
 
 
 class CopperStooqProvider(PriceProvider):
     """
-    Stooq HG.F -> cent/lb verir.
-    USD/lb = cent/lb / 100
+    Stooq HG.F (COMEX bakır vadeli) son kapanışı, USD/lb.
+    TRY/gram fiyatı USDTRY ile türetilir: providers/derived.py (XCU_G formülü).
     """
     name = "copper_stooq"
 
-    def __init__(self, timeout_s: int = 10):
-        self.session = build_retry_session(timeout_s=timeout_s)
-
-    def _parse_last_close_usd_per_lb(self) -> Decimal:
-        url = "https://stooq.com/q/l/?s=hg.f&f=sd2t2ohlcv&h&e=csv"
-        r = self.session.get(url, timeout=getattr(self.session, "request_timeout_s", 10))
-        r.raise_for_status()
-
-        lines = r.text.strip().splitlines()
-        if len(lines) < 2:
-            raise ValueError("stooq csv empty")
-
-        parts = lines[1].split(",")
-        if len(parts) < 7:
-            raise ValueError("stooq csv malformed")
-
-        close = parts[6]  # Close (cent/lb)
-        cent_per_lb = Decimal(close)
-        usd_per_lb = cent_per_lb / Decimal("100")
-        return usd_per_lb
+    def __init__(self, timeout_s: int = 10, symbol: str = "hg.f"):
+        self.session = shared_session(timeout_s=timeout_s)
+        self.symbol = symbol
+        self.unit = SYMBOL_UNITS[symbol]
+
+    def get_usd_per_lb(self) -> Decimal:
+        url = f"https://stooq.com/q/l/?s={self.symbol}&f=sd2t2ohlcv&h&e=csv"
+        try:
+            r = self.session.get(url, timeout=getattr(self.session, "request_timeout_s", 10))
+            r.raise_for_status()
+            lines = r.text.strip().splitlines()
+            if len(lines) < 2:
+                raise ValueError("stooq csv empty")
+            # header: Symbol,Date,Time,Open,High,Low,Close,Volume
+            parts = lines[1].split(",")
+            if len(parts) < 7:
+                raise ValueError("stooq csv malformed")
+            if parts[0].strip().lower() != self.symbol:
+                raise ValueError(f"unexpected symbol {parts[0]!r}")
+            usd_lb = Decimal(parts[6]) * self.unit
+        except Exception as e:
+            raise ProviderError(f"Stooq {self.symbol.upper()} failed: {e}") from e
+        lo, hi = PLAUSIBLE_USD_LB
+        if not lo <= usd_lb <= hi:
+            raise ProviderError(f"Stooq {self.symbol.upper()}: {usd_lb} USD/lb outside {lo}-{hi}; feed unit changed?")
+        return usd_lb
 
     def get_prices_try(self, assets):
-        # Bu provider TRY fiyatını Router'da USDTRY ile dönüştürerek üretir.
-        raise ProviderError("CopperStooqProvider must be used via ProviderRouter.")
+        raise ProviderError("CopperStooqProvider returns USD/lb; XCU_G is derived in providers/derived.py.")
@@ -0,0 +1,194 @@
+"""
+Türetilmiş fiyatlar: baz kotasyonlar üzerinde formüllerle tanımlanan varlıklar (DAG).
+
+Her anahtar (varlık ya da ara değer, ör. HG_USD_LB) için öncelik sırasıyla alternatifler
+tutulur: bir kaynak (provider fetch'i) ya da girdileri başka anahtarlar olan bir formül.
+
+    XCU_G = HG_USD_LB (stooq) x USDTRY (frankfurter) / 453.59237
+    XAU_G = XAU_ONS / 31.1034768       (XAU_ONS: Kapalıçarşı, yoksa metals.dev)
+
+Çözüm dalgalar halinde ilerler: istenen her anahtar için ilk umut veren alternatifin
+ihtiyaç duyduğu kaynaklar toplanır ve paralel çekilir; başarısız / eksik dönen kaynak o
+tick'te tekrar çekilmez, sonraki dalga bir sonraki alternatife geçer (ör. Kapalıçarşı gram
+altın vermediyse metals.dev). Böylece her kaynak tick başına en fazla bir kez çağrılır ve
+USDTRY gibi ortak girdiler tüm formüllerce paylaşılır.
+
+Formül sonuçları girdileriyle birlikte önbelleklenir (Memo); girdiler değişmediyse
+yeniden hesaplanmaz.
+"""
+from __future__ import annotations
+
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from utils.logging import setup_logging
+
+logger = setup_logging("derived", os.getenv("LOG_DIR", "logs"))
+
+LB_TO_GRAM = Decimal("453.59237")   # 1 lb = 453.59237 gram
+OZ_TO_GRAM = Decimal("31.1034768")  # 1 troy ons = 31.1034768 gram
+
+Quote = Dict[str, Decimal]  # {"mid", "bid", "ask"}
+
+
+@dataclass(frozen=True)
+class Source:
+    """Baz kaynak: istenen anahtarların bir alt kümesini tek fetch'te döndürür."""
+    name: str
+    provides: Tuple[str, ...]
+    fetch: Callable[[List[str]], Dict[str, Quote]]
+    enabled: Callable[[], bool] = field(default=lambda: True)
+
+
+@dataclass(frozen=True)
+class Formula:
+    """key = fn(*inputs) — girdilerin mid değerleri üzerinden; sonuç tek fiyat (bid = ask = mid)."""
+    key: str
+    inputs: Tuple[str, ...]
+    fn: Callable[..., Decimal]
+
+
+Alternative = Union[Source, Formula]
+
+
+class Memo:
+    """Formül sonuçları: key -> (girdi değerleri, sonuç). Süreç genelinde paylaşılır."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data: Dict[str, Tuple[Tuple[Decimal, ...], Decimal]] = {}
+        self.computed = 0
+        self.reused = 0
+
+    def get(self, f: Formula, args: Tuple[Decimal, ...]) -> Decimal:
+        with self._lock:
+            hit = self._data.get(f.key)
+            if hit is not None and hit[0] == args:
+                self.reused += 1
+                return hit[1]
+        value = f.fn(*args)
+        with self._lock:
+            self._data[f.key] = (args, value)
+            self.computed += 1
+        return value
+
+
+MEMO = Memo()
+
+
+class QuoteGraph:
+    def __init__(self, memo: Optional[Memo] = None):
+        self.alternatives: Dict[str, List[Alternative]] = {}
+        self.memo = memo or MEMO
+
+    def add_source(self, src: Source) -> "QuoteGraph":
+        for k in src.provides:
+            self.alternatives.setdefault(k, []).append(src)
+        return self
+
+    def add_formula(self, key: str, inputs: Iterable[str], fn: Callable[..., Decimal]) -> "QuoteGraph":
+        self.alternatives.setdefault(key, []).append(Formula(key, tuple(inputs), fn))
+        return self
+
+    def _needs(self, key: str, values: Dict[str, Quote], tried: Set[str],
+               stack: Tuple[str, ...]) -> Optional[Set[Tuple[Source, str]]]:
+        """
+        None: anahtar bu tick çözülemez. Boş küme: mevcut değerlerden hesaplanabilir.
+        Aksi halde ilk umut veren alternatif için çekilmesi gereken (kaynak, anahtar) çiftleri.
+        """
+        if key in values:
+            return set()
+        for alt in self.alternatives.get(key, ()):
+            if isinstance(alt, Source):
+                if alt.name not in tried and alt.enabled():
+                    return {(alt, key)}
+                continue
+            if key in stack:  # döngü
+                continue
+            need: Set[Tuple[Source, str]] = set()
+            for inp in alt.inputs:
+                n = self._needs(inp, values, tried, stack + (key,))
+                if n is None:
+                    break
+                need |= n
+            else:
+                return need
+        return None
+
+    def _fetch(self, wave: Dict[Source, List[str]]) -> Dict[str, Dict[str, Quote]]:
+        def run(src: Source) -> Dict[str, Quote]:
+            t0 = time.perf_counter()
+            try:
+                got = src.fetch(wave[src])
+            except Exception as e:
+                got, err = {}, e
+            else:
+                err = None
+            fields = {"provider": src.name, "latency_ms": round((time.perf_counter() - t0) * 1000, 1),
+                      "assets": len(got), "requested": len(wave[src])}
+            if err is None:
+                logger.info(f"Source {src.name}: {len(got)}/{len(wave[src])}", extra=fields)
+            else:
+                logger.warning(f"Source {src.name} failed: {err}", extra=fields)
+            return got
+
+        srcs = sorted(wave, key=lambda s: s.name)
+        if len(srcs) == 1:
+            return {srcs[0].name: run(srcs[0])}
+        # log_context alanları (tick_id) worker thread'lerine de taşınsın: kaynak başına bir context kopyası
+        ctxs = [contextvars.copy_context() for _ in srcs]
+        with ThreadPoolExecutor(max_workers=len(srcs), thread_name_prefix="quote") as ex:
+            return dict(zip((s.name for s in srcs), ex.map(lambda c, s: c.run(run, s), ctxs, srcs)))
+
+    def _evaluate(self, key: str, values: Dict[str, Quote], origin: Dict[str, str], stack: Tuple[str, ...] = ()) -> bool:
+        if key in values:
+            return True
+        for alt in self.alternatives.get(key, ()):
+            if not isinstance(alt, Formula) or key in stack:
+                continue
+            if all(self._evaluate(i, values, origin, stack + (key,)) for i in alt.inputs):
+                v = self.memo.get(alt, tuple(values[i]["mid"] for i in alt.inputs))
+                values[key] = {"mid": v, "bid": v, "ask": v}
+                names = [n for i in alt.inputs for n in origin[i].split("+")]
+                origin[key] = "+".join(dict.fromkeys(names))
+                return True
+        return False
+
+    def resolve(self, want: Iterable[str], known: Optional[Dict[str, Quote]] = None,
+                known_sources: Optional[Dict[str, str]] = None) -> Tuple[Dict[str, Quote], Dict[str, str]]:
+        """
+        (quotes, sources): istenen anahtarlardan çözülebilenler. known: bu tick'te başka
+        yoldan elde edilmiş kotasyonlar (kaynakları tekrar çekilmez).
+        """
+        want = list(dict.fromkeys(want))
+        values: Dict[str, Quote] = dict(known or {})
+        origin: Dict[str, str] = {k: (known_sources or {}).get(k, "known") for k in values}
+        tried: Set[str] = set()
+        while True:
+            # kaynak -> bu dalgada ondan istenecek anahtarlar (kaynak başına tek fetch)
+            wave: Dict[Source, List[str]] = {}
+            for k in want:
+                for src, key in sorted(self._needs(k, values, tried, ()) or (), key=lambda n: (n[0].name, n[1])):
+                    keys = wave.setdefault(src, [])
+                    if key not in keys:
+                        keys.append(key)
+            if not wave:
+                break
+            for name, got in self._fetch(wave).items():
+                tried.add(name)
+                for k, q in got.items():
+                    if k not in values:
+                        values[k] = q
+                        origin[k] = name
+        out: Dict[str, Quote] = {}
+        src_out: Dict[str, str] = {}
+        for k in want:
+            if self._evaluate(k, values, origin):
+                out[k], src_out[k] = values[k], origin[k]
+        return out, src_out
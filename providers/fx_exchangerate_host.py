@@ -1,13 +1,13 @@
 from __future__ import annotations
 from decimal import Decimal
 from typing import Dict, List
-import requests
 from providers.base import PriceProvider, ProviderError
+from utils.http import shared_session
 
 class ExchangerateHostFX(PriceProvider):
     name = "exchangerate_host"
     def __init__(self, timeout_s: int = 10):
-        self.timeout_s = timeout_s
+        self.session = shared_session(timeout_s=timeout_s)
 
     def get_prices_try(self, assets: List[str]) -> Dict[str, Decimal]:
         want = set(assets)
@@ -17,7 +17,7 @@ class ExchangerateHostFX(PriceProvider):
         if not symbols: return {}
         try:
             url = "https://api.exchangerate.host/latest?base=TRY&symbols=" + ",".join(symbols)
-            r = requests.get(url, timeout=self.timeout_s); r.raise_for_status()
+            r = self.session.get(url, timeout=self.session.request_timeout_s); r.raise_for_status()
             j = r.json(); rates = j.get("rates", {})
             out: Dict[str, Decimal] = {}
             if "USDTRY" in want and "USD" in rates:
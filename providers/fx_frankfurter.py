@@ -1,17 +1,21 @@
 from __future__ import annotations
 
+from datetime import date
 from decimal import Decimal
 from typing import Dict, List
 
 from providers.base import PriceProvider, ProviderError
-from utils.http import build_retry_session
+from utils.http import shared_session
+
+
+ASSET_TO_PAIR = {"USDTRY": ("USD", "TRY"), "EURTRY": ("EUR", "TRY")}
 
 
 class FrankfurterFXProvider(PriceProvider):
     name = "frankfurter"
 
     def __init__(self, timeout_s: int = 10):
-        self.session = build_retry_session(timeout_s=timeout_s)
+        self.session = shared_session(timeout_s=timeout_s)
 
     def _fetch(self, frm: str, to: str) -> Decimal:
         url = f"https://api.frankfurter.dev/v1/latest?from={frm}&to={to}"
@@ -35,3 +39,15 @@ class FrankfurterFXProvider(PriceProvider):
         if not out:
             raise ProviderError("Frankfurter: no assets returned")
         return out
+
+    def get_timeseries_try(self, asset: str, start: date, end: date) -> Dict[date, Decimal]:
+        """Tek istekle [start, end] aralığındaki günlük kurlar (yalnız yayın günleri döner)."""
+        frm, to = ASSET_TO_PAIR[asset]
+        url = f"https://api.frankfurter.dev/v1/{start.isoformat()}..{end.isoformat()}?from={frm}&to={to}"
+        try:
+            r = self.session.get(url, timeout=getattr(self.session, "request_timeout_s", 10))
+            r.raise_for_status()
+            rates = r.json().get("rates", {})
+            return {date.fromisoformat(d): Decimal(str(v[to])) for d, v in rates.items() if to in v}
+        except Exception as e:
+            raise ProviderError(f"Frankfurter time-series failed: {e}") from e
@@ -1,36 +1,108 @@
 from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
 from decimal import Decimal
-from typing import Dict, List
-import requests
+from typing import IO, Dict, Iterable, List, Optional, Tuple
 import xml.etree.ElementTree as ET
 from providers.base import PriceProvider, ProviderError
+from utils.http import shared_session
+
+CODE_TO_ASSET = {"USD": "USDTRY", "EUR": "EURTRY"}
+ASSET_TO_CODE = {v: k for k, v in CODE_TO_ASSET.items()}
+
+# Sabit tarihli resmi tatiller (ay, gün): bu günler için istek atılmaz.
+# Dini bayramlar yıla göre kayar; arşivde dosya olmadığı için 404 -> atlanır.
+FIXED_HOLIDAYS = {(1, 1), (4, 23), (5, 1), (5, 19), (7, 15), (8, 30), (10, 29)}
+
+BidAsk = Tuple[Decimal, Decimal]  # (ForexBuying, ForexSelling)
+
+
+def is_business_day(d: date) -> bool:
+    return d.weekday() < 5 and (d.month, d.day) not in FIXED_HOLIDAYS
+
+
+def archive_url(d: date) -> str:
+    return f"https://www.tcmb.gov.tr/kurlar/{d:%Y%m}/{d:%d%m%Y}.xml"
+
+
+def parse_rates(stream: IO[bytes], codes: Iterable[str]) -> Dict[str, BidAsk]:
+    """Kur XML'ini akış halinde okur; istenen kodlar bulununca durur."""
+    want = set(codes)
+    out: Dict[str, BidAsk] = {}
+    for _, el in ET.iterparse(stream, events=("end",)):
+        if el.tag != "Currency":
+            continue
+        code = el.attrib.get("CurrencyCode")
+        if code in want:
+            fb, fs = el.findtext("ForexBuying"), el.findtext("ForexSelling")
+            if fs:
+                out[code] = (Decimal(fb) if fb else Decimal(fs), Decimal(fs))
+                if len(out) == len(want):
+                    break
+        el.clear()
+    return out
+
 
 class TCMBFX(PriceProvider):
     name = "tcmb"
     def __init__(self, timeout_s: int = 10):
-        self.timeout_s = timeout_s
+        self.session = shared_session(timeout_s=timeout_s)
+
+    def _get_rates(self, url: str, codes: Iterable[str]) -> Optional[Dict[str, BidAsk]]:
+        r = self.session.get(url, timeout=self.session.request_timeout_s, stream=True)
+        try:
+            if r.status_code == 404:
+                return None
+            r.raise_for_status()
+            r.raw.decode_content = True
+            return parse_rates(r.raw, codes)
+        finally:
+            r.close()
 
     def get_prices_try(self, assets: List[str]) -> Dict[str, Decimal]:
-        want = set(assets)
-        if not ({"USDTRY","EURTRY"} & want):
+        codes = [ASSET_TO_CODE[a] for a in assets if a in ASSET_TO_CODE]
+        if not codes:
             return {}
         try:
-            r = requests.get("https://www.tcmb.gov.tr/kurlar/today.xml", timeout=self.timeout_s)
-            r.raise_for_status()
-            root = ET.fromstring(r.text)
-            def find(code: str):
-                for cur in root.findall("Currency"):
-                    if cur.attrib.get("CurrencyCode") == code:
-                        fs = cur.findtext("ForexSelling")
-                        return Decimal(fs) if fs else None
-                return None
-            out: Dict[str, Decimal] = {}
-            if "USDTRY" in want:
-                v = find("USD"); 
-                if v is not None: out["USDTRY"] = v
-            if "EURTRY" in want:
-                v = find("EUR");
-                if v is not None: out["EURTRY"] = v
-            return out
+            rates = self._get_rates("https://www.tcmb.gov.tr/kurlar/today.xml", codes) or {}
+            return {CODE_TO_ASSET[c]: sell for c, (_buy, sell) in rates.items()}
         except Exception as e:
             raise ProviderError(f"TCMB FX failed: {e}") from e
+
+    def fetch_archive_day(self, d: date, assets: List[str]) -> Optional[Dict[str, BidAsk]]:
+        """Arşivdeki günlük kur dosyası; yayın yoksa (tatil) None."""
+        codes = [ASSET_TO_CODE[a] for a in assets if a in ASSET_TO_CODE]
+        rates = self._get_rates(archive_url(d), codes)
+        if rates is None:
+            return None
+        return {CODE_TO_ASSET[c]: v for c, v in rates.items()}
+
+    def fetch_archive(
+        self,
+        days: Iterable[date],
+        assets: List[str],
+        max_workers: int = 8,
+        errors: Optional[List[Tuple[date, str]]] = None,
+    ) -> Iterable[Tuple[date, Dict[str, BidAsk]]]:
+        """
+        Günleri sınırlı thread havuzuyla paralel indirir; hafta sonu/sabit tatil için istek atılmaz.
+        Tek bir günün hatası diğerlerini durdurmaz (errors listesine eklenir).
+        """
+        todo = [d for d in days if is_business_day(d)]
+
+        def one(d: date):
+            try:
+                return self.fetch_archive_day(d, assets)
+            except Exception as e:
+                if errors is not None:
+                    errors.append((d, str(e)))
+                return None
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tcmb") as pool:
+            for d, rates in zip(todo, pool.map(one, todo)):
+                if rates:
+                    yield d, rates
+
+
+def date_range(start: date, end: date) -> List[date]:
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
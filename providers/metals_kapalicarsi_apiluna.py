@@ -1,44 +1,132 @@
 from __future__ import annotations
 
-from decimal import Decimal
-from typing import Dict, List, Tuple
+import re
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Pattern, Tuple
 
 from providers.base import PriceProvider, ProviderError
-from utils.http import build_retry_session
+from utils.http import shared_session
+
+BidAsk = Tuple[Decimal, Decimal]
+
+_TR_FOLD = str.maketrans("çğıöşüÇĞİÖŞÜâî", "cgiosuCGIOSUai")
+
+# (sembol, kural) — bir ürün ilk eşleşen kurala atanır, sıra önemli
+# (ör. "Gümüş Ons" ons kuralından önce, "Çeyrek Altın" gram altın kuralından önce yakalanmalı)
+_RULES: List[Tuple[str, Pattern]] = [
+    ("XAG_ONS_USD", re.compile(r"gumus\s*ons|ons\s*gumus|xagusd|gumususd")),
+    ("XAU_ONS_USD", re.compile(r"\bons\b|xauusd")),
+    ("XAU_22_BILEZIK", re.compile(r"22\s*ayar|bilezik")),
+    ("XAU_CEYREK", re.compile(r"ceyrek")),
+    ("XAU_YARIM", re.compile(r"yarim")),
+    ("XAU_CUMHURIYET", re.compile(r"cumhuriyet|ata\s*lira")),
+    ("XAU_TAM", re.compile(r"\btam\b")),
+    ("XAU_G", re.compile(r"gram\s*altin|gramaltin")),
+    ("XAU_HAS", re.compile(r"\bhas\b")),
+    ("XAG_G", re.compile(r"gram\s*gumus|\bgumus\b|silver")),
+]
+
+# Tek aramada "hiçbir kurala uymuyor" elemesi (feed'deki ilgisiz ürünler için)
+_ANY = re.compile("|".join(f"(?:{rx.pattern})" for _, rx in _RULES))
+
+# Döviz kurları kod üzerinden: "USD" / "USDTRY" / "USD/TRY" -> USDTRY. İki yabancı para
+# kodundan oluşan kod (EURUSD, USD/JPY) paritedir ve atlanır; USDTRY sayılıp XAU_ONS'a girmemeli.
+_FIAT = r"(?:usd|eur|gbp|chf|jpy|cad|aud|sek|nok|dkk|sar|rub|cny)"
+_PARITY = re.compile(rf"{_FIAT}\W?{_FIAT}")
+_FX_CODES = {"usd": "USDTRY", "usdtry": "USDTRY", "eur": "EURTRY", "eurtry": "EURTRY"}
+# Kod tanınmazsa ada bakılır (ad tamamen eşleşmeli); yalnız ABD doları ve euro (ör. "Kanada Doları" USDTRY değildir)
+_FX_NAMES: List[Tuple[str, Pattern]] = [
+    ("USDTRY", re.compile(r"(?:amerikan|abd)?\s*dolar\w*")),
+    ("EURTRY", re.compile(r"euro?")),
+]
+
+# Gram altın listede yoksa has altın kullanılır
+_FALLBACKS = {"XAU_G": "XAU_HAS"}
+
+# Provider'ın TRY cinsinden sunduğu varlıklar (XAU_ONS: ons USD x USDTRY, aynı payload'dan)
+SUPPORTED = {"XAU_G", "XAG_G", "XAU_CEYREK", "XAU_YARIM", "XAU_TAM", "XAU_CUMHURIYET", "XAU_22_BILEZIK", "XAU_ONS"}
+
+
+@lru_cache(maxsize=4096)
+def _classify(kod: str, name: str) -> Optional[str]:
+    """Ürün -> sembol. Feed'deki ürün adları fetch'ler arasında sabit olduğu için sonuç önbelleklenir."""
+    kod = kod.translate(_TR_FOLD).lower().strip()
+    name = name.translate(_TR_FOLD).lower().strip()
+    if _PARITY.fullmatch(kod):
+        return None
+    fx = _FX_CODES.get(re.sub(r"\W", "", kod))
+    if fx:
+        return fx
+    text = f"{kod} {name}"
+    if _ANY.search(text):
+        for sym, rx in _RULES:
+            if rx.search(text):
+                return sym
+    for sym, rx in _FX_NAMES:
+        if rx.fullmatch(name):
+            return sym
+    return None
+
+
+def _to_dec(x) -> Decimal:
+    """Feed sayısı -> Decimal. JSON sayıları olduğu gibi; metinde nokta yalnız virgüllü ondalıkla
+    birlikteyse binlik ayırıcıdır ('4.241,50'), tek başına ondalık noktadır ('41.785')."""
+    if isinstance(x, (int, float, Decimal)) and not isinstance(x, bool):
+        return Decimal(str(x))
+    s = str(x).strip()
+    if "," in s:
+        s = s.replace(".", "").replace(",", ".")
+    return Decimal(s)
+
+
+def _read_bid_ask(it: dict) -> BidAsk:
+    bid = it.get("alis") or it.get("buy") or it.get("bid")
+    ask = it.get("satis") or it.get("sell") or it.get("ask")
+    last = it.get("son") or it.get("last") or it.get("price")
+
+    if bid is None and ask is None and last is None:
+        raise KeyError("no price fields")
+
+    if last is not None and (bid is None and ask is None):
+        v = _to_dec(last)
+        return v, v
+
+    if bid is None:
+        bid = ask
+    if ask is None:
+        ask = bid
+
+    return _to_dec(bid), _to_dec(ask)
+
+
+def parse_index(items: Iterable[dict]) -> Dict[str, BidAsk]:
+    """Payload'ı tek geçişte sembol -> (bid, ask) indeksine çevirir; sayılar yalnız eşleşen ürünler için bir kez parse edilir."""
+    idx: Dict[str, BidAsk] = {}
+    for it in items:
+        sym = _classify(str(it.get("kod") or ""), str(it.get("name") or it.get("adi") or ""))
+        if sym is None or sym in idx:
+            continue
+        try:
+            idx[sym] = _read_bid_ask(it)
+        except (KeyError, ValueError, InvalidOperation):
+            pass
+    for sym, alt in _FALLBACKS.items():
+        if sym not in idx and alt in idx:
+            idx[sym] = idx[alt]
+    if "XAU_ONS_USD" in idx and "USDTRY" in idx:
+        usd = sum(idx["USDTRY"]) / Decimal("2")
+        b, a = idx["XAU_ONS_USD"]
+        idx["XAU_ONS"] = (b * usd, a * usd)
+    return idx
 
 
 class KapaliCarsiApilunaProvider(PriceProvider):
     name = "kapalicarsi_apiluna"
+    supported = SUPPORTED
 
     def __init__(self, timeout_s: int = 10):
-        self.session = build_retry_session(timeout_s=timeout_s)
-
-    def _to_dec(self, x) -> Decimal:
-        s = str(x).strip()
-        if "," in s and "." in s:
-            s = s.replace(".", "").replace(",", ".")
-        elif "," in s and "." not in s:
-            s = s.replace(",", ".")
-        return Decimal(s)
-
-    def _read_bid_ask(self, it: dict) -> Tuple[Decimal, Decimal]:
-        bid = it.get("alis") or it.get("buy") or it.get("bid")
-        ask = it.get("satis") or it.get("sell") or it.get("ask")
-        last = it.get("son") or it.get("last") or it.get("price")
-
-        if bid is None and ask is None and last is None:
-            raise KeyError("no price fields")
-
-        if last is not None and (bid is None and ask is None):
-            v = self._to_dec(last)
-            return v, v
-
-        if bid is None:
-            bid = ask
-        if ask is None:
-            ask = bid
-
-        return self._to_dec(bid), self._to_dec(ask)
+        self.session = shared_session(timeout_s=timeout_s)
 
     def _fetch_items(self) -> List[dict]:
         r = self.session.get("https://kapalicarsi.apiluna.org/", timeout=getattr(self.session, "request_timeout_s", 10))
@@ -51,30 +139,17 @@ class KapaliCarsiApilunaProvider(PriceProvider):
                 items.extend(v)
         return items
 
-    def _find(self, items: List[dict], keywords: List[str]) -> dict | None:
-        for it in items:
-            name = str(it.get("name") or it.get("adi") or it.get("kod") or "").lower()
-            if any(k in name for k in keywords):
-                return it
-        return None
-
-    def get_prices_try(self, assets: List[str]) -> Dict[str, Decimal]:
-        want = set(assets)
-        items = self._fetch_items()
-        out: Dict[str, Decimal] = {}
-
-        def put(asset: str, keywords: List[str]):
-            it = self._find(items, keywords)
-            if not it:
-                return
-            bid, ask = self._read_bid_ask(it)
-            out[asset] = (bid + ask) / Decimal("2")
-
-        if "XAU_G" in want:
-            put("XAU_G", ["gram alt", "gramalt", "altın", "altin"])
-        if "XAG_G" in want:
-            put("XAG_G", ["gram güm", "gram gum", "gümüş", "gumus", "silver"])
-
+    def get_quotes_try(self, assets: List[str]) -> Dict[str, dict]:
+        """{asset: {"mid", "bid", "ask"}} — fiziki piyasa alış/satış ile."""
+        idx = parse_index(self._fetch_items())
+        out: Dict[str, dict] = {}
+        for a in set(assets) & SUPPORTED:
+            if a in idx:
+                bid, ask = idx[a]
+                out[a] = {"mid": (bid + ask) / Decimal("2"), "bid": bid, "ask": ask}
         if not out:
             raise ProviderError("Kapalıçarşı: nothing matched")
         return out
+
+    def get_prices_try(self, assets: List[str]) -> Dict[str, Decimal]:
+        return {a: q["mid"] for a, q in self.get_quotes_try(assets).items()}
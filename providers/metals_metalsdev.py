@@ -1,35 +1,45 @@
 from __future__ import annotations
 from decimal import Decimal
-from typing import Dict, List
-import os, requests
+from typing import Dict, List, Optional
+import os
 from providers.base import PriceProvider, ProviderError
+from providers.derived import OZ_TO_GRAM
+from utils.http import shared_session
+from utils.rate_limit import Quota, RateLimiter
+
+# Ücretsiz plan: ayda 100 istek. METALS_DEV_MONTHLY_QUOTA / _DAILY_QUOTA / _BURST ile değiştirilebilir.
+METALS_DEV_QUOTA = Quota.from_env("METALS_DEV", monthly=100)
 
 class MetalsDevProvider(PriceProvider):
     name = "metals_dev"
-    def __init__(self, timeout_s: int = 10):
-        self.timeout_s = timeout_s
+    def __init__(self, timeout_s: int = 10, limiter: Optional[RateLimiter] = None):
+        # retry yok: her deneme kotadan düşer; 429 tekrar denenmez, limiter'a bildirilir
+        self.session = shared_session(timeout_s=timeout_s, total_retries=0, status_forcelist=None)
         self.api_key = os.getenv("METALS_DEV_API_KEY","").strip()
+        self.limiter = limiter or RateLimiter(self.name, METALS_DEV_QUOTA)
 
-    def get_prices_try(self, assets: List[str]) -> Dict[str, Decimal]:
+    def get_ounce_try(self, metals: List[str]) -> Dict[str, Decimal]:
+        """{"XAU": TRY/ons, "XAG": TRY/ons} — gram fiyatı providers/derived.py'de türetilir."""
         if not self.api_key:
             raise ProviderError("METALS_DEV_API_KEY missing")
-        want = set(assets)
-        symbols = []
-        if "XAU_G" in want: symbols.append("XAU")
-        if "XAG_G" in want: symbols.append("XAG")
+        symbols = [m for m in ("XAU", "XAG") if m in set(metals)]
         if not symbols: return {}
+        if not self.limiter.try_acquire():
+            raise ProviderError(f"Metals.dev quota: next call in {self.limiter.next_in_s():.0f}s")
         try:
             url = f"https://metals.dev/api/latest?api_key={self.api_key}&base=TRY&symbols={','.join(symbols)}"
-            r = requests.get(url, timeout=self.timeout_s); r.raise_for_status()
-            j = r.json(); rates = j.get("rates", {})
-            OZ_TO_G = Decimal("31.1034768")
-            out: Dict[str, Decimal] = {}
-            if "XAU" in rates and "XAU_G" in want:
-                try_oz = Decimal("1") / Decimal(str(rates["XAU"]))
-                out["XAU_G"] = try_oz / OZ_TO_G
-            if "XAG" in rates and "XAG_G" in want:
-                try_oz = Decimal("1") / Decimal(str(rates["XAG"]))
-                out["XAG_G"] = try_oz / OZ_TO_G
-            return out
+            r = self.session.get(url, timeout=self.session.request_timeout_s)
+            if r.status_code == 429:
+                retry_after = r.headers.get("Retry-After", "")
+                self.limiter.block(float(retry_after) if retry_after.isdigit() else 3600)
+            r.raise_for_status()
+            rates = r.json().get("rates", {})
+            # base=TRY: 1 TL kaç ons -> ons başına TL
+            return {m: Decimal("1") / Decimal(str(rates[m])) for m in symbols if m in rates}
         except Exception as e:
             raise ProviderError(f"Metals.dev failed: {e}") from e
+
+    def get_prices_try(self, assets: List[str]) -> Dict[str, Decimal]:
+        want = set(assets)
+        ons = self.get_ounce_try([m for m, a in (("XAU", "XAU_G"), ("XAG", "XAG_G")) if a in want])
+        return {f"{m}_G": v / OZ_TO_GRAM for m, v in ons.items()}
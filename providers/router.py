@@ -1,46 +1,124 @@
 from __future__ import annotations
 
+import os
+import threading
 from decimal import Decimal
-from typing import Dict, List, Tuple
+from typing import Dict, List, Mapping, Optional, Tuple
 
+from providers.base import PriceProvider
+from providers.copper_stooq import CopperStooqProvider
+from providers.derived import LB_TO_GRAM, OZ_TO_GRAM, QuoteGraph, Source
+from providers.fx_exchangerate_host import ExchangerateHostFX
 from providers.fx_frankfurter import FrankfurterFXProvider
+from providers.fx_tcmb import TCMBFX
+from providers.metals_kapalicarsi_apiluna import SUPPORTED as KAPALICARSI_SUPPORTED
 from providers.metals_kapalicarsi_apiluna import KapaliCarsiApilunaProvider
+from providers.metals_metalsdev import MetalsDevProvider
+
+FX_PROVIDERS = {"frankfurter": FrankfurterFXProvider, "exchangerate_host": ExchangerateHostFX, "tcmb": TCMBFX}
+
+# Router'ı belirleyen ayarlar (settings tablosu; varsayılanlar db/init_db.DEFAULT_SETTINGS ile aynı).
+# "manual": o adımda sağlayıcı çağrılmaz, çözülemeyen varlık manuel / son bilinen fiyatla kalır.
+ROUTER_DEFAULTS = {
+    "fx_primary": "frankfurter",
+    "fx_fallback": "tcmb",
+    "metals_primary": "kapalicarsi_apiluna",
+    "metals_fallback": "metals_dev",
+    "copper_provider": "copper_stooq",
+}
+
+
+def router_config(settings: Optional[Mapping[str, str]] = None) -> Dict[str, str]:
+    return {k: (settings or {}).get(k) or v for k, v in ROUTER_DEFAULTS.items()}
+
+
+def _chain(cfg: Dict[str, str], primary: str, fallback: str) -> List[str]:
+    return [n for n in dict.fromkeys((cfg[primary], cfg[fallback])) if n != "manual"]
+
+
+def _flat(prices: Dict[str, Decimal]) -> Dict[str, dict]:
+    return {a: {"mid": v, "bid": v, "ask": v} for a, v in prices.items()}
 
 
 class ProviderRouter:
-    def __init__(self, timeout_s: int = 10):
-        self.fx = FrankfurterFXProvider(timeout_s=timeout_s)
+    def __init__(self, timeout_s: int = 10, settings: Optional[Mapping[str, str]] = None):
+        self.config = router_config(settings)
+        self.fx: List[PriceProvider] = [FX_PROVIDERS[n](timeout_s=timeout_s)
+                                        for n in _chain(self.config, "fx_primary", "fx_fallback") if n in FX_PROVIDERS]
         self.metals = KapaliCarsiApilunaProvider(timeout_s=timeout_s)
+        self.metals_fallback = MetalsDevProvider(timeout_s=timeout_s)
+        self.copper = CopperStooqProvider(timeout_s=timeout_s)
+        self.graph = self._build_graph()
+
+    def _build_graph(self) -> QuoteGraph:
+        """
+        Kaynak sırası öncelik sırasıdır (fx_primary -> fx_fallback, metals_primary -> metals_fallback);
+        copper_provider "manual" ise XCU_G için kaynak çağrılmaz.
+        XAU_ONS / XAG_ONS: ons başına TL (ara değer); HG_USD_LB: bakır USD/lb. Bağımsız kaynaklar
+        (FX, Kapalıçarşı, Stooq) aynı dalgada paralel çekilir.
+        """
+        g = QuoteGraph()
+        for p in self.fx:
+            g.add_source(Source(p.name, ("USDTRY", "EURTRY"), lambda keys, p=p: _flat(p.get_prices_try(keys))))
+
+        def ounce_formulas():
+            g.add_formula("XAU_G", ("XAU_ONS",), lambda ons: ons / OZ_TO_GRAM)
+            g.add_formula("XAG_G", ("XAG_ONS",), lambda ons: ons / OZ_TO_GRAM)
+
+        ounce_added = False
+        for name in _chain(self.config, "metals_primary", "metals_fallback"):
+            if name == self.metals.name:
+                g.add_source(Source(self.metals.name, tuple(sorted(KAPALICARSI_SUPPORTED)), self.metals.get_quotes_try))
+            elif name == self.metals_fallback.name and self.metals_fallback.api_key:
+                # kotayı limiter paylaştırır; birincilse gram fiyatı Kapalıçarşı'dan önce ons'tan türetilir
+                g.add_source(Source(
+                    self.metals_fallback.name, ("XAU_ONS", "XAG_ONS"),
+                    lambda keys: _flat({f"{m}_ONS": v for m, v in self.metals_fallback.get_ounce_try([k[:3] for k in keys]).items()}),
+                    enabled=lambda: bool(self.metals_fallback.api_key),
+                ))
+                if not ounce_added:
+                    ounce_formulas()
+                    ounce_added = True
+        if self.config["copper_provider"] == self.copper.name:
+            g.add_source(Source(self.copper.name, ("HG_USD_LB",), lambda keys: _flat({"HG_USD_LB": self.copper.get_usd_per_lb()})))
+        g.add_formula("XCU_G", ("HG_USD_LB", "USDTRY"), lambda usd_lb, usdtry: usd_lb * usdtry / LB_TO_GRAM)
+        if not ounce_added:
+            ounce_formulas()
+        return g
 
     def get_all_quotes_try(self, assets: List[str], manual_prices=None) -> Tuple[Dict[str, dict], Dict[str, str]]:
-        want = set(assets)
-        quotes: Dict[str, dict] = {}
-        sources: Dict[str, str] = {}
-
-        # FX partial
-        try:
-            fx = self.fx.get_prices_try([a for a in want if a in ("USDTRY", "EURTRY")])
-            for a, v in fx.items():
-                quotes[a] = {"mid": v, "bid": v, "ask": v}
-                sources[a] = self.fx.name
-        except Exception:
-            pass
-
-        # Metals partial
-        try:
-            met = self.metals.get_prices_try([a for a in want if a in ("XAU_G", "XAG_G")])
-            for a, v in met.items():
+        quotes, sources = self.graph.resolve(assets)
+
+        # Manuel fiyat: yalnız hiçbir kaynaktan / formülden çözülemeyenler için
+        for a in assets:
+            if a not in quotes and manual_prices and a in manual_prices:
+                v = manual_prices[a]
                 quotes[a] = {"mid": v, "bid": v, "ask": v}
-                sources[a] = self.metals.name
-        except Exception:
-            pass
-
-        # Copper: manual fallback
-        if "XCU_G" in want:
-            if manual_prices and "XCU_G" in manual_prices:
-                v = manual_prices["XCU_G"]
-                quotes["XCU_G"] = {"mid": v, "bid": v, "ask": v}
-                sources["XCU_G"] = "manual"
+                sources[a] = "manual"
             # else: bırak boş kalsın, sistem yine çalışır
 
         return quotes, sources
+
+
+_routers: Dict[int, Tuple[tuple, ProviderRouter]] = {}
+_routers_lock = threading.Lock()
+
+
+def _router_key(timeout_s: int, settings: Optional[Mapping[str, str]]) -> tuple:
+    # router'ı değiştiren her şey: sağlayıcı ayarları, metals.dev anahtarı, stand-in / kayıt yönlendirmesi
+    return (timeout_s, tuple(router_config(settings).items()), os.getenv("METALS_DEV_API_KEY", "").strip(),
+            os.getenv("HTTP_STANDIN_URL", "").strip(), os.getenv("HTTP_RECORD_DIR", "").strip())
+
+
+def get_router(timeout_s: int = 10, settings: Optional[Mapping[str, str]] = None) -> ProviderRouter:
+    """
+    Süreç geneli router (timeout başına bir tane): provider'lar, quote grafiği ve paylaşılan
+    keep-alive session'lar tick'ler arasında yaşar. Sağlayıcı ayarları (settings tablosu),
+    METALS_DEV_API_KEY veya HTTP yönlendirmesi değişince yeniden kurulur.
+    """
+    key = _router_key(timeout_s, settings)
+    with _routers_lock:
+        cached = _routers.get(timeout_s)
+        if cached is None or cached[0] != key:
+            cached = _routers[timeout_s] = (key, ProviderRouter(timeout_s=timeout_s, settings=settings))
+        return cached[1]
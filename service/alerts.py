@@ -0,0 +1,341 @@
+"""
+Servis tarafı alarm motoru.
+
+Kurallar settings tablosunda `alert_rules` anahtarında JSON liste olarak durur:
+
+    [{"id": "altin_5800", "kind": "price_above", "asset": "XAU_G", "threshold": "5800", "hysteresis": "50"},
+     {"id": "usd_sicrama", "kind": "pct_move", "asset": "USDTRY", "threshold": "1.5", "window_min": 60},
+     {"id": "zarar", "kind": "pnl_below", "threshold": "-5000", "debounce": 2},
+     {"id": "bakir_stale", "kind": "stale", "asset": "XCU_G", "threshold": "3"}]
+
+Kurallar varlığa göre indekslenir; her tick'te yalnız fiyatı/stale durumu değişen
+varlıklara dokunan kurallar değerlendirilir. Tetiklenen kural, değer eşiğin
+hysteresis kadar gerisine dönene kadar tekrar tetiklenmez (debounce: koşul art arda
+N tick sağlanmalı). Bildirimler sink başına ayrı kuyruk/thread ile gönderilir;
+yavaş bir webhook tick'i bekletmez.
+"""
+from __future__ import annotations
+
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Deque, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from utils.decimal import D
+from utils.logging import setup_logging
+from utils.pnl import InventoryRow, valuation_from_prices
+
+logger = setup_logging("alerts", os.getenv("LOG_DIR", "logs"))
+
+KINDS = ("price_above", "price_below", "pct_move", "pnl_below", "stale")
+TOTAL = "*"  # toplam PnL kuralları: herhangi bir varlık değişince değerlendirilir
+
+
+@dataclass(frozen=True)
+class Rule:
+    id: str
+    kind: str
+    threshold: Decimal
+    asset: Optional[str] = None      # pnl_below: None -> toplam PnL
+    hysteresis: Decimal = Decimal("0")
+    debounce: int = 1                # koşul art arda kaç tick sağlanmalı
+    cooldown_min: int = 0            # iki bildirim arası en az süre
+    window_min: int = 60             # pct_move referans penceresi
+
+    @classmethod
+    def from_dict(cls, d: Mapping) -> "Rule":
+        kind = d.get("kind")
+        if kind not in KINDS:
+            raise ValueError(f"alert rule {d.get('id')!r}: unknown kind {kind!r}")
+        asset = d.get("asset") or None
+        if asset is None and kind != "pnl_below":
+            raise ValueError(f"alert rule {d.get('id')!r}: asset required for {kind}")
+        return cls(
+            id=str(d.get("id") or f"{kind}:{asset or TOTAL}"),
+            kind=kind,
+            threshold=D(d.get("threshold", "1" if kind == "stale" else "0")),
+            asset=asset,
+            hysteresis=abs(D(d.get("hysteresis", "0"))),
+            debounce=max(1, int(d.get("debounce", 1))),
+            cooldown_min=int(d.get("cooldown_min", 0)),
+            window_min=int(d.get("window_min", 60)),
+        )
+
+
+_reported: Set[str] = set()  # aynı bozuk kural her tick'te tekrar loglanmasın
+
+
+def _report_bad_rule(msg: str) -> None:
+    if msg not in _reported:
+        _reported.add(msg)
+        logger.error(msg)
+
+
+def parse_rules(settings: Mapping[str, str]) -> List[Rule]:
+    """
+    settings['alert_rules'] + eski tek eşik (pnl_alert_threshold_try) -> kural listesi.
+    Bozuk girdiler tek tek loglanıp atlanır; biri yüzünden diğer kurallar devre dışı kalmaz.
+    """
+    try:
+        raw = json.loads(settings.get("alert_rules") or "[]")
+    except ValueError as e:
+        _report_bad_rule(f"alert_rules is not valid JSON, ignored: {e}")
+        raw = []
+    if not isinstance(raw, list):
+        _report_bad_rule("alert_rules must be a JSON list, ignored")
+        raw = []
+    rules: List[Rule] = []
+    for d in raw:
+        try:
+            rules.append(Rule.from_dict(d))
+        except (ValueError, TypeError, AttributeError, ArithmeticError) as e:
+            _report_bad_rule(f"alert rule {d!r} skipped: {e}")
+    thr = settings.get("pnl_alert_threshold_try")
+    if thr and not any(r.kind == "pnl_below" and r.asset is None for r in rules):
+        rules.append(Rule(id="pnl_total", kind="pnl_below", threshold=D(thr)))
+    return rules
+
+
+@dataclass
+class Tick:
+    price: Decimal
+    is_stale: bool = False
+
+
+@dataclass
+class _State:
+    armed: bool = True
+    hits: int = 0
+    last_fired: Optional[datetime] = None
+
+
+class AlertEngine:
+    def __init__(self, rules: Iterable[Rule] = ()):
+        self._rules: Dict[str, Rule] = {}
+        self._state: Dict[str, _State] = {}
+        self._index: Dict[str, List[Rule]] = {}
+        self._last: Dict[str, Tick] = {}
+        self._stale_run: Dict[str, int] = {}
+        self._history: Dict[str, Deque[Tuple[datetime, Decimal]]] = {}
+        self._max_window: Dict[str, int] = {}
+        self.set_rules(rules)
+
+    def set_rules(self, rules: Iterable[Rule]) -> None:
+        """Kuralları değiştirir; tanımı aynı kalan kuralların durumu (armed/hits) korunur."""
+        new = {r.id: r for r in rules}
+        self._state = {rid: self._state[rid] if self._rules.get(rid) == r else _State() for rid, r in new.items()}
+        self._rules = new
+        self._index = {}
+        self._max_window = {}
+        for r in new.values():
+            self._index.setdefault(r.asset or TOTAL, []).append(r)
+            if r.kind == "pct_move":
+                self._max_window[r.asset] = max(self._max_window.get(r.asset, 0), r.window_min)
+
+    def on_tick(self, ticks: Mapping[str, Tick], positions: Mapping[str, InventoryRow], ts: str) -> List[dict]:
+        """Değişen varlıkların kurallarını değerlendirir, tetiklenen alarmları döner."""
+        now = datetime.fromisoformat(ts)
+        changed: Set[str] = set()
+        for a, t in ticks.items():
+            self._stale_run[a] = self._stale_run.get(a, 0) + 1 if t.is_stale else 0
+            if t.is_stale or self._last.get(a) != t:
+                changed.add(a)
+            self._last[a] = t
+            if a in self._max_window and not t.is_stale:
+                h = self._history.setdefault(a, deque())
+                h.append((now, t.price))
+                while len(h) > 1 and h[1][0] <= now - timedelta(minutes=self._max_window[a]):
+                    h.popleft()
+
+        todo: List[Rule] = [r for a in changed for r in self._index.get(a, ())]
+        if changed & {a for a, p in positions.items() if p.qty != 0}:
+            todo += self._index.get(TOTAL, [])
+
+        fired: List[dict] = []
+        for r in todo:
+            value = self._value(r, positions, now)
+            if value is not None:
+                alert = self._step(r, value, now)
+                if alert:
+                    alert["ts"] = ts
+                    fired.append(alert)
+        return fired
+
+    def _value(self, r: Rule, positions: Mapping[str, InventoryRow], now: datetime) -> Optional[Decimal]:
+        if r.kind in ("price_above", "price_below"):
+            t = self._last.get(r.asset)
+            return None if t is None or t.is_stale else t.price
+        if r.kind == "stale":
+            return Decimal(self._stale_run.get(r.asset, 0))
+        if r.kind == "pct_move":
+            h = self._history.get(r.asset)
+            if not h or len(h) < 2:
+                return None
+            # referans: pencere başındaki (veya ondan hemen önceki) fiyat
+            start = now - timedelta(minutes=r.window_min)
+            ref = h[0][1]
+            for ts, p in h:
+                if ts > start:
+                    break
+                ref = p
+            return abs(h[-1][1] - ref) / ref * 100 if ref else None
+        # pnl_below: realized + unrealized (asset verilmişse yalnız o varlık)
+        inv = {a: p for a, p in positions.items() if r.asset in (None, a)}
+        if any(p.qty and a not in self._last for a, p in inv.items()):
+            return None  # fiyatı bilinmeyen pozisyon varken PnL yanıltıcı olur
+        _, _, unrealized, realized = valuation_from_prices(inv, {a: t.price for a, t in self._last.items()})
+        return unrealized + realized
+
+    def _step(self, r: Rule, v: Decimal, now: datetime) -> Optional[dict]:
+        st = self._state[r.id]
+        below = r.kind in ("price_below", "pnl_below")
+        hit = v <= r.threshold if below else v >= r.threshold
+        if not hit:
+            st.hits = 0
+            if not st.armed:
+                rearm = v > r.threshold + r.hysteresis if below else v < r.threshold - r.hysteresis
+                st.armed = rearm
+            return None
+        st.hits += 1
+        if not st.armed or st.hits < r.debounce:
+            return None
+        if st.last_fired and now - st.last_fired < timedelta(minutes=r.cooldown_min):
+            return None
+        st.armed, st.last_fired = False, now
+        return {
+            "rule_id": r.id,
+            "kind": r.kind,
+            "asset": r.asset,
+            "value": str(v),
+            "threshold": str(r.threshold),
+            "message": _message(r, v),
+        }
+
+
+def _message(r: Rule, v: Decimal) -> str:
+    who = r.asset or "Portföy"
+    if r.kind == "price_above":
+        return f"{who} fiyatı {v} >= {r.threshold}"
+    if r.kind == "price_below":
+        return f"{who} fiyatı {v} <= {r.threshold}"
+    if r.kind == "pct_move":
+        return f"{who} son {r.window_min} dk içinde %{v:.2f} hareket etti (eşik %{r.threshold})"
+    if r.kind == "stale":
+        return f"{who} fiyatı {v} tick'tir güncellenemiyor"
+    return f"{who} PnL {v:.2f} TL <= {r.threshold} TL"
+
+
+# ---------------- Dispatcher ----------------
+
+class FileSink:
+    name = "file"
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def send(self, alert: dict) -> None:
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(alert, ensure_ascii=False) + "\n")
+
+
+class WebhookSink:
+    name = "webhook"
+
+    def __init__(self, url: str, timeout_s: int = 5):
+        from utils.http import build_retry_session
+
+        self.url = url
+        # POST okuma zaman aşımı / 5xx sonrası yeniden gönderilmez (alarm iki kez düşmesin);
+        # yalnız bağlantı hiç kurulamadıysa tekrar denenir
+        self.session = build_retry_session(timeout_s=timeout_s, total_retries=2, allowed_methods=("GET",))
+
+    def send(self, alert: dict) -> None:
+        r = self.session.post(self.url, json=alert, timeout=self.session.request_timeout_s)
+        r.raise_for_status()
+
+
+@dataclass
+class SinkStats:
+    sent: int = 0
+    failed: int = 0
+    dropped: int = 0
+
+
+_STOP = object()
+
+
+class AlertDispatcher:
+    """Sink başına sınırlı kuyruk + daemon thread. submit() hiç beklemez; kuyruk doluysa alarm düşürülür."""
+
+    def __init__(self, sinks: Iterable, queue_size: int = 1000):
+        self.sinks = list(sinks)
+        self.stats: Dict[str, SinkStats] = {s.name: SinkStats() for s in self.sinks}
+        self._queues: List[queue.Queue] = []
+        self._threads: List[threading.Thread] = []
+        for s in self.sinks:
+            q: queue.Queue = queue.Queue(maxsize=queue_size)
+            t = threading.Thread(target=self._run, args=(s, q), name=f"alerts-{s.name}", daemon=True)
+            t.start()
+            self._queues.append(q)
+            self._threads.append(t)
+
+    def submit(self, alerts: Iterable[dict]) -> None:
+        for a in alerts:
+            logger.warning(f"ALERT {a['rule_id']}: {a['message']}")
+            for s, q in zip(self.sinks, self._queues):
+                try:
+                    q.put_nowait(a)
+                except queue.Full:
+                    self.stats[s.name].dropped += 1
+
+    def _run(self, sink, q: queue.Queue) -> None:
+        st = self.stats[sink.name]
+        while True:
+            a = q.get()
+            try:
+                if a is _STOP:
+                    return
+                sink.send(a)
+                st.sent += 1
+            except Exception as e:
+                st.failed += 1
+                logger.error(f"Alert sink {sink.name} failed: {e}")
+            finally:
+                q.task_done()
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Kuyruklar boşalana kadar bekler (test / kapanış). Süre dolarsa False."""
+        deadline = datetime.now() + timedelta(seconds=timeout)
+        for q in self._queues:
+            while q.unfinished_tasks:
+                if datetime.now() >= deadline:
+                    return False
+                time.sleep(0.01)
+        return True
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Thread'lere durma sinyali gönderir; kuyruğu dolu sink'i beklemez, thread'leri toplamda en çok `timeout` sn bekler."""
+        for s, q in zip(self.sinks, self._queues):
+            try:
+                q.put_nowait(_STOP)
+            except queue.Full:
+                logger.warning(f"Alert sink {s.name}: queue full on close, {q.qsize()} pending alerts dropped")
+        # tek ortak süre: kapanış sink sayısı x timeout kadar uzamaz
+        deadline = time.monotonic() + timeout
+        for t in self._threads:
+            t.join(max(0.0, deadline - time.monotonic()))
+
+
+def build_dispatcher(settings: Mapping[str, str]) -> AlertDispatcher:
+    sinks: list = [FileSink(settings.get("alert_file") or os.path.join(os.getenv("LOG_DIR", "logs"), "alerts.jsonl"))]
+    if settings.get("alert_webhook_url"):
+        sinks.append(WebhookSink(settings["alert_webhook_url"]))
+    return AlertDispatcher(sinks)
@@ -0,0 +1,192 @@
+"""
+Geçmiş fiyat doldurma (backfill).
+
+    python -m service.backfill tcmb --start 2020-01-01 --end 2024-12-31 --workers 8
+    python -m service.backfill gaps --lookback-days 30
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Set, Tuple
+
+from sqlalchemy import insert, text
+
+from db.models import Price
+from db.session import SessionLocal
+from providers.fx_frankfurter import ASSET_TO_PAIR, FrankfurterFXProvider
+from providers.fx_tcmb import TCMBFX, date_range, is_business_day
+from utils.logging import setup_logging
+
+logger = setup_logging("backfill", os.getenv("LOG_DIR", "logs"))
+
+# TCMB gösterge kurları 15:30'da, ECB referans kurları (Frankfurter) ~16:00 CET'de ilan edilir
+TCMB_TS_SUFFIX = "T15:30:00+03:00"
+FRANKFURTER_TS_SUFFIX = "T17:00:00+03:00"
+
+# Range/arşiv kaynağı olan varlıklar (metaller için geçmiş uç yok; boşluklar yalnız raporlanır)
+FX_ASSETS = tuple(ASSET_TO_PAIR.keys())
+
+
+def backfill_source(provider_name: str) -> str:
+    return f"{provider_name}_backfill"
+
+
+def _row(ts: str, asset: str, price, source: str, buy=None, sell=None) -> dict:
+    return dict(
+        ts=ts,
+        asset=asset,
+        price=str(price),
+        price_buy=None if buy is None else str(buy),
+        price_sell=None if sell is None else str(sell),
+        currency="TRY",
+        source=source,
+        is_stale=0,
+        error_msg=None,
+    )
+
+
+def bulk_insert_prices(db, rows: List[dict], batch_size: int = 1000, commit: bool = False) -> int:
+    """
+    Fiyat satırlarını executemany ile toplu ekler.
+    commit=True: her batch ayrı commit — yazma kilidi kısa tutulur, servis tick'leri beklemez.
+    """
+    stmt = insert(Price.__table__)
+    for i in range(0, len(rows), batch_size):
+        db.execute(stmt, rows[i : i + batch_size])
+        if commit:
+            db.commit()
+    return len(rows)
+
+
+def existing_days(db, assets: Iterable[str], start: date, end: date) -> Set[Tuple[str, str]]:
+    """(asset, 'YYYY-MM-DD') — aralıkta en az bir fiyatı olan günler."""
+    assets = list(assets)
+    params = {"start": start.isoformat(), "end": f"{end.isoformat()}T99"}
+    params.update({f"a{i}": a for i, a in enumerate(assets)})
+    in_ = ", ".join(f":a{i}" for i in range(len(assets)))
+    q = text(
+        f"SELECT DISTINCT asset, substr(ts, 1, 10) FROM prices "
+        f"WHERE asset IN ({in_}) AND ts >= :start AND ts < :end"
+    )
+    return {(a, d) for a, d in db.execute(q, params)}
+
+
+def backfill_tcmb(
+    start: date,
+    end: date,
+    assets: Tuple[str, ...] = ("USDTRY", "EURTRY"),
+    max_workers: int = 8,
+    only_gaps: bool = True,
+) -> int:
+    """TCMB arşivinden [start, end] aralığını indirir, eksik günleri toplu yazar. Yazılan satır sayısı döner."""
+    t0 = time.perf_counter()
+    with SessionLocal() as db:
+        have = existing_days(db, assets, start, end) if only_gaps else set()
+    days = [d for d in date_range(start, end) if any((a, d.isoformat()) not in have for a in assets)]
+
+    provider = TCMBFX(timeout_s=15)
+    errors: List[Tuple[date, str]] = []
+    rows: List[dict] = []
+    for d, rates in provider.fetch_archive(days, list(assets), max_workers=max_workers, errors=errors):
+        for a, (buy, sell) in rates.items():
+            if (a, d.isoformat()) in have:
+                continue
+            # mid = ForexSelling (canlı TCMB provider'ı ile aynı)
+            rows.append(_row(d.isoformat() + TCMB_TS_SUFFIX, a, sell, backfill_source(provider.name), buy, sell))
+
+    with SessionLocal() as db:
+        n = bulk_insert_prices(db, rows, commit=True)
+
+    for d, e in errors:
+        logger.warning(f"TCMB archive {d} failed: {e}")
+    logger.info(f"TCMB backfill {start}..{end}: {len(days)} days checked, {n} rows written, {len(errors)} errors, {time.perf_counter() - t0:.1f}s")
+    return n
+
+
+def detect_gaps(db, assets: Iterable[str], start: date, end: date) -> Dict[str, List[date]]:
+    """Varlık başına [start, end] içinde hiç fiyatı olmayan iş günleri."""
+    assets = list(assets)
+    have = existing_days(db, assets, start, end)
+    days = [d for d in date_range(start, end) if is_business_day(d)]
+    gaps = {a: [d for d in days if (a, d.isoformat()) not in have] for a in assets}
+    return {a: g for a, g in gaps.items() if g}
+
+
+def backfill_gaps(lookback_days: int = 30, tcmb_workers: int = 2, today: date | None = None) -> Dict[str, int]:
+    """
+    Son lookback_days içindeki boşlukları doldurur. Önce Frankfurter time-series
+    (varlık başına tek istek), kalan günler için TCMB arşivi. Bugün hariç.
+    Varlık başına yazılan satır sayısı döner.
+    """
+    t0 = time.perf_counter()
+    end = (today or date.today()) - timedelta(days=1)
+    start = end - timedelta(days=lookback_days - 1)
+    with SessionLocal() as db:
+        gaps = detect_gaps(db, FX_ASSETS, start, end)
+    if not gaps:
+        return {}
+
+    fr = FrankfurterFXProvider(timeout_s=15)
+    rows: List[dict] = []
+    remaining: Dict[str, Set[date]] = {}
+    for a, days in gaps.items():
+        want = set(days)
+        try:
+            series = fr.get_timeseries_try(a, min(days), max(days))
+        except Exception as e:
+            logger.warning(f"Frankfurter range backfill {a} failed: {e}")
+            series = {}
+        for d, v in series.items():
+            if d in want:
+                rows.append(_row(d.isoformat() + FRANKFURTER_TS_SUFFIX, a, v, backfill_source(fr.name)))
+                want.discard(d)
+        if want:
+            remaining[a] = want
+
+    if remaining:
+        tcmb = TCMBFX(timeout_s=15)
+        all_days = sorted(set().union(*remaining.values()))
+        for d, rates in tcmb.fetch_archive(all_days, list(remaining), max_workers=tcmb_workers):
+            for a, (buy, sell) in rates.items():
+                if d in remaining.get(a, ()):
+                    rows.append(_row(d.isoformat() + TCMB_TS_SUFFIX, a, sell, backfill_source(tcmb.name), buy, sell))
+
+    with SessionLocal() as db:
+        bulk_insert_prices(db, rows, commit=True)
+
+    written: Dict[str, int] = {}
+    for r in rows:
+        written[r["asset"]] = written.get(r["asset"], 0) + 1
+    logger.info(
+        f"Gap backfill {start}..{end}: gaps={ {a: len(g) for a, g in gaps.items()} } "
+        f"written={written} in {time.perf_counter() - t0:.1f}s"
+    )
+    return written
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Historical price backfill")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    t = sub.add_parser("tcmb", help="TCMB günlük kur arşivi (USDTRY/EURTRY)")
+    t.add_argument("--start", required=True, type=date.fromisoformat)
+    t.add_argument("--end", default=date.today().isoformat(), type=date.fromisoformat)
+    t.add_argument("--workers", type=int, default=8)
+    t.add_argument("--all", action="store_true", help="mevcut günleri de yeniden yaz")
+    g = sub.add_parser("gaps", help="son N gündeki boşlukları tespit et ve doldur")
+    g.add_argument("--lookback-days", type=int, default=30)
+    a = ap.parse_args()
+
+    from db.init_db import init_db
+    init_db()
+    if a.cmd == "tcmb":
+        n = backfill_tcmb(a.start, a.end, max_workers=a.workers, only_gaps=not a.all)
+        print(f"{n} rows written")
+    elif a.cmd == "gaps":
+        print(backfill_gaps(lookback_days=a.lookback_days) or "no gaps")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Yüksek frekanslı (HF) tick modu: seçili varlıklar (ör. XAU_G, USDTRY) için birkaç saniyede bir fiyat.
+
+Her HF tick yalnız bellekteki tick halkasına (utils/tick_ring.py, np.memmap) ve fiyat
+panosuna yazılır; SQLite'a her `hf_flush_s` saniyede bir toplu yazılır. Flush'ta bir tick
+ancak son yazılan fiyattan en az `hf_min_change_bp` baz puan uzaklaştıysa `prices`'a girer
+(0: her tick). Böylece yatay piyasada DB büyümez, okurlar sık yazma transaction'larıyla
+yarışmaz; tam çözünürlüklü seri halkada canlı grafik için kalır.
+
+Ayarlar: hf_assets ("" = kapalı), hf_interval_s, hf_flush_s, hf_min_change_bp, hf_capacity.
+"""
+from __future__ import annotations
+
+import os
+import time
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import insert
+
+from db.models import Price
+from db.session import SessionLocal
+from utils.logging import setup_logging
+from utils.quote_board import publish_rows
+from utils.tick_ring import DEFAULT_CAPACITY, TickRing
+from utils.time import TR_TZ
+
+logger = setup_logging("hf_ticks", os.getenv("LOG_DIR", "logs"))
+
+
+def parse_assets(value: str, known: Sequence[str]) -> List[str]:
+    return [a for a in (x.strip() for x in (value or "").split(",")) if a in known]
+
+
+def _iso(t: float) -> str:
+    return datetime.fromtimestamp(t, TR_TZ).isoformat(timespec="seconds")
+
+
+def _num(v: float) -> Optional[str]:
+    return None if v != v else str(Decimal(repr(float(v))))  # NaN -> None; repr: en kısa gösterim
+
+
+class HFTicker:
+    def __init__(self, assets: Sequence[str], router, ring: Optional[TickRing] = None, min_change_bp: float = 2.0,
+                 capacity: int = DEFAULT_CAPACITY, lease=None, session_factory=None):
+        self.assets = list(assets)
+        self.router = router
+        self.ring = ring or TickRing.open_writer(self.assets, capacity)
+        self.min_change = min_change_bp / 10_000
+        self.lease = lease
+        self.session_factory = session_factory or SessionLocal
+        self.sources: Dict[str, str] = {}
+        # açılışta halkada duran tick'ler (önceki liderden) tekrar yazılmaz
+        self._flushed = {a: self.ring.count(a) for a in self.assets}
+        self._last_mid: Dict[str, float] = {}
+        self.stats = {"ticks": 0, "rows": 0, "flushes": 0, "commits": 0}
+
+    def tick(self, now: Optional[float] = None) -> int:
+        """Sağlayıcılardan HF varlıkları çeker, halkaya ve panoya yazar. Eklenen tick sayısı."""
+        quotes, sources = self.router.get_all_quotes_try(self.assets, manual_prices=None)
+        t = time.time() if now is None else now
+        board = {}
+        for a, q in quotes.items():
+            self.ring.append(a, t, float(q["mid"]), float(q.get("bid") or q["mid"]), float(q.get("ask") or q["mid"]))
+            self.sources[a] = sources.get(a, "unknown")
+            board[a] = {"price": q["mid"], "price_buy": q.get("bid"), "price_sell": q.get("ask"), "ts": _iso(t),
+                        "source": self.sources[a], "is_stale": 0}
+        self.stats["ticks"] += len(quotes)
+        if board:
+            try:
+                publish_rows(board, create=False)
+            except Exception as e:
+                logger.warning(f"HF board publish failed: {e}")
+        return len(quotes)
+
+    def _select(self, asset: str, ticks: np.ndarray) -> np.ndarray:
+        """Son yazılan fiyattan en az min_change kadar uzaklaşan tick'ler (sırayla, zincir halinde)."""
+        if not len(ticks) or self.min_change <= 0:
+            return ticks
+        keep = []
+        last = self._last_mid.get(asset)
+        for i, mid in enumerate(ticks["mid"]):
+            if last is None or abs(mid - last) >= self.min_change * abs(last):
+                keep.append(i)
+                last = mid
+        return ticks[keep]
+
+    def flush(self) -> int:
+        """Son flush'tan beri biriken tick'lerden anlamlı olanları tek transaction'da yazar."""
+        rows: List[dict] = []
+        counts: Dict[str, int] = {}
+        last_mid = dict(self._last_mid)
+        for a in self.assets:
+            ticks, counts[a] = self.ring.since(a, self._flushed[a])
+            for t, mid, bid, ask in self._select(a, ticks):
+                rows.append({"ts": _iso(t), "asset": a, "price": _num(mid), "price_buy": _num(bid), "price_sell": _num(ask),
+                             "currency": "TRY", "source": self.sources.get(a, "hf"), "is_stale": 0, "error_msg": None})
+                last_mid[a] = float(mid)
+        if rows:
+            with self.session_factory() as db:
+                db.execute(insert(Price), rows)
+                if self.lease is not None and not self.lease.holds(db):
+                    db.rollback()
+                    logger.error(f"HF flush discarded: lease epoch {self.lease.epoch} no longer held.")
+                    return 0
+                db.commit()
+            self.stats["commits"] += 1
+        self._flushed.update(counts)
+        self._last_mid = last_mid
+        self.stats["rows"] += len(rows)
+        self.stats["flushes"] += 1
+        return len(rows)
+
+
+def run_hf_tick(ticker: HFTicker):
+    try:
+        ticker.tick()
+    except Exception as e:
+        logger.warning(f"HF tick failed: {e}")
+
+
+def run_hf_flush(ticker: HFTicker):
+    try:
+        t0 = time.perf_counter()
+        n = ticker.flush()
+        if n:
+            logger.info(f"HF flush: {n} rows", extra={"rows": n, "latency_ms": round((time.perf_counter() - t0) * 1000, 1)})
+    except Exception as e:
+        logger.error(f"HF flush failed: {e}")
@@ -0,0 +1,150 @@
+"""
+Servis lider kiralaması (lease) — sıcak yedekli çoklu örnek.
+
+`leases` tablosunda tek satır: holder, epoch, expires_at. Lider her ttl/3 saniyede
+kirayı uzatır (heartbeat); süresi dolan kirayı bekleyen yedek örnek alır ve epoch'u
+bir artırır. Böylece çöken liderin yerine en geç ttl + poll süresi içinde yenisi geçer;
+dosya kilidi gibi "sahibi ölmüş kilit" durumu oluşmaz.
+
+Fencing: lider, tick'in yazma transaction'ı içinde (BEGIN IMMEDIATE, bkz. db/session.py)
+commit'ten hemen önce `holds(db)` ile kiranın hâlâ kendi epoch'unda olduğunu doğrular.
+Kira el değiştirdiyse (ör. uzun GC / ağ takılması sonrası) o tick geri alınır; eski
+lider ile yeni lider aynı tick'i iki kez yazamaz.
+"""
+from __future__ import annotations
+
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Callable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from utils.logging import setup_logging
+
+logger = setup_logging("lease", os.getenv("LOG_DIR", "logs"))
+
+_INIT = text("INSERT OR IGNORE INTO leases (name, holder, epoch, expires_at, heartbeat_at) VALUES (:n, NULL, 0, 0, 0)")
+# boşsa / süresi dolmuşsa al (epoch+1); zaten bizdeyse ve geçerliyse yalnız uzat
+_ACQUIRE = text(
+    "UPDATE leases SET "
+    "epoch = CASE WHEN holder = :h AND expires_at > :now THEN epoch ELSE epoch + 1 END, "
+    "holder = :h, expires_at = :now + :ttl, heartbeat_at = :now "
+    "WHERE name = :n AND (holder IS NULL OR holder = :h OR expires_at <= :now)"
+)
+_RENEW = text(
+    "UPDATE leases SET expires_at = :now + :ttl, heartbeat_at = :now "
+    "WHERE name = :n AND holder = :h AND epoch = :e AND expires_at > :now"
+)
+_RELEASE = text("UPDATE leases SET holder = NULL, expires_at = 0 WHERE name = :n AND holder = :h AND epoch = :e")
+_GET = text("SELECT holder, epoch, expires_at FROM leases WHERE name = :n")
+
+
+def default_holder() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class Lease:
+    def __init__(self, name: str = "service", ttl_s: float = 60.0, holder: Optional[str] = None,
+                 engine: Optional[Engine] = None):
+        self.name = name
+        self.ttl_s = ttl_s
+        self.holder = holder or default_holder()
+        self.epoch: Optional[int] = None  # kira bizdeyken geçerli epoch
+        self._engine = engine
+
+    @property
+    def engine(self) -> Engine:
+        if self._engine is None:
+            from db.session import engine
+
+            self._engine = engine
+        return self._engine
+
+    @property
+    def held(self) -> bool:
+        return self.epoch is not None
+
+    def try_acquire(self, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        p = {"n": self.name, "h": self.holder, "now": now, "ttl": self.ttl_s}
+        with self.engine.begin() as conn:
+            conn.execute(_INIT, p)
+            if conn.execute(_ACQUIRE, p).rowcount != 1:
+                self.epoch = None
+                return False
+            epoch = conn.execute(_GET, p).one().epoch
+        if epoch != self.epoch:
+            logger.info(f"Lease {self.name!r} acquired by {self.holder} (epoch {epoch})")
+        self.epoch = epoch
+        return True
+
+    def renew(self, now: Optional[float] = None) -> bool:
+        """Heartbeat. Kira süresi dolmuş ya da el değiştirmişse False (epoch sıfırlanır)."""
+        if self.epoch is None:
+            return False
+        now = time.time() if now is None else now
+        with self.engine.begin() as conn:
+            ok = conn.execute(_RENEW, {"n": self.name, "h": self.holder, "e": self.epoch, "now": now, "ttl": self.ttl_s}).rowcount == 1
+        if not ok:
+            logger.error(f"Lease {self.name!r} lost by {self.holder} (epoch {self.epoch})")
+            self.epoch = None
+        return ok
+
+    def release(self) -> None:
+        if self.epoch is None:
+            return
+        with self.engine.begin() as conn:
+            conn.execute(_RELEASE, {"n": self.name, "h": self.holder, "e": self.epoch})
+        logger.info(f"Lease {self.name!r} released by {self.holder} (epoch {self.epoch})")
+        self.epoch = None
+
+    def holds(self, db, now: Optional[float] = None) -> bool:
+        """
+        Fencing kontrolü: çağıranın açık yazma transaction'ı içinde (Session / Connection).
+        Commit'ten önce çağrılır; False ise çağıran rollback yapmalı.
+        """
+        if self.epoch is None:
+            return False
+        now = time.time() if now is None else now
+        row = db.execute(_GET, {"n": self.name}).one_or_none()
+        return row is not None and row.holder == self.holder and row.epoch == self.epoch and row.expires_at > now
+
+
+def run_elector(
+    lease: Lease,
+    on_elected: Callable[[], None],
+    on_demoted: Callable[[], None],
+    stop: threading.Event,
+    poll_s: Optional[float] = None,
+) -> None:
+    """
+    Lider: her poll_s'de (varsayılan ttl/3) kirayı uzatır. Yedek: aynı aralıkla almayı dener.
+    Rol değişiminde on_elected / on_demoted çağrılır. stop set edilince kira bırakılır.
+    """
+    poll_s = poll_s or lease.ttl_s / 3
+    leader = False
+    try:
+        while not stop.is_set():
+            try:
+                ok = lease.renew() if lease.held else lease.try_acquire()
+            except Exception as e:  # DB meşgul vb.: bu turu atla, kira süresi dolmadan tekrar dene
+                logger.warning(f"Lease heartbeat failed: {e}")
+                ok = leader and lease.held
+            if ok and not leader:
+                leader = True
+                on_elected()
+            elif not ok and leader:
+                leader = False
+                on_demoted()
+            stop.wait(poll_s)
+    finally:
+        if leader:
+            on_demoted()
+        try:
+            lease.release()
+        except Exception as e:
+            logger.warning(f"Lease release failed: {e}")
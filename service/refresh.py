@@ -0,0 +1,71 @@
+"""
+UI'dan istenen anlık güncelleme (stale-while-revalidate).
+
+"Şimdi Güncelle" fiyatları kendisi çekmez: settings'e `refresh_requested_ts` yazar ve
+hemen döner. Servis (lider) bu isteği birkaç saniyede bir yoklar ve fetch işini öne çeker;
+servis çalışmıyorsa (kira süresi dolmuş) istek süreç içi tek bir arka plan thread'inde
+`fetch_and_store` ile karşılanır. Her iki yol da tick'i commit ettiğinde `last_tick_ts`
+güncellenir; sayfa o ana kadar mevcut (gerekirse stale) değerleri göstermeye devam eder.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from db.models import ServiceLease, Setting
+from utils.logging import setup_logging
+from utils.time import iso_now_tr
+
+logger = setup_logging("refresh", os.getenv("LOG_DIR", "logs"))
+
+REQUEST_KEY = "refresh_requested_ts"
+TICK_KEY = "last_tick_ts"  # servis / yerel worker: son commit edilen tick'in ts'i (başarılı ya da stale)
+
+_worker: Optional[threading.Thread] = None
+_worker_lock = threading.Lock()
+
+
+def request_refresh(db) -> str:
+    """İsteği kaydeder (commit çağırana ait) ve istek ts'ini döner."""
+    ts = iso_now_tr()
+    s = db.get(Setting, REQUEST_KEY)
+    if s is None:
+        db.add(Setting(key=REQUEST_KEY, value=ts))
+    else:
+        s.value = ts
+    return ts
+
+
+def refresh_pending(settings: Dict[str, str]) -> bool:
+    """İstek, son tick'ten yeniyse bekliyordur (ISO ts'ler aynı biçimde: metin karşılaştırması yeterli)."""
+    return settings.get(REQUEST_KEY, "") > settings.get(TICK_KEY, "")
+
+
+def service_alive(db, name: str = "service", now: Optional[float] = None) -> bool:
+    """Geçerli kirası olan bir servis lideri var mı (bkz. service/lease.py)."""
+    now = time.time() if now is None else now
+    row = db.get(ServiceLease, name)
+    return row is not None and row.holder is not None and row.expires_at > now
+
+
+def _run_local() -> None:
+    from service.run_service import fetch_and_store
+
+    try:
+        fetch_and_store()
+    except Exception as e:
+        logger.error(f"Local refresh failed: {e}")
+
+
+def start_local_refresh() -> bool:
+    """Servis yokken: süreç başına en fazla bir arka plan tick'i. Yeni thread başladıysa True."""
+    global _worker
+    with _worker_lock:
+        if _worker is not None and _worker.is_alive():
+            return False
+        _worker = threading.Thread(target=_run_local, name="local-refresh", daemon=True)
+        _worker.start()
+    logger.info("Service not running; refreshing prices in a background thread.")
+    return True
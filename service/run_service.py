@@ -1,108 +1,271 @@
 from __future__ import annotations
-import os, time, json
+import os, threading, time, json
+from datetime import datetime, timedelta
 from decimal import Decimal
-from pathlib import Path
 from typing import Dict
 
+from apscheduler.executors.pool import ThreadPoolExecutor
 from apscheduler.schedulers.background import BackgroundScheduler
-from filelock import FileLock, Timeout
 from sqlalchemy import select
 
 from db.init_db import init_db
-from db.session import SessionLocal, get_db_path
+from db.maintenance import run_maintenance
+from db.session import ReadSession, SessionLocal, get_db_path
 from db.models import Price, Setting, Snapshot
-from providers.router import ProviderRouter
-from utils.logging import setup_logging
+from db.positions import load_positions
+from providers.router import get_router
+from service.alerts import AlertDispatcher, AlertEngine, Tick, build_dispatcher, parse_rules
+from service.backfill import backfill_gaps
+from service.hf_ticks import HFTicker, parse_assets, run_hf_flush, run_hf_tick
+from service.lease import Lease, run_elector
+from service.refresh import REQUEST_KEY, TICK_KEY, refresh_pending
+from utils.assets import ASSETS
+from utils.logging import log_context, setup_logging
+from utils.decimal import D
+from utils.http import http_stats
+from utils.pnl import InventoryRow
+from utils.quote_board import price_rows, publish_rows
 from utils.time import iso_now_tr
 from utils.backup import daily_sqlite_backup
 
 logger = setup_logging("service", os.getenv("LOG_DIR","logs"))
 
-ASSETS = ["XAU_G","XAG_G","XCU_G","USDTRY","EURTRY"]
-
 def get_settings(db) -> Dict[str,str]:
     rows = db.execute(select(Setting)).scalars().all()
     return {r.key:r.value for r in rows}
 
-def insert_price(db, ts: str, asset: str, price: Decimal, source: str, is_stale: int, error_msg: str | None):
-    db.add(Price(ts=ts, asset=asset, price=str(price), currency="TRY", source=source, is_stale=is_stale, error_msg=error_msg))
+def set_kv(db, key: str, value: str):
+    s = db.get(Setting, key)
+    if s is None:
+        db.add(Setting(key=key, value=value))
+    else:
+        s.value = value
+
+def insert_price(db, ts: str, asset: str, price: Decimal, source: str, is_stale: int, error_msg: str | None,
+                 bid: Decimal | None = None, ask: Decimal | None = None) -> Price:
+    p = Price(ts=ts, asset=asset, price=str(price), price_buy=None if bid is None else str(bid),
+              price_sell=None if ask is None else str(ask), currency="TRY", source=source,
+              is_stale=is_stale, error_msg=error_msg)
+    db.add(p)
+    return p
 
-def insert_snapshot(db, ts: str, prices: Dict[str,Decimal]):
-    db.add(Snapshot(ts=ts, total_value_try="0", breakdown_json=json.dumps({k:str(v) for k,v in prices.items()}, ensure_ascii=False)))
+def insert_snapshot(db, ts: str, prices: Dict[str,Decimal], positions: Dict[str, InventoryRow]):
+    # breakdown: tick fiyatları (stale dahil) — geçmiş değer farklı baz birimlere bu kurlarla çevrilir
+    total = sum((p.qty * prices[a] for a, p in positions.items() if p.qty and a in prices), Decimal("0"))
+    db.add(Snapshot(ts=ts, total_value_try=str(total), breakdown_json=json.dumps({k:str(v) for k,v in prices.items()}, ensure_ascii=False)))
 
-def fetch_and_store():
+def _last_price(db, asset: str) -> Price | None:
+    return db.execute(select(Price).where(Price.asset==asset).order_by(Price.ts.desc(), Price.id.desc()).limit(1)).scalars().first()
+
+def fetch_and_store(alerts: AlertEngine | None = None, dispatcher: AlertDispatcher | None = None,
+                    lease: Lease | None = None):
     ts = iso_now_tr()
-    with SessionLocal() as db:
-        s = get_settings(db)
-        router = ProviderRouter(
-            fx_primary=os.getenv("FX_PRIMARY", s.get("fx_primary","exchangerate_host")),
-            fx_fallback=os.getenv("FX_FALLBACK", s.get("fx_fallback","frankfurter")),
-            metals_primary=os.getenv("METALS_PRIMARY", s.get("metals_primary","metals_dev")),
-            metals_fallback=os.getenv("METALS_FALLBACK", s.get("metals_fallback","manual")),
-            copper_provider=os.getenv("COPPER_PROVIDER", s.get("copper_provider","kitco")),
-            timeout_s=10,
-        )
+    # tick boyunca atılan tüm log kayıtları (provider'lar dahil) tick_id taşır
+    with log_context(tick_id=ts):
+        _fetch_and_store(ts, alerts, dispatcher, lease)
+
+def _fetch_and_store(ts: str, alerts: AlertEngine | None, dispatcher: AlertDispatcher | None, lease: Lease | None):
+    t0 = time.perf_counter()
+    http0 = http_stats()
+    try:
+        with ReadSession() as db:
+            router = get_router(timeout_s=10, settings=get_settings(db))
+    except Exception as e:
+        logger.warning(f"Provider settings unreadable, using defaults: {e}")
+        router = get_router(timeout_s=10)
 
-        manual_prices = {}  # service doesn't input manual; UI can.
-        max_tries = 3
-        last_err = None
-        for i in range(max_tries):
-            try:
-                prices, sources = router.get_all_prices_try(ASSETS, manual_prices=manual_prices)
-                for a in ASSETS:
-                    if a in prices:
-                        insert_price(db, ts, a, prices[a], sources.get(a,"unknown"), 0, None)
-                    else:
-                        last = db.execute(select(Price).where(Price.asset==a).order_by(Price.id.desc())).scalars().first()
-                        if last:
-                            insert_price(db, ts, a, Decimal(last.price), last.source, 1, "provider_unavailable")
-                        else:
-                            insert_price(db, ts, a, Decimal("0"), "none", 1, "no_data_yet")
-                insert_snapshot(db, ts, prices)
-                set_kv(db, 'last_success_ts', ts)
-                set_kv(db, 'last_error', '')
-                db.commit()
-                logger.info("Prices updated OK.")
-                daily_sqlite_backup(get_db_path(), os.getenv("BACKUP_DIR","backups"))
-                return
-            except Exception as e:
-                last_err = str(e)
-                sleep_s = 2 ** i
-                logger.warning(f"Fetch {i+1}/{max_tries} failed: {e}; sleep {sleep_s}s")
-                time.sleep(sleep_s)
-
-        # total failure -> mark stale from last known
+    max_tries = 3
+    last_err = None
+    quotes: Dict[str, dict] = {}
+    sources: Dict[str, str] = {}
+    for i in range(max_tries):
+        try:
+            quotes, sources = router.get_all_quotes_try(ASSETS, manual_prices=None)
+            if quotes:
+                break
+            raise RuntimeError("no provider returned prices")
+        except Exception as e:
+            last_err = str(e)
+            sleep_s = 2 ** i
+            logger.warning(f"Fetch {i+1}/{max_tries} failed: {e}; sleep {sleep_s}s")
+            time.sleep(sleep_s)
+
+    ticks: Dict[str, Tick] = {}
+    board: list = []
+    with SessionLocal() as db:
+        settings = get_settings(db)
         for a in ASSETS:
-            last = db.execute(select(Price).where(Price.asset==a).order_by(Price.id.desc())).scalars().first()
+            q = quotes.get(a)
+            if q:
+                board.append(insert_price(db, ts, a, q["mid"], sources.get(a,"unknown"), 0, None, q.get("bid"), q.get("ask")))
+                ticks[a] = Tick(q["mid"])
+                continue
+            # sağlayıcı yok/başarısız -> son bilinen fiyat stale olarak
+            last = _last_price(db, a)
             if last:
-                insert_price(db, ts, a, Decimal(last.price), last.source, 1, last_err)
+                board.append(insert_price(db, ts, a, Decimal(last.price), last.source, 1, last_err or "provider_unavailable",
+                                          D(last.price_buy) if last.price_buy else None, D(last.price_sell) if last.price_sell else None))
+                ticks[a] = Tick(Decimal(last.price), is_stale=True)
             else:
-                insert_price(db, ts, a, Decimal("0"), "none", 1, last_err)
-        set_kv(db, 'last_error', last_error or '')
+                insert_price(db, ts, a, Decimal("0"), "none", 1, "no_data_yet")
+        positions = load_positions(db)
+        insert_snapshot(db, ts, {a: t.price for a, t in ticks.items()}, positions)
+        set_kv(db, TICK_KEY, ts)
+        if quotes:
+            set_kv(db, 'last_success_ts', ts)
+            set_kv(db, 'last_error', '')
+        else:
+            set_kv(db, 'last_error', last_err or '')
+        board_rows = price_rows(board)  # commit sonrası expire olmadan önce
+        # fencing: kira bu tick sürerken el değiştirdiyse yeni lider yazar, bu tick geri alınır
+        if lease is not None and not lease.holds(db):
+            db.rollback()
+            logger.error(f"Tick {ts} discarded: lease epoch {lease.epoch} no longer held.")
+            return
         db.commit()
-        logger.error(f"All providers failed; stale written: {last_err}")
+        # UI/CLI son fiyatları SQLite yerine bu panodan okur
+        try:
+            publish_rows(board_rows)
+        except Exception as e:
+            logger.warning(f"Quote board publish failed: {e}")
+
+    # bağlantı sayaçları süreç geneli: aynı anda çalışan HF tick'leri de bu farka girer
+    http1 = http_stats()
+    conn = {"conn_new": http1["new_connections"] - http0["new_connections"], "conn_reused": http1["reused"] - http0["reused"],
+            "handshake_ms": round(http1["handshake_ms"] - http0["handshake_ms"], 1)}
+    if quotes:
+        logger.info(f"Prices updated OK ({len(quotes)}/{len(ASSETS)}).",
+                    extra={"assets": len(quotes), "stale": len(ASSETS) - len(quotes),
+                           "latency_ms": round((time.perf_counter() - t0) * 1000, 1), **conn})
+        daily_sqlite_backup(get_db_path(), os.getenv("BACKUP_DIR","backups"))
+    else:
+        logger.error(f"All providers failed; stale written: {last_err}",
+                     extra={"assets": 0, "stale": len(ASSETS), "latency_ms": round((time.perf_counter() - t0) * 1000, 1), **conn})
+
+    if alerts is not None:
+        try:
+            alerts.set_rules(parse_rules(settings))
+            fired = alerts.on_tick(ticks, positions, ts)
+            if fired and dispatcher is not None:
+                dispatcher.submit(fired)
+        except Exception as e:
+            logger.error(f"Alert evaluation failed: {e}")
+
+def poll_refresh_request(sched: BackgroundScheduler, handled: Dict[str,tuple]):
+    """UI'nın "Şimdi Güncelle" isteği bekliyorsa fetch işini hemen çalıştırır (istek başına bir kez)."""
+    try:
+        # yalnız okuma: yazma kilidini almaz, tick / UI yazarlarıyla yarışmaz
+        with ReadSession() as db:
+            settings = get_settings(db)
+        # aynı istek, arada bir tick commit edilmedikçe tekrar tetiklenmez; tetik anında bir
+        # fetch zaten sürüyorsa (max_instances) o tick bitince istek hâlâ bekler ve yeniden tetiklenir
+        key = (settings.get(REQUEST_KEY, ""), settings.get(TICK_KEY, ""))
+        if not refresh_pending(settings) or handled.get("key") == key:
+            return
+        handled["key"] = key
+        sched.modify_job("fetch", next_run_time=datetime.now())
+        logger.info(f"Refresh requested at {key[0]}; fetching now.")
+    except Exception as e:
+        logger.warning(f"Refresh poll failed: {e}")
+
+def run_gap_backfill(lookback_days: int):
+    try:
+        backfill_gaps(lookback_days=lookback_days)
+    except Exception as e:
+        logger.error(f"Gap backfill failed: {e}")
+
+def run_db_maintenance(full: bool, wal_threshold_mb: float, vacuum_free_mb: float):
+    try:
+        report = run_maintenance(get_db_path(), full=full, wal_threshold_mb=wal_threshold_mb, vacuum_free_mb=vacuum_free_mb)
+        with SessionLocal() as db:
+            set_kv(db, "maint_last_full_report" if full else "maint_last_report", json.dumps(report))
+            db.commit()
+    except Exception as e:
+        logger.error(f"DB maintenance failed: {e}")
+
+def _int_setting(settings: Dict[str,str], key: str, default: int) -> int:
+    try: return int(settings.get(key, default))
+    except Exception: return default
+
+def build_scheduler(settings: Dict[str,str], alerts: AlertEngine, dispatcher: AlertDispatcher,
+                    lease: Lease | None = None) -> BackgroundScheduler:
+    interval_min = _int_setting(settings, "update_interval_min", 30)
+    lookback_days = _int_setting(settings, "backfill_lookback_days", 30)
+    backfill_h = _int_setting(settings, "backfill_interval_h", 6)
+    maint_min = _int_setting(settings, "maint_interval_min", 15)
+    maint_full_h = _int_setting(settings, "maint_full_interval_h", 24)
+    refresh_poll_s = _int_setting(settings, "refresh_poll_s", 5)
+    hf_assets = parse_assets(settings.get("hf_assets", ""), ASSETS)
+    maint_args = [_int_setting(settings, "maint_wal_threshold_mb", 16), _int_setting(settings, "maint_vacuum_free_mb", 8)]
+
+    # backfill ayrı executor'da: uzun süren doldurma fiyat tick'lerini geciktirmez
+    sched = BackgroundScheduler(
+        daemon=True,
+        executors={"default": ThreadPoolExecutor(2), "backfill": ThreadPoolExecutor(1),
+                   "maintenance": ThreadPoolExecutor(1), "hf": ThreadPoolExecutor(2)},
+    )
+    # lider olunca ilk tick hemen
+    sched.add_job(fetch_and_store, "interval", minutes=interval_min, args=[alerts, dispatcher, lease],
+                  id="fetch", max_instances=1, coalesce=True, next_run_time=datetime.now())
+    if refresh_poll_s > 0:
+        sched.add_job(poll_refresh_request, "interval", seconds=refresh_poll_s, args=[sched, {}],
+                      max_instances=1, coalesce=True)
+    if backfill_h > 0 and lookback_days > 0:
+        sched.add_job(
+            run_gap_backfill, "interval", hours=backfill_h, args=[lookback_days],
+            executor="backfill", max_instances=1, coalesce=True,
+            next_run_time=datetime.now() + timedelta(minutes=1),
+        )
+    # HF modu: seçili varlıklar halkaya sık, SQLite'a toplu flush ile
+    if hf_assets:
+        ticker = HFTicker(hf_assets, get_router(timeout_s=5, settings=settings), min_change_bp=float(settings.get("hf_min_change_bp", "2")),
+                          capacity=_int_setting(settings, "hf_capacity", 4096), lease=lease)
+        sched.add_job(run_hf_tick, "interval", seconds=max(1, _int_setting(settings, "hf_interval_s", 5)), args=[ticker],
+                      executor="hf", max_instances=1, coalesce=True)
+        sched.add_job(run_hf_flush, "interval", seconds=max(1, _int_setting(settings, "hf_flush_s", 60)), args=[ticker],
+                      executor="hf", max_instances=1, coalesce=True)
+    # bakım: checkpoint/optimize sık, ANALYZE + vacuum seyrek; tek thread -> üst üste binmez
+    if maint_min > 0:
+        sched.add_job(run_db_maintenance, "interval", minutes=maint_min, args=[False, *maint_args],
+                      executor="maintenance", max_instances=1, coalesce=True)
+    if maint_full_h > 0:
+        sched.add_job(run_db_maintenance, "interval", hours=maint_full_h, args=[True, *maint_args],
+                      executor="maintenance", max_instances=1, coalesce=True,
+                      next_run_time=datetime.now() + timedelta(minutes=5))
+    return sched
 
 def main():
-    init_db(seed=False)
-    interval_min = 30
-    with SessionLocal() as db:
-        s = db.get(Setting, "update_interval_min")
-        if s:
-            try: interval_min = int(s.value)
-            except Exception: interval_min = 30
+    init_db()
+    with ReadSession() as db:
+        settings = get_settings(db)
+
+    # Tek lider: diğer örnekler sıcak yedek bekler, lider kiralaması düşünce ttl içinde devralır
+    lease = Lease("service", ttl_s=_int_setting(settings, "lease_ttl_s", 60))
+    alerts = AlertEngine()
+    dispatcher = build_dispatcher(settings)
+    state: Dict[str, BackgroundScheduler] = {}
+
+    def on_elected():
+        with ReadSession() as db:
+            current = get_settings(db)
+        logger.info(f"Service is leader (epoch {lease.epoch}); starting jobs.")
+        state["sched"] = build_scheduler(current, alerts, dispatcher, lease)
+        state["sched"].start()
+
+    def on_demoted():
+        logger.warning("Service left leader role; stopping jobs.")
+        sched = state.pop("sched", None)
+        if sched is not None:
+            sched.shutdown(wait=False)
 
-    lock = FileLock(str(Path("service.lock")))
+    logger.info(f"Service started as {lease.holder}; waiting for lease.")
+    stop = threading.Event()
     try:
-        with lock.acquire(timeout=1):
-            logger.info("Service started (lock acquired).")
-            sched = BackgroundScheduler(daemon=False)
-            sched.add_job(fetch_and_store, "interval", minutes=interval_min)
-            sched.start()
-            fetch_and_store()
-            while True:
-                time.sleep(2)
-    except Timeout:
-        logger.error("Service already running (lock busy).")
+        run_elector(lease, on_elected, on_demoted, stop)
+    except KeyboardInterrupt:
+        stop.set()
+    finally:
+        dispatcher.close()
 
 if __name__ == "__main__":
     main()
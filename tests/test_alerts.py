@@ -0,0 +1,166 @@
+import json
+import threading
+import time
+from decimal import Decimal
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+import service.run_service as run_service
+from bench.standin_server import StandInConfig, StandInServer
+from db.models import Base, Position, Price, Setting, Snapshot
+from service.alerts import AlertDispatcher, AlertEngine, FileSink, Rule, Tick, WebhookSink, parse_rules
+from utils.pnl import InventoryRow
+
+TS = "2026-10-16T10:{:02d}:00+03:00"
+
+
+def _inv(asset, qty, avg, realized="0"):
+    return InventoryRow(asset=asset, qty=Decimal(qty), avg_cost_try=Decimal(avg), realized_try=Decimal(realized))
+
+
+def test_price_rule_hysteresis_debounce_and_asset_index():
+    eng = AlertEngine([
+        Rule(id="gold", kind="price_above", asset="XAU_G", threshold=Decimal("5800"), hysteresis=Decimal("50"), debounce=2),
+    ])
+    calls = []
+    orig = eng._value
+    eng._value = lambda r, p, now: calls.append(r.id) or orig(r, p, now)
+
+    seq = ["5790", "5810", "5820", "5830", "5770", "5805", "5740", "5801", "5802"]
+    fired = []
+    for i, px in enumerate(seq):
+        fired += [(i, a["rule_id"]) for a in eng.on_tick({"XAU_G": Tick(Decimal(px))}, {}, TS.format(i))]
+    # 2. tick'te eşik aşıldı ama debounce=2 -> 3. tick'te; 5805 yeniden kurulmadan (5750 altı gerekli)
+    # tetiklemez; 5740 sonrası tekrar kurulur, 5801+5802 ile ikinci alarm
+    assert fired == [(2, "gold"), (8, "gold")]
+
+    n = len(calls)
+    eng.on_tick({"USDTRY": Tick(Decimal("41.8"))}, {}, TS.format(20))
+    eng.on_tick({"XAU_G": Tick(Decimal("5802"))}, {}, TS.format(21))  # fiyat değişmedi
+    assert len(calls) == n
+
+
+def test_total_pnl_pct_move_and_stale_rules():
+    rules = parse_rules({
+        "alert_rules": json.dumps([
+            {"id": "usd", "kind": "pct_move", "asset": "USDTRY", "threshold": "1", "window_min": 30},
+            {"id": "cu", "kind": "stale", "asset": "XCU_G", "threshold": "2"},
+        ]),
+        "pnl_alert_threshold_try": "-1000",
+    })
+    eng = AlertEngine(rules)
+    pos = {"XAU_G": _inv("XAU_G", "10", "5800", realized="200")}
+
+    assert eng.on_tick({"XAU_G": Tick(Decimal("5700")), "USDTRY": Tick(Decimal("41.00"))}, pos, TS.format(0)) == []
+    out = eng.on_tick({"XAU_G": Tick(Decimal("5600")), "USDTRY": Tick(Decimal("41.20"))}, pos, TS.format(10))
+    assert [a["rule_id"] for a in out] == ["pnl_total"]  # -2000 + 200 <= -1000
+    assert Decimal(out[0]["value"]) == Decimal("-1800")
+    out = eng.on_tick({"USDTRY": Tick(Decimal("41.50"))}, pos, TS.format(20))
+    assert [a["rule_id"] for a in out] == ["usd"]  # 41.00 -> 41.50 = %1.22
+
+    assert eng.on_tick({"XCU_G": Tick(Decimal("0.5"), is_stale=True)}, pos, TS.format(30)) == []
+    assert [a["rule_id"] for a in eng.on_tick({"XCU_G": Tick(Decimal("0.5"), is_stale=True)}, pos, TS.format(40))] == ["cu"]
+
+
+def test_dispatcher_slow_sink_does_not_block_and_webhook_reaches_standin(tmp_path, monkeypatch):
+    gate = threading.Event()
+
+    class SlowSink:
+        name = "slow"
+
+        def send(self, alert):
+            gate.wait(5)
+
+    alert = {"rule_id": "r", "kind": "price_above", "asset": "XAU_G", "value": "1", "threshold": "1", "message": "m", "ts": TS.format(0)}
+    slow = AlertDispatcher([SlowSink()], queue_size=2)
+    t0 = time.perf_counter()
+    slow.submit([alert] * 4)  # kuyruk dolu -> alarm düşer, submit beklemez
+    assert time.perf_counter() - t0 < 1
+    gate.set()
+    assert slow.flush(5)
+    assert slow.stats["slow"].dropped >= 1
+
+    with StandInServer(StandInConfig(fixture_dir=str(tmp_path))) as srv:
+        monkeypatch.setenv("HTTP_STANDIN_URL", srv.base_url)
+        d = AlertDispatcher([FileSink(str(tmp_path / "alerts.jsonl")), WebhookSink("https://hooks.example/alerts")])
+        d.submit([alert] * 3)
+        assert d.flush(5)
+        d.close()
+        assert srv.stats.webhooks[0]["payload"]["rule_id"] == "r" and len(srv.stats.webhooks) == 3
+
+    assert d.stats["webhook"].sent == 3
+    assert len((tmp_path / "alerts.jsonl").read_text(encoding="utf-8").splitlines()) == 3
+
+
+def test_webhook_does_not_retry_post_and_close_does_not_block():
+    retry = WebhookSink("https://hooks.example/alerts").session.get_adapter("https://hooks.example").max_retries
+    assert "POST" not in retry.allowed_methods
+
+    gate = threading.Event()
+
+    class StuckSink:
+        def __init__(self, name):
+            self.name = name
+
+        def send(self, alert):
+            gate.wait(5)
+
+    d = AlertDispatcher([StuckSink(f"stuck{i}") for i in range(4)], queue_size=1)
+    d.submit([{"rule_id": "r", "message": "m"}] * 3)
+    t0 = time.perf_counter()
+    d.close(timeout=0.3)  # kuyruk dolu: _STOP konamaz; 4 sink için toplam bekleme yine 0.3 sn
+    assert time.perf_counter() - t0 < 0.6
+    gate.set()
+
+
+def test_parse_rules_skips_only_the_malformed_entries():
+    rules = parse_rules({"alert_rules": json.dumps([
+        {"id": "ok", "kind": "price_above", "asset": "XAU_G", "threshold": "5800"},
+        {"id": "bad_kind", "kind": "nope", "asset": "XAU_G"},
+        {"id": "bad_num", "kind": "price_below", "asset": "XAU_G", "threshold": "abc"},
+        "not-a-dict",
+    ])})
+    assert [r.id for r in rules] == ["ok"]
+    assert parse_rules({"alert_rules": "{", "pnl_alert_threshold_try": "-10"})[0].id == "pnl_total"
+
+
+def test_service_tick_stores_bid_ask_and_dispatches_alerts(tmp_path, monkeypatch):
+    eng = create_engine(f"sqlite:///{tmp_path / 's.db'}", future=True)
+    Base.metadata.create_all(eng)
+    S = sessionmaker(bind=eng, future=True)
+    with S() as db:
+        db.add_all([
+            Setting(key="alert_rules", value=json.dumps([{"id": "g", "kind": "price_above", "asset": "XAU_G", "threshold": "5000"}])),
+            Position(asset="XAU_G", qty="1", avg_cost_try="5000", realized_try="0", version=1, last_ts=TS.format(0)),
+        ])
+        db.commit()
+    monkeypatch.setattr(run_service, "SessionLocal", S)
+    monkeypatch.setattr(run_service, "ReadSession", S)
+    monkeypatch.setattr(run_service, "get_db_path", lambda: str(tmp_path / "s.db"))
+    monkeypatch.setenv("BACKUP_DIR", str(tmp_path / "backups"))
+
+    sent = []
+
+    class ListSink:
+        name = "list"
+
+        def send(self, alert):
+            sent.append(alert)
+
+    d = AlertDispatcher([ListSink()])
+    with StandInServer(StandInConfig(fixture_dir="tests/fixtures/http")) as srv:
+        monkeypatch.setenv("HTTP_STANDIN_URL", srv.base_url)
+        run_service.fetch_and_store(AlertEngine(), d)
+    d.flush(5)
+
+    with S() as db:
+        gold = db.execute(select(Price).where(Price.asset == "XAU_G")).scalars().one()
+        cu = db.execute(select(Price).where(Price.asset == "XCU_G")).scalars().one()
+        assert (gold.price_buy, gold.price_sell, gold.is_stale) == ("5650.40", "5731.90", 0)
+        assert (cu.is_stale, cu.source) == (0, "copper_stooq+frankfurter")  # stooq USD/lb x USDTRY
+        assert db.get(Setting, "last_success_ts").value == gold.ts
+        snap = db.execute(select(Snapshot)).scalars().one()
+        assert Decimal(snap.total_value_try) == Decimal(gold.price)  # 1 gr
+        assert json.loads(snap.breakdown_json)["USDTRY"] == "41.8312"
+    assert [a["rule_id"] for a in sent] == ["g"]
@@ -0,0 +1,60 @@
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+import service.backfill as backfill
+from bench.standin_server import StandInConfig, StandInServer
+from db.models import Base, Price
+
+
+def _session_factory(tmp_path):
+    eng = create_engine(f"sqlite:///{tmp_path / 't.db'}", future=True)
+    Base.metadata.create_all(eng)
+    return sessionmaker(bind=eng, future=True)
+
+
+def test_tcmb_backfill_skips_weekends_holidays_and_existing_days(tmp_path, monkeypatch):
+    S = _session_factory(tmp_path)
+    monkeypatch.setattr(backfill, "SessionLocal", S)
+    with S() as db:
+        db.add(Price(ts="2026-10-15T15:30:00+03:00", asset="EURTRY", price="48", source="tcmb", is_stale=0))
+        db.commit()
+
+    with StandInServer(StandInConfig(fixture_dir="tests/fixtures/http")) as srv:
+        monkeypatch.setenv("HTTP_STANDIN_URL", srv.base_url)
+        # 10-12: Pzt 12, 13-14 fixture yok (404 = yayın yok), 15-16 var, 17-18 hafta sonu
+        n = backfill.backfill_tcmb(date(2026, 10, 12), date(2026, 10, 18), max_workers=4)
+        assert srv.stats.requests == 5
+
+    with S() as db:
+        rows = db.execute(select(Price).where(Price.source == "tcmb_backfill").order_by(Price.ts, Price.asset)).scalars().all()
+    assert n == 3
+    assert [(r.ts[:10], r.asset) for r in rows] == [("2026-10-15", "USDTRY"), ("2026-10-16", "EURTRY"), ("2026-10-16", "USDTRY")]
+    assert Decimal(rows[0].price) == Decimal("41.8154") and Decimal(rows[0].price_buy) == Decimal("41.7402")
+
+
+def test_gap_backfill_uses_range_endpoint_then_tcmb_for_leftovers(tmp_path, monkeypatch):
+    S = _session_factory(tmp_path)
+    monkeypatch.setattr(backfill, "SessionLocal", S)
+    with S() as db:
+        db.add(Price(ts="2026-10-07T10:00:00+03:00", asset="USDTRY", price="41.6", source="frankfurter", is_stale=0))
+        for d in ("07", "08", "09", "12", "13", "14", "16"):
+            db.add(Price(ts=f"2026-10-{d}T10:00:00+03:00", asset="EURTRY", price="48", source="frankfurter", is_stale=0))
+        db.commit()
+        gaps = backfill.detect_gaps(db, backfill.FX_ASSETS, date(2026, 10, 7), date(2026, 10, 16))
+    assert gaps["EURTRY"] == [date(2026, 10, 15)]
+    assert len(gaps["USDTRY"]) == 7
+
+    with StandInServer(StandInConfig(fixture_dir="tests/fixtures/http")) as srv:
+        monkeypatch.setenv("HTTP_STANDIN_URL", srv.base_url)
+        written = backfill.backfill_gaps(lookback_days=10, today=date(2026, 10, 17))
+        # USD: 1 range isteği, EUR: range 404; kalanlar (USD 16, EUR 15) TCMB arşivinden
+        assert srv.stats.requests == 4
+
+    assert written == {"USDTRY": 7, "EURTRY": 1}
+    with S() as db:
+        src = dict(db.execute(select(Price.source, func.count()).where(Price.source.like("%_backfill")).group_by(Price.source)).all())
+        assert src == {"frankfurter_backfill": 6, "tcmb_backfill": 2}
+        assert backfill.detect_gaps(db, backfill.FX_ASSETS, date(2026, 10, 7), date(2026, 10, 16)) == {}
@@ -0,0 +1,46 @@
+import json
+import subprocess
+import sys
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+import cli
+from db.models import Base, Position, Price
+
+
+def _db(tmp_path):
+    path = tmp_path / "cli.db"
+    eng = create_engine(f"sqlite:///{path}", future=True)
+    Base.metadata.create_all(eng)
+    with Session(eng) as db:
+        db.add_all([
+            Price(ts="2026-10-16T10:00:00+03:00", asset="XAU_G", price="5600", source="a", is_stale=0),
+            Price(ts="2026-10-16T11:00:00+03:00", asset="XAU_G", price="5700", source="b", is_stale=0),
+            Price(ts="2026-10-16T11:00:00+03:00", asset="USDTRY", price="41.8", source="b", is_stale=1),
+            Position(asset="XAU_G", qty="2", avg_cost_try="5000", realized_try="10", version=1, last_ts="2026-10-01"),
+        ])
+        db.commit()
+    eng.dispose()
+    return str(path)
+
+
+def test_quote_and_value_read_latest_prices(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("DB_PATH", _db(tmp_path))
+
+    assert cli.main(["quote", "XAU_G", "--json"]) == cli.EXIT_OK
+    (q,) = json.loads(capsys.readouterr().out)
+    assert (q["price"], q["source"]) == ("5700", "b")
+    assert cli.main(["quote", "XAU_G", "USDTRY"]) == cli.EXIT_STALE  # USDTRY stale
+    capsys.readouterr()
+
+    assert cli.main(["value", "--json"]) == cli.EXIT_OK
+    v = json.loads(capsys.readouterr().out)
+    assert v["total_value_try"] == "11400" and v["unrealized_try"] == "1400" and v["realized_try"] == "10"
+
+
+def test_quote_does_not_import_orm_or_http(tmp_path):
+    code = "import sys, cli; rc = cli.main(['quote']); print([m for m in ('sqlalchemy', 'requests', 'pandas', 'streamlit') if m in sys.modules])"
+    env = {"DB_PATH": _db(tmp_path), "PATH": ""}
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, cwd=".").stdout
+    assert out.strip().splitlines()[-1] == "[]"
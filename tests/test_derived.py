@@ -0,0 +1,99 @@
+import threading
+from decimal import Decimal
+
+from bench.standin_server import StandInConfig, StandInServer
+import pytest
+
+from providers.base import ProviderError
+from providers.copper_stooq import CopperStooqProvider
+from providers.derived import LB_TO_GRAM, Memo, QuoteGraph, Source
+from utils.http_fixtures import save_fixture
+
+
+def _q(v):
+    v = Decimal(v)
+    return {"mid": v, "bid": v, "ask": v}
+
+
+def test_router_derives_copper_from_stooq_and_usdtry(monkeypatch):
+    monkeypatch.delenv("METALS_DEV_API_KEY", raising=False)
+    from providers.router import ProviderRouter
+
+    with StandInServer(StandInConfig(fixture_dir="tests/fixtures/http")) as srv:
+        monkeypatch.setenv("HTTP_STANDIN_URL", srv.base_url)
+        quotes, sources = ProviderRouter(timeout_s=5).get_all_quotes_try(["XCU_G", "XAU_G", "USDTRY", "EURTRY"])
+        # frankfurter (USD + EUR), kapalıçarşı, stooq: USDTRY iki kez çekilmez
+        assert srv.stats.served == 4
+
+    assert quotes["XCU_G"]["mid"] == Decimal("4.9345") * Decimal("41.8312") / LB_TO_GRAM
+    assert sources["XCU_G"] == "copper_stooq+frankfurter"
+    assert sources["XAU_G"] == "kapalicarsi_apiluna"
+
+
+def test_router_honours_provider_settings(monkeypatch):
+    monkeypatch.delenv("METALS_DEV_API_KEY", raising=False)
+    from providers.router import ProviderRouter
+
+    settings = {"fx_primary": "tcmb", "fx_fallback": "frankfurter", "metals_primary": "manual", "metals_fallback": "manual"}
+    with StandInServer(StandInConfig(fixture_dir="tests/fixtures/http")) as srv:
+        monkeypatch.setenv("HTTP_STANDIN_URL", srv.base_url)
+        quotes, sources = ProviderRouter(timeout_s=5, settings=settings).get_all_quotes_try(["XAU_G", "USDTRY", "XCU_G"])
+        assert srv.stats.served == 2  # tcmb + stooq; Kapalıçarşı "manual" ile hiç çağrılmaz
+
+    assert sources == {"USDTRY": "tcmb", "XCU_G": "copper_stooq+tcmb"}
+    assert "XAU_G" not in quotes
+
+
+def test_copper_unit_is_fixed_by_symbol_and_manual_disables_stooq(tmp_path, monkeypatch):
+    from providers.router import ProviderRouter
+
+    # aynı feed cent/lb'ye geçerse (493.45) 100'e bölerek tahmin edilmez: hata
+    save_fixture(str(tmp_path), "https://stooq.com/q/l/?s=hg.f&f=sd2t2ohlcv&h&e=csv", 200, "text/csv",
+                 "Symbol,Date,Time,Open,High,Low,Close,Volume\r\nHG.F,2026-10-16,22:59:58,491.25,495.80,489.10,493.45,41235\r\n")
+    with StandInServer(StandInConfig(fixture_dir=str(tmp_path))) as srv:
+        monkeypatch.setenv("HTTP_STANDIN_URL", srv.base_url)
+        with pytest.raises(ProviderError, match="outside"):
+            CopperStooqProvider(timeout_s=5).get_usd_per_lb()
+
+    with StandInServer(StandInConfig(fixture_dir="tests/fixtures/http")) as srv:
+        monkeypatch.setenv("HTTP_STANDIN_URL", srv.base_url)
+        quotes, _ = ProviderRouter(timeout_s=5, settings={"copper_provider": "manual"}).get_all_quotes_try(["XCU_G"])
+        assert quotes == {} and srv.stats.requests == 0
+
+
+def test_graph_parallel_waves_fallback_and_memo():
+    calls = []
+    barrier = threading.Barrier(2, timeout=5)  # iki bağımsız kaynak aynı anda çalışmazsa zaman aşımı
+
+    def primary(keys):
+        calls.append(("primary", tuple(keys)))
+        barrier.wait()
+        return {"USDTRY": _q("40")}  # istenen XAU_G'yi vermiyor
+
+    def fx(keys):
+        calls.append(("fx", tuple(keys)))
+        barrier.wait()
+        return {"HG_USD_LB": _q("5")}
+
+    def ounce(keys):
+        calls.append(("ounce", tuple(keys)))
+        return {"XAU_ONS": _q("311.034768")}
+
+    memo = Memo()
+    g = QuoteGraph(memo)
+    g.add_source(Source("primary", ("XAU_G", "USDTRY"), primary))
+    g.add_source(Source("fx", ("HG_USD_LB",), fx))
+    g.add_source(Source("ounce", ("XAU_ONS",), ounce))
+    g.add_source(Source("off", ("XAU_ONS",), ounce, enabled=lambda: False))
+    g.add_formula("XCU_G", ("HG_USD_LB", "USDTRY"), lambda lb, usd: lb * usd / LB_TO_GRAM)
+    g.add_formula("XAU_G", ("XAU_ONS",), lambda ons: ons / Decimal("31.1034768"))
+
+    quotes, sources = g.resolve(["XAU_G", "XCU_G"])
+    assert sorted(calls) == [("fx", ("HG_USD_LB",)), ("ounce", ("XAU_ONS",)), ("primary", ("XAU_G", "USDTRY"))]
+    assert quotes["XAU_G"]["mid"] == Decimal("10")
+    assert sources == {"XAU_G": "ounce", "XCU_G": "fx+primary"}
+    assert memo.computed == 2
+
+    calls.clear()
+    g.resolve(["XAU_G", "XCU_G"])
+    assert len(calls) == 3 and memo.computed == 2 and memo.reused == 2  # girdiler aynı: yeniden hesap yok
@@ -0,0 +1,58 @@
+import csv
+import gzip
+import io
+
+from sqlalchemy import create_engine, insert
+
+from db.models import Base, Price, Transaction
+from utils.export import iter_export_rows, write_export
+
+
+def _engine(tmp_path):
+    eng = create_engine(f"sqlite:///{tmp_path / 'e.db'}", future=True)
+    Base.metadata.create_all(eng)
+    with eng.begin() as conn:
+        conn.execute(insert(Transaction), [
+            {"ts": f"2026-10-{d:02d}T10:00:00+03:00", "asset": "XAU_G" if d % 2 else "USDTRY", "side": "BUY",
+             "qty": "1.5", "unit_price": "5230.25", "fee": "0", "currency": "TRY", "note": f"n{d}"}
+            for d in range(1, 11)
+        ])
+        conn.execute(insert(Price), [
+            {"ts": "2026-10-01T10:00:00+03:00", "asset": "XAU_G", "price": "5230.5", "price_buy": None,
+             "price_sell": None, "currency": "TRY", "source": "s", "is_stale": 0, "error_msg": None},
+        ])
+    return eng
+
+
+def _rows(data: bytes, delimiter: str = ","):
+    return list(csv.reader(io.StringIO(data.decode("utf-8-sig")), delimiter=delimiter))
+
+
+def test_excel_dialect_gzip_and_filters(tmp_path):
+    eng = _engine(tmp_path)
+
+    out = io.BytesIO()
+    n = write_export(out, eng, "transactions", fmt="excel", compress=True, asset="XAU_G",
+                     start="2026-10-03", end="2026-10-08")
+    raw = gzip.decompress(out.getvalue())
+    assert raw.startswith(b"\xef\xbb\xbf")  # BOM: Excel UTF-8'i tanır
+    rows = _rows(raw, ";")
+    assert rows[0][:3] == ["id", "ts", "asset"]
+    # yalnız XAU_G (tek günler) ve [03, 08) aralığı: 3, 5, 7
+    assert n == 3 and [r[0] for r in rows[1:]] == ["3", "5", "7"]
+    assert rows[1][4:7] == ["1,5", "5230,25", "0"] and rows[1][8] == "n3"  # ondalık virgül, not kolonu dokunulmaz
+
+    out = io.BytesIO()
+    write_export(out, eng, "prices")
+    rows = _rows(out.getvalue())
+    assert rows[1][3] == "5230.5" and rows[1][4] == ""  # csv: nokta kalır, NULL boş hücre
+
+
+def test_rows_stream_in_multiple_batches_in_id_order(tmp_path):
+    eng = _engine(tmp_path)
+    rows = list(iter_export_rows(eng, "transactions", chunk_size=3))  # 10 satır -> 4 parça
+    assert [r[0] for r in rows] == list(range(1, 11))
+
+    out = io.BytesIO()
+    assert write_export(out, eng, "transactions", chunk_size=3) == 10
+    assert len(_rows(out.getvalue())) == 11
@@ -0,0 +1,26 @@
+from decimal import Decimal
+
+import numpy as np
+
+from utils.fx_matrix import TRY, cross_rates, rebase_series
+
+
+def test_cross_rate_matrix_and_conversion():
+    prices = {"USDTRY": Decimal("40"), "EURTRY": Decimal("50"), "XAU_G": Decimal("4000"), "XCU_G": None}
+    r = cross_rates(prices)
+    assert r is cross_rates(dict(prices))  # aynı tick -> önbellek
+
+    assert r.rate("EURTRY", "USDTRY") == 1.25
+    assert r.rate("XAU_G", "EURTRY") == 80.0
+    assert r.rate(TRY, "USDTRY") == 1 / 40
+    assert np.allclose(np.diag(r.matrix)[np.isfinite(r.try_prices)], 1.0)
+    assert r.has("EURTRY") and r.has(TRY) and not r.has("XCU_G")
+
+    vals = np.array([[4000.0, 8000.0], [-400.0, 0.0]])
+    assert np.allclose(r.convert(vals, "XAU_G"), [[1.0, 2.0], [-0.1, 0.0]])
+    assert r.convert(4000, TRY) == 4000
+
+
+def test_rebase_series_uses_each_points_own_rate():
+    out = rebase_series(np.array([4000.0, 4400.0, 5000.0]), np.array([40.0, 44.0, float("nan")]))
+    assert out[:2].tolist() == [100.0, 100.0] and np.isnan(out[2])
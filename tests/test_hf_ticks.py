@@ -0,0 +1,54 @@
+from decimal import Decimal
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from db.models import Base, Price
+from service.hf_ticks import HFTicker
+from utils.tick_ring import TickRing
+
+
+class SeqRouter:
+    def __init__(self, mids):
+        self.mids = iter(mids)
+
+    def get_all_quotes_try(self, assets, manual_prices=None):
+        m = Decimal(next(self.mids))
+        return {"XAU_G": {"mid": m, "bid": m - 1, "ask": m + 1}}, {"XAU_G": "kapalicarsi_apiluna"}
+
+
+def test_ring_wraps_and_reader_sees_latest(tmp_path):
+    path = str(tmp_path / "r.ticks")
+    w = TickRing.open_writer(["XAU_G", "USDTRY"], capacity=8, path=path)
+    for i in range(20):
+        w.append("XAU_G", float(i), 100.0 + i, 99.0 + i, 101.0 + i)
+    ticks, n = w.since("XAU_G", 15)
+    assert n == 20 and list(ticks["t"]) == [15, 16, 17, 18, 19]
+    r = TickRing.open_reader(["XAU_G", "USDTRY"], path=path)
+    # en eski slot yazılmakta olan tick'e ayrıldığı için capacity - 1 tick görünür
+    assert list(r.since("XAU_G")[0]["t"]) == list(range(13, 20))
+    assert list(r.window("XAU_G", 2.0)["mid"]) == [117.0, 118.0, 119.0]
+    assert r.count("USDTRY") == 0
+    assert TickRing.open_reader(["XAU_G"], path=path) is None  # farklı varlık düzeni
+
+
+def test_flush_writes_only_meaningful_moves_in_one_batch(tmp_path):
+    eng = create_engine(f"sqlite:///{tmp_path / 'hf.db'}", future=True)
+    Base.metadata.create_all(eng)
+    S = sessionmaker(bind=eng, future=True)
+    ring = TickRing.open_writer(["XAU_G"], capacity=64, path=str(tmp_path / "hf.ticks"))
+    # 10 bp eşiği: 5000 -> 5004 (8 bp) atlanır, 5006 (12 bp) yazılır, 5006.5 atlanır
+    hf = HFTicker(["XAU_G"], SeqRouter(["5000", "5004", "5006", "5006.5", "4990"]), ring=ring,
+                  min_change_bp=10, session_factory=S)
+    for i in range(3):
+        hf.tick(now=1_760_000_000 + 5 * i)
+    assert hf.flush() == 2
+    for i in range(3, 5):
+        hf.tick(now=1_760_000_000 + 5 * i)
+    assert hf.flush() == 1
+    assert hf.flush() == 0
+    with S() as db:
+        rows = db.execute(select(Price).order_by(Price.id)).scalars().all()
+    assert [r.price for r in rows] == ["5000.0", "5006.0", "4990.0"]
+    assert (rows[0].price_buy, rows[0].source, rows[0].ts) == ("4999.0", "kapalicarsi_apiluna", "2025-10-09T11:53:20+03:00")
+    assert hf.stats == {"ticks": 5, "rows": 3, "flushes": 3, "commits": 2}
@@ -0,0 +1,71 @@
+from decimal import Decimal
+
+from bench.standin_server import StandInConfig, StandInServer
+from utils.http_fixtures import fixture_relpath_for_url, public_url
+
+
+def test_replay_providers_via_standin(monkeypatch):
+    from providers.fx_frankfurter import FrankfurterFXProvider
+    from providers.metals_kapalicarsi_apiluna import SUPPORTED, KapaliCarsiApilunaProvider
+
+    with StandInServer(StandInConfig(fixture_dir="tests/fixtures/http")) as srv:
+        monkeypatch.setenv("HTTP_STANDIN_URL", srv.base_url)
+        fx = FrankfurterFXProvider(timeout_s=5).get_prices_try(["USDTRY", "EURTRY"])
+        met = KapaliCarsiApilunaProvider(timeout_s=5).get_quotes_try(sorted(SUPPORTED))
+        assert srv.stats.served == 3
+
+    assert fx["USDTRY"] == Decimal("41.8312")
+    assert set(met) == SUPPORTED
+    assert met["XAU_CEYREK"]["bid"] == Decimal("9231.00") and met["XAU_CEYREK"]["ask"] == Decimal("9412.00")
+    assert met["XAU_G"]["mid"] == (Decimal("5650.40") + Decimal("5731.90")) / 2
+
+
+def test_kapalicarsi_parity_items_are_not_fx():
+    from providers.metals_kapalicarsi_apiluna import parse_index
+
+    items = [
+        {"kod": "EURUSD", "name": "EUR/USD", "alis": "1,1610", "satis": "1,1625"},
+        {"kod": "USDJPY", "name": "Dolar/Yen", "alis": "150,10", "satis": "150,20"},
+        {"kod": "USDTRY", "name": "Dolar", "alis": "41,7850", "satis": "41,8720"},
+        {"kod": "EURTRY", "name": "Euro", "alis": "48,6420", "satis": "48,7810"},
+        {"kod": "ONS", "name": "Ons Altın", "alis": "4.241,50", "satis": "4.243,10"},
+    ]
+    idx = parse_index(items)
+    assert idx["USDTRY"] == (Decimal("41.7850"), Decimal("41.8720"))
+    assert idx["EURTRY"] == (Decimal("48.6420"), Decimal("48.7810"))
+    usd = (Decimal("41.7850") + Decimal("41.8720")) / 2
+    assert idx["XAU_ONS"] == (Decimal("4241.50") * usd, Decimal("4243.10") * usd)
+
+
+def test_kapalicarsi_plain_codes_and_other_dollars():
+    from providers.metals_kapalicarsi_apiluna import parse_index
+
+    items = [
+        {"kod": "CAD", "name": "Kanada Doları", "alis": "30,10", "satis": "30,20"},
+        {"kod": "", "name": "Avustralya Doları", "alis": "27,10", "satis": "27,20"},
+        {"kod": "USD", "name": "Dolar", "alis": "41,7850", "satis": "41,8720"},
+        {"kod": "EUR", "name": "Euro", "alis": "48,6420", "satis": "48,7810"},
+        {"kod": "ONS", "name": "Ons Altın", "alis": "4.241,50", "satis": "4.243,10"},
+    ]
+    idx = parse_index(items)
+    assert idx["USDTRY"] == (Decimal("41.7850"), Decimal("41.8720"))
+    assert idx["EURTRY"] == (Decimal("48.6420"), Decimal("48.7810"))
+    assert idx["XAU_ONS"][0] == Decimal("4241.50") * (Decimal("41.7850") + Decimal("41.8720")) / 2
+
+
+def test_kapalicarsi_numeric_json_feed_is_read_as_is():
+    from providers.metals_kapalicarsi_apiluna import parse_index
+
+    idx = parse_index([
+        {"kod": "USDTRY", "name": "Dolar", "alis": 41.785, "satis": 41.872},
+        {"kod": "ONS", "name": "Ons Altın", "alis": 4241.5, "satis": "4.243,10"},
+    ])
+    assert idx["USDTRY"] == (Decimal("41.785"), Decimal("41.872"))
+    assert idx["XAU_ONS_USD"] == (Decimal("4241.5"), Decimal("4243.10"))
+
+
+def test_fixture_key_ignores_secrets_and_param_order():
+    a = "https://metals.dev/api/latest?api_key=SECRET&base=TRY&symbols=XAU"
+    b = "https://metals.dev/api/latest?symbols=XAU&base=TRY&api_key=OTHER"
+    assert fixture_relpath_for_url(a) == fixture_relpath_for_url(b)
+    assert "SECRET" not in public_url(a)
@@ -0,0 +1,44 @@
+from bench.standin_server import StandInConfig, StandInServer
+from providers.router import get_router
+from utils.http import http_stats, shared_session
+
+ASSETS = ["XCU_G", "XAU_G", "USDTRY", "EURTRY"]
+
+
+def test_router_and_sessions_are_reused_until_settings_change(monkeypatch):
+    monkeypatch.delenv("METALS_DEV_API_KEY", raising=False)
+    monkeypatch.setenv("HTTP_STANDIN_URL", "http://127.0.0.1:9")
+    router = get_router(timeout_s=5)
+    assert get_router(timeout_s=5) is router
+    assert get_router(timeout_s=5, settings={"fx_primary": "frankfurter", "alert_rules": "[]"}) is router  # ilgisiz ayar
+    fx = router.fx[0]
+    assert fx.session is router.metals.session is router.copper.session is shared_session(timeout_s=5)
+    assert router.metals_fallback.session is not fx.session  # retry'sız politika: ayrı havuz
+
+    by_settings = get_router(timeout_s=5, settings={"fx_primary": "tcmb", "fx_fallback": "frankfurter"})
+    assert by_settings is not router and [p.name for p in by_settings.fx] == ["tcmb", "frankfurter"]
+
+    monkeypatch.setenv("METALS_DEV_API_KEY", "k")
+    rebuilt = get_router(timeout_s=5)
+    assert rebuilt is not router and rebuilt.metals_fallback.api_key == "k"
+    assert rebuilt.fx[0].session is fx.session  # yönlendirme aynı: havuz korunur
+
+
+def test_second_tick_reuses_keep_alive_connections(monkeypatch):
+    monkeypatch.delenv("METALS_DEV_API_KEY", raising=False)
+    with StandInServer(StandInConfig(fixture_dir="tests/fixtures/http")) as srv:
+        monkeypatch.setenv("HTTP_STANDIN_URL", srv.base_url)
+        s0 = http_stats()
+        quotes, _ = get_router(timeout_s=5).get_all_quotes_try(ASSETS)
+        conns, reqs = srv.stats.connections, srv.stats.requests
+        s1 = http_stats()
+        quotes2, _ = get_router(timeout_s=5).get_all_quotes_try(ASSETS)
+        s2 = http_stats()
+        assert quotes == quotes2
+        assert 1 <= conns <= 3 and srv.stats.requests - reqs == 4
+        # ikinci tick: sunucuya yeni bağlantı gelmez, 4 isteğin hepsi canlı bağlantılardan
+        assert srv.stats.connections == conns
+
+    # sayaçlar süreç geneli (başka thread'lerin istekleri de girebilir): en az bu tick'in payı
+    assert s1["new_connections"] - s0["new_connections"] >= conns
+    assert s2["reused"] - s1["reused"] >= 4
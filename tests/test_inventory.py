@@ -1,16 +1,14 @@
 from decimal import Decimal
-import pandas as pd
-from app import compute_inventory_and_pnl
+from utils.pnl import compute_inventory_wavg
 
 def test_stock_block_sell():
-    tx = pd.DataFrame([{"asset":"XAU_G","side":"BUY","qty":"10","unit_price":"2000","fee":"0"}])
-    prices = {"XAU_G": Decimal("2100")}
-    df = compute_inventory_and_pnl(tx, prices)
-    assert df[df["asset"]=="XAU_G"]["qty"].iloc[0] == Decimal("10")
+    tx = [{"asset":"XAU_G","side":"BUY","qty":"10","unit_price":"2000","fee":"0"}]
+    inv = compute_inventory_wavg(tx)
+    assert inv["XAU_G"].qty == Decimal("10")
 
-    tx2 = pd.concat([tx, pd.DataFrame([{"asset":"XAU_G","side":"SELL","qty":"11","unit_price":"2100","fee":"0"}])], ignore_index=True)
+    tx2 = tx + [{"asset":"XAU_G","side":"SELL","qty":"11","unit_price":"2100","fee":"0"}]
     try:
-        compute_inventory_and_pnl(tx2, prices)
+        compute_inventory_wavg(tx2)
         assert False
     except ValueError:
         assert True
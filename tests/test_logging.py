@@ -0,0 +1,35 @@
+import json
+import threading
+
+from utils.log_ring import LogRing, encode
+from utils.logging import flush_logging, log_context, setup_logging, tail
+
+
+def test_queue_pipeline_writes_jsonl_and_ring(tmp_path):
+    log = setup_logging("test_pipeline", str(tmp_path))
+    with log_context(tick_id="t1"):
+        log.info("tick %s", "ok", extra={"provider": "p", "latency_ms": 12.5, "assets": 3})
+        # worker thread'leri context'i kendiliğinden almaz
+        th = threading.Thread(target=log.warning, args=("no context",))
+        th.start(); th.join()
+    flush_logging()
+
+    lines = [json.loads(x) for x in (tmp_path / "test_pipeline.jsonl").read_text(encoding="utf-8").splitlines()]
+    assert lines[0]["msg"] == "tick ok" and lines[0]["tick_id"] == "t1"
+    assert (lines[0]["provider"], lines[0]["latency_ms"], lines[0]["assets"]) == ("p", 12.5, 3)
+    assert "tick_id" not in lines[1]
+    assert [r["msg"] for r in tail(10, log_dir=str(tmp_path))] == ["tick ok", "no context"]
+    assert [r["msg"] for r in tail(10, min_level="WARNING", log_dir=str(tmp_path))] == ["no context"]
+
+
+def test_ring_wraps_and_skips_torn_slots(tmp_path):
+    path = str(tmp_path / "ring.bin")
+    with LogRing.open(path, write=True, n_slots=4, slot_size=128) as ring:
+        ring.append([encode({"msg": str(i)}, limit=116) for i in range(6)])
+        assert [r["msg"] for r in ring.tail(10)] == ["2", "3", "4", "5"]
+        ring._mm[64:72] = b"\0" * 8  # slot 0 (kayıt 4) yazılıyor gibi
+        reader = LogRing.open(path)
+        assert [r["msg"] for r in reader.tail(3)] == ["3", "5"]
+        reader.close()
+    long = encode({"ts": "x", "level": "INFO", "logger": "l", "msg": "ğ" * 500}, limit=116)
+    assert len(long) <= 116 and json.loads(long)["msg"].endswith("…")
@@ -0,0 +1,42 @@
+import math
+
+import numpy as np
+
+from utils.lttb import lttb, lttb_indices
+
+
+def _reference(data, threshold):
+    """Steinarsson'un orijinal (döngülü) LTTB'si."""
+    n = len(data)
+    every = (n - 2) / (threshold - 2)
+    a, out = 0, [0]
+    for i in range(threshold - 2):
+        s, e = int(math.floor((i + 1) * every)) + 1, min(int(math.floor((i + 2) * every)) + 1, n)
+        avg_x = sum(p[0] for p in data[s:e]) / (e - s)
+        avg_y = sum(p[1] for p in data[s:e]) / (e - s)
+        lo, hi = int(math.floor(i * every)) + 1, int(math.floor((i + 1) * every)) + 1
+        best, best_area = lo, -1.0
+        for j in range(lo, hi):
+            area = abs((data[a][0] - avg_x) * (data[j][1] - data[a][1]) - (data[a][0] - data[j][0]) * (avg_y - data[a][1]))
+            if area > best_area:
+                best, best_area = j, area
+        out.append(best)
+        a = best
+    out.append(n - 1)
+    return out
+
+
+def test_matches_reference_and_keeps_extremes():
+    rng = np.random.default_rng(0)
+    x = np.cumsum(rng.uniform(1, 60, 5000))            # düzensiz zaman aralıkları
+    y = np.cumsum(rng.normal(0, 1, 5000))
+    y[3210] += 500                                      # tek noktalık sıçrama
+    for n_out in (3, 17, 400, 1000):
+        idx = lttb_indices(x, y, n_out)
+        assert idx.tolist() == _reference(list(zip(x.tolist(), y.tolist())), n_out)
+        assert len(idx) == n_out and idx[0] == 0 and idx[-1] == len(x) - 1 and np.all(np.diff(idx) > 0)
+    assert 3210 in lttb_indices(x, y, 100)
+
+    sx, sy = lttb(x, y, 1000)
+    assert len(sx) == len(sy) == 1000 and sy.max() == y.max()
+    assert len(lttb_indices(x[:50], y[:50], 200)) == 50  # zaten küçük: dokunma
@@ -0,0 +1,55 @@
+import sqlite3
+
+from db.maintenance import PROFILES, apply_profile, run_maintenance
+
+
+def _fill(con, n, blob=2000):
+    con.execute("BEGIN")
+    con.executemany("INSERT INTO t (v) VALUES (?)", [("x" * blob,) for _ in range(n)])
+    con.execute("COMMIT")
+
+
+def test_checkpoint_waits_for_reader_then_truncates_and_full_run_vacuums(tmp_path):
+    path = str(tmp_path / "m.db")
+    w = sqlite3.connect(path, isolation_level=None)
+    w.execute("PRAGMA journal_mode=WAL")
+    w.execute("PRAGMA wal_autocheckpoint=0")  # otomatik checkpoint'i kapat: WAL yalnız büyüsün
+    w.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, v TEXT)")
+    _fill(w, 10)
+
+    reader = sqlite3.connect(path, isolation_level=None)
+    reader.execute("BEGIN")
+    reader.execute("SELECT COUNT(*) FROM t").fetchone()  # açık okuma transaction'ı (UI rerun'ı)
+    _fill(w, 500)
+
+    r = run_maintenance(path, wal_threshold_mb=0.5)
+    assert r["checkpoint"]["mode"] == "PASSIVE" and r["checkpoint"]["checkpointed"] < r["checkpoint"]["wal_frames"]
+    assert r["after"]["wal"] >= r["before"]["wal"] > 0
+
+    reader.execute("COMMIT")
+    reader.close()
+    r = run_maintenance(path, wal_threshold_mb=0.5)
+    assert r["checkpoint"]["mode"] == "TRUNCATE" and r["checkpoint"]["busy"] == 0
+    assert r["after"]["wal"] == 0 and r["duration_ms"] >= 0
+
+    assert run_maintenance(path, wal_threshold_mb=0.5)["checkpoint"]["mode"] is None  # eşik altı: dokunma
+
+    w.execute("DELETE FROM t WHERE id > 20")
+    r = run_maintenance(path, full=True, vacuum_free_mb=0.1)
+    assert r["vacuum"] == "full" and r["after"]["db"] < r["before"]["db"] / 2
+    with sqlite3.connect(path) as c:
+        assert c.execute("PRAGMA auto_vacuum").fetchone()[0] == 2  # artık INCREMENTAL
+
+    _fill(w, 300)
+    w.execute("DELETE FROM t WHERE id > 20")
+    assert run_maintenance(path, full=True, vacuum_free_mb=0.1)["vacuum"] == "incremental"
+    assert w.execute("PRAGMA freelist_count").fetchone()[0] == 0
+    w.close()
+
+
+def test_profiles_set_connection_pragmas(tmp_path):
+    con = sqlite3.connect(str(tmp_path / "p.db"))
+    apply_profile(con, "fast")
+    assert con.execute("PRAGMA cache_size").fetchone()[0] == PROFILES["fast"]["cache_size"]
+    assert con.execute("PRAGMA mmap_size").fetchone()[0] == PROFILES["fast"]["mmap_size"]
+    con.close()
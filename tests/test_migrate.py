@@ -0,0 +1,41 @@
+import sqlite3
+
+from sqlalchemy import create_engine, text
+
+import db.init_db as init_mod
+from db.migrate import SCHEMA_VERSION
+
+
+def test_legacy_db_is_migrated_once_and_bootstrap_runs_once(tmp_path, monkeypatch):
+    path = tmp_path / "legacy.db"
+    con = sqlite3.connect(path)
+    con.execute("CREATE TABLE prices (id INTEGER PRIMARY KEY, ts TEXT, asset TEXT, price TEXT, currency TEXT, source TEXT, is_stale INTEGER, error_msg TEXT)")
+    con.execute("CREATE TABLE settings (key TEXT PRIMARY KEY, value TEXT)")
+    con.execute("INSERT INTO settings VALUES ('update_interval_min', '5')")
+    # eski, hiç okunmayan sağlayıcı varsayılanları
+    con.executemany("INSERT INTO settings VALUES (?, ?)",
+                    [("fx_primary", "exchangerate_host"), ("fx_fallback", "frankfurter"), ("metals_fallback", "manual"), ("copper_provider", "kitco")])
+    con.commit()
+    con.close()
+
+    eng = create_engine(f"sqlite:///{path}", future=True)
+    monkeypatch.setattr(init_mod, "engine", eng)
+    monkeypatch.setattr(init_mod, "_bootstrapped", set())
+
+    assert init_mod.bootstrap() is True
+    assert init_mod.bootstrap() is False
+
+    with eng.connect() as c:
+        cols = {r[1] for r in c.exec_driver_sql("PRAGMA table_info(prices)")}
+        assert {"price_buy", "price_sell"} <= cols
+        assert c.execute(text("SELECT MAX(version), COUNT(*) FROM schema_version")).one() == (SCHEMA_VERSION, SCHEMA_VERSION)
+        settings = dict(c.execute(text("SELECT key, value FROM settings")).all())
+    assert settings["update_interval_min"] == "5"  # mevcut değer ezilmez
+    # yalnız kaldırılan sağlayıcı taşınır; diğer seçimler kullanıcının olabilir
+    assert (settings["fx_primary"], settings["fx_fallback"], settings["metals_fallback"]) == ("exchangerate_host", "frankfurter", "manual")
+    assert settings["copper_provider"] == "copper_stooq"
+    assert set(init_mod.DEFAULT_SETTINGS) <= set(settings)
+
+    init_mod.init_db()  # şema güncel: migration tekrar yazılmaz
+    with eng.connect() as c:
+        assert c.execute(text("SELECT COUNT(*) FROM schema_version")).scalar() == SCHEMA_VERSION
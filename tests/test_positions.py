@@ -0,0 +1,60 @@
+import threading
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from db.models import Base, Position, Transaction
+from db.positions import PositionConflict, rebuild_positions, record_tx
+
+
+def _sessions(tmp_path):
+    eng = create_engine(f"sqlite:///{tmp_path / 't.db'}", future=True, connect_args={"check_same_thread": False, "timeout": 10})
+    Base.metadata.create_all(eng)
+    return sessionmaker(bind=eng, future=True)
+
+
+def test_record_tx_blocks_oversell_against_position_row(tmp_path):
+    S = _sessions(tmp_path)
+    with S() as db:
+        record_tx(db, "XAU_G", "BUY", Decimal("10"), Decimal("2000"), Decimal("0"))
+        record_tx(db, "XAU_G", "SELL", Decimal("4"), Decimal("2100"), Decimal("0"))
+        with pytest.raises(ValueError):
+            record_tx(db, "XAU_G", "SELL", Decimal("7"), Decimal("2100"), Decimal("0"))
+        pos = db.get(Position, "XAU_G")
+        assert (Decimal(pos.qty), Decimal(pos.realized_try), pos.version) == (Decimal("6"), Decimal("400"), 2)
+
+        # backdated insert -> defter yeniden oynatılır
+        record_tx(db, "XAU_G", "BUY", Decimal("1"), Decimal("1000"), Decimal("0"), ts="2000-01-01T00:00:00+03:00")
+        db.expire_all()
+        assert Decimal(db.get(Position, "XAU_G").qty) == Decimal("7")
+
+
+def test_concurrent_sells_never_oversell(tmp_path):
+    S = _sessions(tmp_path)
+    with S() as db:
+        record_tx(db, "XAU_G", "BUY", Decimal("10"), Decimal("1"), Decimal("0"))
+
+    outcomes = []
+
+    def sell():
+        with S() as db:
+            try:
+                record_tx(db, "XAU_G", "SELL", Decimal("3"), Decimal("1"), Decimal("0"), retries=10)
+                outcomes.append("ok")
+            except (ValueError, PositionConflict) as e:
+                outcomes.append(type(e).__name__)
+
+    threads = [threading.Thread(target=sell) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    with S() as db:
+        sells = db.execute(select(Transaction).where(Transaction.side == "SELL")).scalars().all()
+        pos = db.get(Position, "XAU_G")
+        assert outcomes.count("ok") == len(sells) == 3
+        assert Decimal(pos.qty) == Decimal("1")
+        assert rebuild_positions(db)["XAU_G"].qty == Decimal("1")
@@ -0,0 +1,72 @@
+import multiprocessing as mp
+import time
+
+from utils.assets import ASSETS
+from utils.quote_board import QuoteBoard, publish_rows, read_board
+
+
+def _row(i, stale=0):
+    return {"price": str(i), "price_buy": str(i), "price_sell": str(i), "ts": f"t{i}", "source": f"s{i}", "is_stale": stale}
+
+
+def test_publish_read_partial_update_and_create_flag(tmp_path):
+    path = str(tmp_path / "q.board")
+    publish_rows({"XAU_G": _row(5691.15), "USDTRY": _row(41.8312)}, path, create=False)
+    assert QuoteBoard.open_reader(path) is None  # create=False eksik pano kurmaz
+
+    publish_rows({"XAU_G": _row(5691.15), "USDTRY": _row(41.8312)}, path)
+    publish_rows({"USDTRY": _row(41.9, stale=1)}, path, create=False)
+    rows = read_board(60, path)
+    assert set(rows) == {"XAU_G", "USDTRY"}
+    assert rows["XAU_G"]["price"] == "5691.15" and rows["XAU_G"]["source"] == "s5691.15"
+    assert (rows["USDTRY"]["price"], rows["USDTRY"]["is_stale"]) == ("41.9", 1)
+
+    with QuoteBoard.open_reader(path) as b:
+        assert b.read()["tick_seq"] == 2
+    assert read_board(-1, path) is None  # eski pano -> SQLite'a düşülür
+
+    with open(path, "r+b") as f:  # farklı varlık listesiyle yazılmış pano
+        f.seek(8)
+        f.write(b"\0\0\0\0")
+    assert QuoteBoard.open_reader(path) is None
+
+
+def _writer(path, n):
+    with QuoteBoard.open_writer(path) as b:
+        for i in range(1, n + 1):
+            b.publish({a: _row(i) for a in ASSETS})
+
+
+def test_seqlock_reader_never_sees_torn_snapshot(tmp_path):
+    path = str(tmp_path / "q.board")
+    publish_rows({a: _row(0) for a in ASSETS}, path)
+    p = mp.get_context("spawn").Process(target=_writer, args=(path, 3000))
+    p.start()
+    reads = torn = 0
+    with QuoteBoard.open_reader(path) as b:
+        deadline = time.time() + 30
+        while p.is_alive() and time.time() < deadline:
+            snap = b.read()
+            if snap is None:
+                continue
+            vals = {(r["price"], r["ts"]) for r in snap["rows"].values()}
+            torn += len(vals) != 1
+            reads += 1
+    p.join(10)
+    assert p.exitcode == 0 and reads > 0 and torn == 0
+    assert read_board(60, path)["EURTRY"]["price"] == "3000"
+
+
+def test_prices_round_trip_as_exact_decimal_strings(tmp_path):
+    path = str(tmp_path / "q.board")
+    exact = "5691.1234567890123456789"  # float64 bu basamakları kaybeder
+    publish_rows({"XAU_G": {**_row(1), "price": exact, "price_buy": None}}, path)
+    row = read_board(60, path)["XAU_G"]
+    assert (row["price"], row["price_buy"], row["price_sell"]) == (exact, None, "1")
+
+    try:
+        publish_rows({"XAU_G": {**_row(1), "price": "1" * 41}}, path)
+        assert False
+    except ValueError:
+        pass
+    assert read_board(60, path)["XAU_G"]["price"] == exact  # sığmayan fiyat panoyu bozmaz
@@ -0,0 +1,93 @@
+import multiprocessing as mp
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from bench.standin_server import StandInConfig, StandInServer
+from db.models import Base, RateLimit
+from db.session import make_read_engine, make_write_engine
+from providers.base import ProviderError
+from providers.metals_metalsdev import MetalsDevProvider
+from utils.rate_limit import Quota, RateLimiter
+from utils.time import TR_TZ
+
+# ayın son günü 00:00 (TR): dönem sonuna tam 1 gün var
+T0 = datetime(2026, 10, 31, tzinfo=TR_TZ).timestamp()
+
+
+def _engine(path):
+    eng = create_engine(f"sqlite:///{path}", future=True)
+    Base.metadata.create_all(eng)
+    return eng
+
+
+def test_budget_is_paced_over_the_period_and_never_exceeded(tmp_path):
+    lim = RateLimiter("p", Quota(monthly=10, burst=2), _engine(tmp_path / "r.db"))
+    assert lim.try_acquire(T0) and lim.try_acquire(T0)
+    assert not lim.try_acquire(T0)  # burst bitti
+    st = lim.status(T0)
+    assert st["month_used"] == 2
+    assert st["interval_s"] == pytest.approx(86400 / 8)  # kalan 8 istek / kalan 1 gün
+    assert lim.try_acquire(T0 + st["next_in_s"] + 1)
+
+    # ay sonuna kadar dakikada bir dene: toplam kota aşılmaz, bütçe de boşa kalmaz
+    ok = 3 + sum(lim.try_acquire(T0 + 86400 / 8 + 1 + 60 * i) for i in range(1, 1440 - 190))
+    assert 9 <= ok <= 10
+    assert lim.status(T0 + 86399)["month_used"] == ok
+
+    assert lim.try_acquire(T0 + 86400)  # yeni ay: sayaç sıfırlanır
+    assert lim.status(T0 + 86400)["month_used"] == 1
+
+
+def test_daily_quota_and_retry_after_block(tmp_path):
+    lim = RateLimiter("p", Quota(monthly=1000, daily=1, burst=5), _engine(tmp_path / "r.db"))
+    assert lim.try_acquire(T0)
+    assert not lim.try_acquire(T0 + 3600)
+    assert lim.status(T0 + 3600)["next_in_s"] == pytest.approx(86400 - 3600)
+
+    lim.block(600, T0 + 86400)
+    assert not lim.try_acquire(T0 + 86400 + 599)
+    assert lim.try_acquire(T0 + 86400 + 601 + lim.status(T0 + 86400 + 601)["next_in_s"])
+
+
+def test_status_reads_while_a_writer_holds_the_lock(tmp_path):
+    path = str(tmp_path / "r.db")
+    w = make_write_engine(path)
+    Base.metadata.create_all(w)
+    lim = RateLimiter("p", Quota(monthly=10, burst=2), w, read_engine=make_read_engine(path))
+    assert lim.try_acquire(T0)
+    with w.begin():  # servis tick'i: BEGIN IMMEDIATE
+        assert lim.status(T0)["month_used"] == 1
+
+
+def _hammer(args):
+    path, n = args
+    eng = create_engine(f"sqlite:///{path}", future=True, connect_args={"timeout": 30})
+    lim = RateLimiter("shared", Quota(monthly=7, burst=50), eng)
+    return sum(lim.try_acquire(T0) for _ in range(n))
+
+
+def test_quota_is_shared_across_processes(tmp_path):
+    path = tmp_path / "r.db"
+    _engine(path)
+    with mp.get_context("spawn").Pool(4) as pool:
+        got = pool.map(_hammer, [(str(path), 10)] * 4)
+    assert sum(got) == 7
+    with Session(_engine(path)) as db:
+        assert db.execute(select(RateLimit.month_count)).scalar_one() == 7
+
+
+def test_metals_dev_429_blocks_further_calls(tmp_path, monkeypatch):
+    monkeypatch.setenv("METALS_DEV_API_KEY", "k")
+    lim = RateLimiter("metals_dev", Quota(monthly=100, burst=5), _engine(tmp_path / "r.db"))
+    with StandInServer(StandInConfig(fixture_dir="tests/fixtures/http", error_rate=1.0, error_status=429)) as srv:
+        monkeypatch.setenv("HTTP_STANDIN_URL", srv.base_url)
+        p = MetalsDevProvider(limiter=lim)
+        with pytest.raises(ProviderError, match="429"):
+            p.get_prices_try(["XAU_G"])
+        with pytest.raises(ProviderError, match="quota"):
+            p.get_prices_try(["XAU_G"])
+        assert srv.stats.requests == 1  # ne urllib3 retry'ı ne de ikinci çağrı upstream'e gitti
+    assert lim.status()["next_in_s"] > 3000
@@ -0,0 +1,56 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from db.models import Base, ServiceLease, Setting
+from service import run_service
+from service.refresh import REQUEST_KEY, TICK_KEY, refresh_pending, request_refresh, service_alive
+
+
+class FakeScheduler:
+    def __init__(self):
+        self.modified = []
+
+    def modify_job(self, job_id, **kw):
+        self.modified.append(job_id)
+
+
+def test_poll_triggers_fetch_once_per_pending_request(tmp_path, monkeypatch):
+    eng = create_engine(f"sqlite:///{tmp_path / 'r.db'}", future=True)
+    Base.metadata.create_all(eng)
+    S = sessionmaker(bind=eng, future=True)
+    monkeypatch.setattr(run_service, "ReadSession", S)
+    sched, handled = FakeScheduler(), {}
+
+    with S() as db:
+        db.add(Setting(key=TICK_KEY, value="2026-10-19T10:00:00+03:00"))
+        req = request_refresh(db)
+        db.commit()
+    run_service.poll_refresh_request(sched, handled)
+    run_service.poll_refresh_request(sched, handled)
+    assert sched.modified == ["fetch"]
+
+    # tetik anında süren tick isteği karşılamadıysa (tick < istek) bir kez daha tetiklenir
+    with S() as db:
+        db.get(Setting, TICK_KEY).value = "2026-10-19T10:30:00+03:00"
+        db.commit()
+    run_service.poll_refresh_request(sched, handled)
+    assert sched.modified == ["fetch", "fetch"]
+
+    with S() as db:
+        db.get(Setting, TICK_KEY).value = req
+        db.commit()
+    run_service.poll_refresh_request(sched, handled)
+    assert sched.modified == ["fetch", "fetch"]
+    assert not refresh_pending({REQUEST_KEY: req, TICK_KEY: req})
+
+
+def test_service_alive_follows_lease(tmp_path):
+    eng = create_engine(f"sqlite:///{tmp_path / 'l.db'}", future=True)
+    Base.metadata.create_all(eng)
+    S = sessionmaker(bind=eng, future=True)
+    with S() as db:
+        assert not service_alive(db, now=100.0)
+        db.add(ServiceLease(name="service", holder="h:1", epoch=1, expires_at=160.0, heartbeat_at=100.0))
+        db.commit()
+        assert service_alive(db, now=150.0)
+        assert not service_alive(db, now=170.0)
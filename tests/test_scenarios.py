@@ -0,0 +1,77 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from db.models import Base, Price
+from utils.scenarios import run_scenarios, simulate
+
+
+def test_simulation_is_seeded_and_independent_of_worker_count():
+    rng = np.random.default_rng(0)
+    rets = rng.normal(0, 0.01, size=(250, 3))
+    vals = np.array([1000.0, 2000.0, 500.0])
+    a = simulate(rets, vals, n_paths=60_000, seed=7, workers=1)
+    b = simulate(rets, vals, n_paths=60_000, seed=7, workers=2)  # 3 parça, 2 süreç
+    for h in (1, 5, 30):
+        assert a[h].shape == (60_000,)
+        np.testing.assert_array_equal(a[h], b[h])
+    assert not np.array_equal(a[1], simulate(rets, vals, n_paths=60_000, seed=8, workers=1)[1])
+
+
+def test_normal_var_matches_closed_form_and_bootstrap_keeps_correlation():
+    sigma = 0.01
+    rets = np.random.default_rng(1).normal(0, sigma, size=(2000, 1))
+    rets = (rets - rets.mean()) / rets.std(ddof=1) * sigma  # örneklem momentleri tam
+    pnl = simulate(rets, np.array([10_000.0]), horizons=(1, 25), n_paths=200_000, method="normal", seed=3, workers=1)
+    for h in (1, 25):
+        expected = 10_000 * -np.expm1(-1.6448536 * sigma * np.sqrt(h))
+        assert -np.quantile(pnl[h], 0.05) == pytest.approx(expected, rel=0.02)
+
+    # ters korelasyonlu eşit pozisyonlar: ortak gün çekildiği için kayıplar birbirini götürür
+    x = np.random.default_rng(2).normal(0, 0.02, size=(300, 1))
+    hedge = simulate(np.hstack([x, -x]), np.array([1000.0, 1000.0]), horizons=(5,), n_paths=20_000, workers=1)[5]
+    solo = simulate(x, np.array([2000.0]), horizons=(5,), n_paths=20_000, workers=1)[5]
+    assert np.abs(hedge).mean() < 0.05 * np.abs(solo).mean()
+
+
+def test_run_scenarios_uses_daily_closes_and_excludes_thin_history(tmp_path):
+    eng = create_engine(f"sqlite:///{tmp_path / 'sc.db'}", future=True)
+    Base.metadata.create_all(eng)
+    rng = np.random.default_rng(5)
+    today = date.today()
+    rows = []
+    usd = 40.0
+    for i in range(60, 0, -1):
+        d = (today - timedelta(days=i)).isoformat()
+        usd *= float(np.exp(rng.normal(0, 0.005)))
+        # gün içi iki tick: yalnız sonuncusu kapanış; stale satır yok sayılır
+        rows += [
+            Price(ts=f"{d}T10:00:00+03:00", asset="USDTRY", price="1", currency="TRY", source="t", is_stale=0),
+            Price(ts=f"{d}T18:00:00+03:00", asset="USDTRY", price=str(usd), currency="TRY", source="t", is_stale=0),
+            Price(ts=f"{d}T19:00:00+03:00", asset="USDTRY", price="999", currency="TRY", source="t", is_stale=1),
+        ]
+    rows.append(Price(ts=f"{today}T10:00:00+03:00", asset="XAU_G", price="5700", currency="TRY", source="t", is_stale=0))
+    with Session(eng) as db:
+        db.add_all(rows)
+        db.commit()
+        res = run_scenarios(db, {"USDTRY": 4180.0, "XAU_G": 5700.0}, n_paths=10_000, seed=1)
+
+    assert res.assets == ("USDTRY",) and res.excluded == ("XAU_G",) and res.n_obs == 59
+    s1, s5, s30 = res.stats
+    assert 0 < s1.var95 < s5.var95 < s30.var95 < 4180
+    assert s30.cvar95 >= s30.var95 and s30.var99 >= s30.var95
+
+
+def test_normal_method_survives_singular_covariance():
+    from utils.scenarios import _cov_factor
+
+    cov = np.array([[1.0, 1.0], [1.0, 1.0 - 1e-6]])  # yuvarlama ile hafif negatif özdeğer
+    chol = _cov_factor(cov)
+    np.testing.assert_allclose(chol @ chol.T, cov, atol=1e-6)
+
+    x = np.random.default_rng(4).normal(0, 0.01, size=(300, 1))
+    pnl = simulate(np.hstack([x, x]), np.array([1000.0, 1000.0]), horizons=(1,), n_paths=5_000, method="normal", workers=1)
+    assert np.isfinite(pnl[1]).all()
@@ -0,0 +1,41 @@
+import sqlite3
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from db.models import Base, Setting
+from db.session import make_read_engine, make_write_engine
+
+
+def test_read_engine_never_locks_and_write_engine_begins_immediate(tmp_path):
+    path = str(tmp_path / "s.db")
+    w = make_write_engine(path)
+    Base.metadata.create_all(w)
+    r = make_read_engine(path)
+
+    with Session(w) as db:
+        db.add(Setting(key="k", value="1"))
+        db.commit()
+
+    with Session(w) as writer:
+        # yalnız SELECT yapılmış olsa da yazma kilidi transaction başında alınmıştır
+        writer.execute(select(Setting)).all()
+        other = sqlite3.connect(path, timeout=0)
+        with pytest.raises(sqlite3.OperationalError, match="locked"):
+            other.execute("BEGIN IMMEDIATE")
+        other.close()
+
+        writer.get(Setting, "k").value = "2"
+        writer.flush()
+        # yazma transaction'ı açıkken okuma beklemeden son commit'li hali görür
+        with Session(r) as reader:
+            assert reader.get(Setting, "k").value == "1"
+        writer.commit()
+
+    with Session(r) as reader:
+        assert reader.get(Setting, "k").value == "2"
+        assert reader.execute(text("PRAGMA query_only")).scalar() == 1
+        with pytest.raises(OperationalError):
+            reader.execute(text("UPDATE settings SET value = '3'"))
@@ -0,0 +1,71 @@
+import io
+from decimal import Decimal
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from db.models import Base, Transaction
+from utils.decimal import parse_decimal
+from utils.tx_import import PROFILES, import_transactions
+
+
+def _db():
+    eng = create_engine("sqlite://", future=True)
+    Base.metadata.create_all(eng)
+    return Session(eng)
+
+
+def test_import_tr_profile_reports_row_errors_and_blocks_oversell():
+    csv_text = (
+        "Tarih;Ürün;İşlem;Miktar;Birim Fiyat;Komisyon;Açıklama\n"
+        "02.01.2024;Gram Altın;ALIŞ;10;2.000,50;0;ilk\n"
+        "05.01.2024;Gram Altın;SATIŞ;12;2.100,00;0;fazla satış\n"
+        "03.01.2024;Gram Altın;SATIŞ;4;2.050,00;1,5;\n"
+        "04.01.2024;Platin;ALIŞ;1;10;0;\n"
+    )
+    with _db() as db:
+        rep = import_transactions(db, io.StringIO(csv_text), PROFILES["kuyumcu_tr"])
+        rows = db.execute(select(Transaction).order_by(Transaction.ts)).scalars().all()
+
+    assert rep.total_rows == 4 and rep.inserted == 2 and rep.ok
+    assert [e[0] for e in rep.errors] == [3, 5]
+    assert [(r.side, r.qty, r.unit_price, r.fee) for r in rows] == [
+        ("BUY", "10", "2000.50", "0"),
+        ("SELL", "4", "2050.00", "1.5"),
+    ]
+    assert rows[0].ts == "2024-01-02T00:00:00+03:00"
+
+
+def test_import_backdated_sell_that_breaks_existing_ledger_writes_nothing():
+    with _db() as db:
+        db.add(Transaction(ts="2024-01-01T00:00:00+03:00", asset="XAU_G", side="BUY", qty="5", unit_price="1", fee="0"))
+        db.add(Transaction(ts="2024-02-01T00:00:00+03:00", asset="XAU_G", side="SELL", qty="5", unit_price="1", fee="0"))
+        db.commit()
+        csv_text = "ts,asset,side,qty,unit_price\n2024-01-15,XAU_G,SELL,2,1\n"
+        rep = import_transactions(db, io.StringIO(csv_text), PROFILES["default"])
+        n = len(db.execute(select(Transaction)).scalars().all())
+
+    assert not rep.ok and rep.inserted == 0 and n == 2
+
+
+def test_decimal_comma_reads_dot_only_groups_as_thousands():
+    assert parse_decimal("5.230") == Decimal("5230")  # TR dökümünde 5 230 TL, 5,23 değil
+    assert parse_decimal("1.234.567") == Decimal("1234567")
+    assert parse_decimal("1.234,56") == Decimal("1234.56")
+    assert parse_decimal("70.41") == Decimal("70.41")  # üçlü grup değil: ondalık nokta
+    assert parse_decimal("5.230", decimal_comma=False) == Decimal("5.230")
+    assert parse_decimal("0.500") == Decimal("0.500")  # 0,5 g; baştaki 0 binlik grup değil
+    assert parse_decimal("012.345") == Decimal("12.345")
+    assert parse_decimal(41.785) == Decimal("41.785")  # metin olmayan sayı tahminsiz
+
+
+def test_non_finite_numbers_are_row_errors():
+    csv_text = (
+        "ts,asset,side,qty,unit_price\n"
+        "2024-01-15,XAU_G,BUY,Infinity,1\n"
+        "2024-01-15,XAU_G,BUY,1,NaN\n"
+        "2024-01-15,XAU_G,BUY,1,2\n"
+    )
+    with _db() as db:
+        rep = import_transactions(db, io.StringIO(csv_text), PROFILES["default"])
+    assert rep.inserted == 1 and [e[0] for e in rep.errors] == [2, 3]
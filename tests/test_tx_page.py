@@ -0,0 +1,54 @@
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from db.models import Base, Transaction
+from db.queries import TxFilter, tx_page
+
+
+def _session(tmp_path, rows):
+    eng = create_engine(f"sqlite:///{tmp_path / 'p.db'}", future=True)
+    Base.metadata.create_all(eng)
+    with eng.begin() as conn:
+        conn.execute(insert(Transaction), [
+            {"qty": "1", "unit_price": "1", "fee": "0", "currency": "TRY", **r} for r in rows
+        ])
+    return Session(eng)
+
+
+def _pages(db, flt, limit):
+    out, cursor = [], None
+    while True:
+        rows, cursor = tx_page(db, flt, after=cursor, limit=limit)
+        out.append([r["id"] for r in rows])
+        if cursor is None:
+            return out
+
+
+def test_keyset_pages_split_equal_ts_and_end_with_none(tmp_path):
+    same = "2026-10-01T10:00:00+03:00"
+    rows = [{"ts": same, "asset": "XAU_G", "side": "BUY", "note": None} for _ in range(5)]  # id 1..5, aynı ts
+    rows.append({"ts": "2026-10-02T10:00:00+03:00", "asset": "XAU_G", "side": "BUY", "note": None})  # id 6
+    with _session(tmp_path, rows) as db:
+        # aynı ts'li satırlar sayfa sınırında bölünür: (ts, id) cursor'ı tekrar / atlama yapmaz
+        assert _pages(db, TxFilter(), limit=2) == [[6, 5], [4, 3], [2, 1]]
+        rows, cursor = tx_page(db, TxFilter(), limit=6)
+        assert len(rows) == 6 and cursor is None  # tam dolu son sayfa: ek sayfa yok
+        assert tx_page(db, TxFilter(), after=(same, 1))[0] == []
+
+
+def test_filters_and_like_escaping(tmp_path):
+    rows = [
+        {"ts": "2026-10-01T10:00:00+03:00", "asset": "XAU_G", "side": "BUY", "note": "100% altın"},    # 1
+        {"ts": "2026-10-02T10:00:00+03:00", "asset": "XAU_G", "side": "SELL", "note": "1000 altın"},   # 2
+        {"ts": "2026-10-03T10:00:00+03:00", "asset": "USDTRY", "side": "BUY", "note": "kur_farkı"},    # 3
+        {"ts": "2026-10-04T10:00:00+03:00", "asset": "USDTRY", "side": "BUY", "note": "kurXfarkı"},    # 4
+        {"ts": "2026-10-05T10:00:00+03:00", "asset": "XAU_G", "side": "BUY", "note": None},            # 5
+    ]
+    with _session(tmp_path, rows) as db:
+        ids = lambda flt: [r["id"] for r in tx_page(db, flt)[0]]  # noqa: E731
+        assert ids(TxFilter(asset="XAU_G")) == [5, 2, 1]
+        assert ids(TxFilter(asset="XAU_G", side="BUY")) == [5, 1]
+        assert ids(TxFilter(start="2026-10-02", end="2026-10-04")) == [3, 2]
+        # % ve _ joker değil, düz karakter olarak aranır
+        assert ids(TxFilter(note="0%")) == [1]
+        assert ids(TxFilter(note="kur_")) == [3]
@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from typing import Dict
+
+ASSETS_META: Dict[str, dict] = {
+    "XAU_G": {"name": "Gram Altın", "unit": "gr"},
+    "XAG_G": {"name": "Gram Gümüş", "unit": "gr"},
+    "XCU_G": {"name": "Bakır", "unit": "gr"},
+    "XAU_22_BILEZIK": {"name": "22 Ayar Bilezik", "unit": "gr"},
+    "XAU_CEYREK": {"name": "Çeyrek Altın", "unit": "adet"},
+    "XAU_YARIM": {"name": "Yarım Altın", "unit": "adet"},
+    "XAU_TAM": {"name": "Tam Altın", "unit": "adet"},
+    "XAU_CUMHURIYET": {"name": "Cumhuriyet Altını", "unit": "adet"},
+    "XAU_ONS": {"name": "Ons Altın", "unit": "ons"},
+    "USDTRY": {"name": "USD/TRY", "unit": "USD"},
+    "EURTRY": {"name": "EUR/TRY", "unit": "EUR"},
+}
+ASSETS = list(ASSETS_META.keys())
+
+
+def asset_label(a: str) -> str:
+    return ASSETS_META.get(a, {"name": a})["name"]
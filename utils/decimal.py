@@ -1,10 +1,14 @@
 from __future__ import annotations
-from decimal import Decimal, ROUND_HALF_UP, getcontext
+import re
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP, getcontext
 
 getcontext().prec = 28
 TWOPLACES = Decimal("0.01")
 FOURPLACES = Decimal("0.0001")
 
+# ondalık virgüllü metinde yalnız binlik nokta: "5.230", "1.234.567" (baştaki grup 0 ile başlamaz: "0.500" ondalık)
+_DOT_THOUSANDS = re.compile(r"[+-]?[1-9]\d{0,2}(\.\d{3})+")
+
 def D(x) -> Decimal:
     if x is None:
         return Decimal("0")
@@ -17,3 +21,26 @@ def q2(x: Decimal) -> Decimal:
 
 def q4(x: Decimal) -> Decimal:
     return D(x).quantize(FOURPLACES, rounding=ROUND_HALF_UP)
+
+def parse_decimal(x, decimal_comma: bool = True) -> Decimal:
+    """
+    Metin sayıyı Decimal'e çevirir.
+    decimal_comma=True: '1.234,56' / '1234,56' -> 1234.56; yalnız nokta varsa '5.230' / '1.234.567'
+    (üçlü gruplar) binlik ayırıcıdır -> 5230 / 1234567, diğerleri ('70.41', '0.500') ondalık kabul edilir
+    decimal_comma=False: '1,234.56' -> 1234.56
+    Metin olmayan sayılar (int/float/Decimal) biçim tahmini yapılmadan çevrilir.
+    """
+    if isinstance(x, (int, float, Decimal)) and not isinstance(x, bool):
+        return D(x)
+    s = str(x).strip().replace(" ", "").replace("\u00a0", "")
+    if decimal_comma:
+        if "," in s:
+            s = s.replace(".", "").replace(",", ".")
+        elif _DOT_THOUSANDS.fullmatch(s):
+            s = s.replace(".", "")
+    else:
+        s = s.replace(",", "")
+    try:
+        return Decimal(s)
+    except InvalidOperation as e:
+        raise ValueError(f"geçersiz sayı: {x!r}") from e
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import csv
+import gzip
+import io
+import tempfile
+from dataclasses import dataclass
+from typing import IO, Iterator, List, Optional, Tuple
+
+from sqlalchemy import text
+
+
+@dataclass(frozen=True)
+class ExportSpec:
+    table: str
+    columns: List[str]
+    numeric: List[str]      # Excel biçiminde ondalık virgüle çevrilecek kolonlar
+    has_asset: bool = True
+
+
+EXPORTS = {
+    "transactions": ExportSpec(
+        "transactions",
+        ["id", "ts", "asset", "side", "qty", "unit_price", "fee", "currency", "note"],
+        ["qty", "unit_price", "fee"],
+    ),
+    "prices": ExportSpec(
+        "prices",
+        ["id", "ts", "asset", "price", "price_buy", "price_sell", "currency", "source", "is_stale", "error_msg"],
+        ["price", "price_buy", "price_sell"],
+    ),
+    "snapshots": ExportSpec(
+        "snapshots",
+        ["id", "ts", "total_value_try", "breakdown_json"],
+        ["total_value_try"],
+        has_asset=False,
+    ),
+}
+
+# csv: düz UTF-8, excel: Excel TR uyumlu (BOM + ';' + ondalık virgül)
+FORMATS = {"csv": (",", False), "excel": (";", True)}
+
+
+def _query(spec: ExportSpec, asset: Optional[str], start: Optional[str], end: Optional[str]) -> Tuple[str, dict]:
+    where, params = [], {}
+    if asset and spec.has_asset:
+        where.append("asset = :asset"); params["asset"] = asset
+    if start:
+        where.append("ts >= :start"); params["start"] = start
+    if end:
+        where.append("ts < :end"); params["end"] = end
+    sql = f"SELECT {', '.join(spec.columns)} FROM {spec.table}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    return sql + " ORDER BY id", params
+
+
+def iter_export_rows(
+    engine,
+    kind: str,
+    asset: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    chunk_size: int = 2000,
+) -> Iterator[list]:
+    """Satırları server-side cursor'dan chunk chunk okur; tüm sonuç belleğe alınmaz."""
+    spec = EXPORTS[kind]
+    sql, params = _query(spec, asset, start, end)
+    with engine.connect() as conn:
+        res = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(text(sql), params)
+        for part in res.partitions():
+            for row in part:
+                yield list(row)
+
+
+def write_export(
+    out: IO[bytes],
+    engine,
+    kind: str,
+    fmt: str = "csv",
+    compress: bool = False,
+    asset: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    chunk_size: int = 2000,
+) -> int:
+    """Export'u binary stream'e yazar, yazılan satır sayısını döner."""
+    spec = EXPORTS[kind]
+    delimiter, decimal_comma = FORMATS[fmt]
+    num_idx = [spec.columns.index(c) for c in spec.numeric] if decimal_comma else []
+
+    raw = gzip.GzipFile(fileobj=out, mode="wb") if compress else out
+    w = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="", write_through=False)
+    try:
+        cw = csv.writer(w, delimiter=delimiter)
+        cw.writerow(spec.columns)
+        n = 0
+        for row in iter_export_rows(engine, kind, asset, start, end, chunk_size):
+            for i in num_idx:
+                if row[i] is not None:
+                    row[i] = str(row[i]).replace(".", ",")
+            cw.writerow(row)
+            n += 1
+        w.flush()
+    finally:
+        w.detach()
+        if compress:
+            raw.close()
+    return n
+
+
+def export_to_tempfile(engine, kind: str, fmt: str = "csv", compress: bool = False, **filters) -> Tuple[str, int]:
+    """Export'u diskteki geçici dosyaya akıtır (bellek sabit kalır). (path, satır) döner."""
+    suffix = ".csv.gz" if compress else ".csv"
+    with tempfile.NamedTemporaryFile(prefix=f"{kind}_", suffix=suffix, delete=False) as f:
+        n = write_export(f, engine, kind, fmt=fmt, compress=compress, **filters)
+    return f.name, n
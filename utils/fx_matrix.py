@@ -0,0 +1,71 @@
+"""
+Çoklu baz birimle değerleme: tick başına bir kez kurulan çapraz kur matrisi.
+
+Baz birim, TRY ya da takip edilen herhangi bir varlık olabilir (USDTRY -> USD,
+XAU_G -> gram altın ...). Matris float64'tür; değerler yalnız gösterim içindir,
+defter ve PnL hesapları Decimal olarak kalır.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Mapping, Tuple
+
+import numpy as np
+
+from utils.assets import ASSETS, ASSETS_META, asset_label
+
+TRY = "TRY"
+UNITS: List[str] = [TRY] + ASSETS
+BASE_LABELS: Dict[str, str] = {TRY: "TL", "USDTRY": "USD", "EURTRY": "EUR", "XAU_G": "gr altın"}
+
+
+def base_label(base: str) -> str:
+    return BASE_LABELS.get(base) or asset_label(base)
+
+
+@dataclass(frozen=True)
+class CrossRates:
+    units: Tuple[str, ...]
+    try_prices: np.ndarray      # birim başına TL fiyatı (TRY = 1, fiyatı yoksa NaN)
+    matrix: np.ndarray          # matrix[i, j] = 1 birim i kaç birim j eder
+
+    def index(self, unit: str) -> int:
+        return self.units.index(unit)
+
+    def rate(self, frm: str, to: str) -> float:
+        return float(self.matrix[self.index(frm), self.index(to)])
+
+    def has(self, base: str) -> bool:
+        return base in self.units and bool(np.isfinite(self.try_prices[self.index(base)]))
+
+    def convert(self, values_try, base: str) -> np.ndarray:
+        """TL değerlerini (skaler / dizi / matris) tek çarpımla baz birime çevirir."""
+        return np.asarray(values_try, dtype=np.float64) * self.matrix[0, self.index(base)]
+
+
+@lru_cache(maxsize=8)
+def _build(prices: Tuple[Tuple[str, str], ...]) -> CrossRates:
+    p = dict(prices)
+    vec = np.array([1.0] + [float(p[u]) if p.get(u) else np.nan for u in ASSETS], dtype=np.float64)
+    vec[vec <= 0] = np.nan
+    with np.errstate(divide="ignore", invalid="ignore"):
+        m = np.outer(vec, 1.0 / vec)
+    return CrossRates(units=tuple(UNITS), try_prices=vec, matrix=m)
+
+
+def cross_rates(price_map: Mapping[str, object]) -> CrossRates:
+    """
+    Son fiyatlardan çapraz kur matrisi. Aynı fiyat seti için (aynı tick) önbellekten döner,
+    yani her rerun'da yeniden kurulmaz.
+    """
+    return _build(tuple(sorted((a, str(v)) for a, v in price_map.items() if a in ASSETS_META and v is not None)))
+
+
+def rebase_series(values_try: np.ndarray, base_prices_try: np.ndarray) -> np.ndarray:
+    """
+    Zaman serisini her noktanın kendi kuruyla baz birime çevirir (vektörel bölme).
+    base_prices_try: aynı uzunlukta, o andaki baz birimin TL fiyatı; TRY için 1.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.asarray(values_try, dtype=np.float64) / np.asarray(base_prices_try, dtype=np.float64)
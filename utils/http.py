@@ -1,15 +1,97 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Optional
+import os
+import threading
+import time
+from typing import Dict, Iterable, Optional
 
 import requests
-from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
 from urllib3.util.retry import Retry
 
+from utils.http_fixtures import adapter_from_env
+
+DEFAULT_STATUS_FORCELIST = (429, 500, 502, 503, 504)
+
+
+class HttpStats:
+    """
+    Süreç geneli bağlantı sayaçları. `connects`: açılan yeni bağlantı (DNS + TCP + TLS el
+    sıkışması, süresi `handshake_ms`); `requests`: gönderilen istek (retry denemeleri dahil).
+    requests - connects = canlı (keep-alive) bağlantıyı yeniden kullanan istekler.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests = 0
+            self.connects = 0
+            self.handshake_ms = 0.0
+
+    def on_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def on_connect(self, ms: float) -> None:
+        with self._lock:
+            self.connects += 1
+            self.handshake_ms += ms
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            reused = max(0, self.requests - self.connects)
+            return {
+                "requests": self.requests,
+                "new_connections": self.connects,
+                "reused": reused,
+                "reuse_ratio": round(reused / self.requests, 3) if self.requests else 0.0,
+                "handshake_ms": round(self.handshake_ms, 1),
+                "handshake_ms_avg": round(self.handshake_ms / self.connects, 1) if self.connects else 0.0,
+            }
+
+
+HTTP_STATS = HttpStats()
+
+
+def http_stats() -> Dict[str, float]:
+    return HTTP_STATS.snapshot()
+
+
+class _CountingConnection:
+    def connect(self):
+        t0 = time.perf_counter()
+        super().connect()
+        HTTP_STATS.on_connect((time.perf_counter() - t0) * 1000)
+
+
+class _CountingHTTPConnection(_CountingConnection, HTTPConnection):
+    pass
+
+
+class _CountingHTTPSConnection(_CountingConnection, HTTPSConnection):
+    pass
+
+
+class _CountingPool:
+    def _make_request(self, *args, **kwargs):
+        HTTP_STATS.on_request()
+        return super()._make_request(*args, **kwargs)
+
+
+class _CountingHTTPPool(_CountingPool, HTTPConnectionPool):
+    ConnectionCls = _CountingHTTPConnection
+
+
+class _CountingHTTPSPool(_CountingPool, HTTPSConnectionPool):
+    ConnectionCls = _CountingHTTPSConnection
+
 
-@dataclass
 class _SessionWithTimeout(requests.Session):
+    # dataclass olamaz: Session.__init__ çağrılmazsa adapters/headers kurulmaz
     request_timeout_s: int = 10
 
 
@@ -17,8 +99,11 @@ def build_retry_session(
     timeout_s: int = 10,
     total_retries: int = 3,
     backoff_factor: float = 0.8,
-    status_forcelist: Optional[tuple[int, ...]] = (429, 500, 502, 503, 504),
+    status_forcelist: Optional[tuple[int, ...]] = DEFAULT_STATUS_FORCELIST,
+    allowed_methods: Iterable[str] = ("GET",),
 ) -> requests.Session:
+    """Retry + sayaçlı havuzlu session. Okuma/status retry'ları yalnız `allowed_methods` için yapılır;
+    POST idempotent olmadığından varsayılan dışında (bağlantı kurulamadıysa yine denenir)."""
     s = _SessionWithTimeout()
     s.request_timeout_s = timeout_s
 
@@ -29,12 +114,15 @@ def build_retry_session(
         status=total_retries,
         backoff_factor=backoff_factor,
         status_forcelist=status_forcelist,
-        allowed_methods=frozenset(["GET", "POST"]),
+        allowed_methods=frozenset(allowed_methods),
         raise_on_status=False,
         respect_retry_after_header=True,
     )
 
-    adapter = HTTPAdapter(max_retries=retry, pool_connections=20, pool_maxsize=20)
+    # HTTP_STANDIN_URL / HTTP_RECORD_DIR ile replay veya kayıt modu (bkz. utils/http_fixtures.py)
+    adapter = adapter_from_env(max_retries=retry, pool_connections=20, pool_maxsize=20)
+    # bağlantı havuzları sayaçlı: yeni bağlantı / yeniden kullanım HTTP_STATS'a yazılır
+    adapter.poolmanager.pool_classes_by_scheme = {"http": _CountingHTTPPool, "https": _CountingHTTPSPool}
     s.mount("http://", adapter)
     s.mount("https://", adapter)
 
@@ -45,3 +133,27 @@ def build_retry_session(
         }
     )
     return s
+
+
+_shared: Dict[tuple, requests.Session] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_session(
+    timeout_s: int = 10,
+    total_retries: int = 3,
+    backoff_factor: float = 0.8,
+    status_forcelist: Optional[tuple[int, ...]] = DEFAULT_STATUS_FORCELIST,
+) -> requests.Session:
+    """
+    Aynı retry politikasını isteyen tüm provider'ların paylaştığı, süreç boyunca yaşayan
+    session: host başına keep-alive havuzu tick'ler arasında korunur (her tick'te DNS/TCP/TLS yok).
+    Yönlendirme ortamı (HTTP_STANDIN_URL / HTTP_RECORD_DIR) değişirse yeni session kurulur.
+    """
+    key = (timeout_s, total_retries, backoff_factor, status_forcelist,
+           os.getenv("HTTP_STANDIN_URL", "").strip(), os.getenv("HTTP_RECORD_DIR", "").strip())
+    with _shared_lock:
+        s = _shared.get(key)
+        if s is None:
+            s = _shared[key] = build_retry_session(timeout_s, total_retries, backoff_factor, status_forcelist)
+        return s
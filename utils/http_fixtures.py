@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from requests.adapters import HTTPAdapter
+
+from utils.time import iso_now_tr
+
+# Fixture dosyalarına asla yazılmaması gereken query parametreleri
+SECRET_PARAMS = {"api_key", "apikey", "access_key", "key", "token"}
+
+
+def _clean_query(query: str) -> str:
+    pairs = [(k, v) for k, v in parse_qsl(query, keep_blank_values=True) if k.lower() not in SECRET_PARAMS]
+    return urlencode(sorted(pairs))
+
+
+def public_url(url: str) -> str:
+    """URL'i gizli parametrelerden arındırır (fixture içinde saklanan hali)."""
+    u = urlsplit(url)
+    q = _clean_query(u.query)
+    return f"{u.scheme}://{u.netloc}{u.path}" + (f"?{q}" if q else "")
+
+
+def fixture_relpath(host: str, path: str, query: str = "") -> str:
+    """host + path + (temizlenmiş) query -> fixture dosyasının göreli yolu."""
+    slug = re.sub(r"[^A-Za-z0-9._-]+", "_", path.strip("/")) or "index"
+    q = _clean_query(query)
+    if q:
+        slug += "__" + hashlib.sha1(q.encode("utf-8")).hexdigest()[:10]
+    return f"{host}/{slug}.json"
+
+
+def fixture_relpath_for_url(url: str) -> str:
+    u = urlsplit(url)
+    return fixture_relpath(u.netloc, u.path, u.query)
+
+
+def standin_url(base_url: str, url: str) -> str:
+    """https://host/path?q -> {base_url}/host/path?q"""
+    u = urlsplit(url)
+    return f"{base_url.rstrip('/')}/{u.netloc}{u.path or '/'}" + (f"?{u.query}" if u.query else "")
+
+
+def save_fixture(fixture_dir: str, url: str, status: int, content_type: str, body: str) -> Path:
+    dst = Path(fixture_dir) / fixture_relpath_for_url(url)
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "url": public_url(url),
+        "status": status,
+        "content_type": content_type,
+        "recorded_at": iso_now_tr(),
+        "body": body,
+    }
+    dst.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    return dst
+
+
+def load_fixture(fixture_dir: str, relpath: str) -> Optional[dict]:
+    p = Path(fixture_dir) / relpath
+    if not p.is_file():
+        return None
+    return json.loads(p.read_text(encoding="utf-8"))
+
+
+class RecordingAdapter(HTTPAdapter):
+    """Gerçek cevapları fixture dosyalarına yazar (5xx hariç)."""
+
+    def __init__(self, fixture_dir: str, **kwargs):
+        self.fixture_dir = fixture_dir
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        resp = super().send(request, **kwargs)
+        if resp.status_code < 500:
+            save_fixture(
+                self.fixture_dir,
+                request.url,
+                resp.status_code,
+                resp.headers.get("Content-Type", ""),
+                resp.text,
+            )
+        return resp
+
+
+class StandInAdapter(HTTPAdapter):
+    """Tüm istekleri yerel stand-in sunucusuna yönlendirir (bkz. bench/standin_server.py)."""
+
+    def __init__(self, base_url: str, **kwargs):
+        self.base_url = base_url
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        request.url = standin_url(self.base_url, request.url)
+        return super().send(request, **kwargs)
+
+
+def adapter_from_env(**kwargs) -> HTTPAdapter:
+    """
+    HTTP_STANDIN_URL set ise istekler stand-in sunucuya gider,
+    HTTP_RECORD_DIR set ise gerçek cevaplar fixture olarak kaydedilir.
+    İkisi de yoksa normal HTTPAdapter döner.
+    """
+    standin = os.getenv("HTTP_STANDIN_URL", "").strip()
+    if standin:
+        return StandInAdapter(standin, **kwargs)
+    record_dir = os.getenv("HTTP_RECORD_DIR", "").strip()
+    if record_dir:
+        return RecordingAdapter(record_dir, **kwargs)
+    return HTTPAdapter(**kwargs)
@@ -0,0 +1,159 @@
+"""
+Log halkası: son N log kaydının (JSON) sabit boyutlu, memory-mapped dosyası.
+
+Servis, UI ve CLI aynı halkaya yazar (utils/logging.py listener thread'i); Servis/Log sekmesi
+log dosyalarını okumadan son kayıtları buradan alır. Düzen quote board'a benzer:
+
+    header  64 B : magic, version, n_slots, slot_size, next (yazılacak kaydın sırası)
+    slot         : idx (u64, 0 = yazılıyor), len (u32), JSON (slot_size - 12 B)
+
+Yazarlar FileLock ile sıralanır. Her slot kendi seqlock'udur: yazar önce idx=0, sonra veri,
+en son idx=sıra+1 yazar; okur idx'i veriden önce ve sonra okur, ikisi beklenen sırayla
+eşleşmiyorsa (üzerine yazılmış / yarım) kaydı atlar. Okur kilit almaz.
+"""
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import List, Optional
+
+MAGIC = b"LRNG"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIQ")
+HEADER_SIZE = 64
+NEXT_OFFSET = 12
+NEXT = struct.Struct("<Q")
+SLOT_HEAD = struct.Struct("<QI")
+N_SLOTS = 1024
+SLOT_SIZE = 512
+
+
+def ring_path(log_dir: str = "logs") -> str:
+    return os.getenv("LOG_RING_PATH") or os.path.join(log_dir, "ring.bin")
+
+
+def _size(n_slots: int, slot_size: int) -> int:
+    return HEADER_SIZE + n_slots * slot_size
+
+
+def _lock(path: str):
+    from filelock import FileLock
+
+    return FileLock(path + ".lock", timeout=5)
+
+
+def encode(rec: dict, limit: int = SLOT_SIZE - SLOT_HEAD.size) -> bytes:
+    """Kayıt slota sığmazsa mesaj kısaltılır (JSON geçerli kalır)."""
+    b = json.dumps(rec, ensure_ascii=False, default=str).encode("utf-8")
+    if len(b) <= limit:
+        return b
+    msg = str(rec.get("msg", ""))
+    over = len(b) - limit
+    rec = {**rec, "msg": msg[: max(0, len(msg) - over - 8)] + "…"}
+    b = json.dumps(rec, ensure_ascii=False, default=str).encode("utf-8")
+    return b if len(b) <= limit else json.dumps({k: rec[k] for k in ("ts", "level", "logger") if k in rec}).encode()
+
+
+class LogRing:
+    def __init__(self, path: str, mm: mmap.mmap, fh, n_slots: int, slot_size: int):
+        self.path = path
+        self._mm = mm
+        self._fh = fh
+        self.n_slots = n_slots
+        self.slot_size = slot_size
+
+    @classmethod
+    def open(cls, path: str, write: bool = False, n_slots: int = N_SLOTS, slot_size: int = SLOT_SIZE) -> Optional["LogRing"]:
+        """Okur: dosya yoksa / bozuksa None. Yazar: gerekirse (atomik rename ile) yeniden kurar."""
+        if write:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            with _lock(path):
+                if _header(path) != (MAGIC, VERSION, n_slots, slot_size):
+                    tmp = f"{path}.{os.getpid()}.tmp"
+                    with open(tmp, "wb") as f:
+                        f.write(HEADER.pack(MAGIC, VERSION, n_slots, slot_size, 0).ljust(HEADER_SIZE, b"\0"))
+                        f.write(b"\0" * (n_slots * slot_size))
+                    os.replace(tmp, path)
+                fh = open(path, "r+b")
+                mm = mmap.mmap(fh.fileno(), _size(n_slots, slot_size), access=mmap.ACCESS_WRITE)
+            return cls(path, mm, fh, n_slots, slot_size)
+        hdr = _header(path)
+        if hdr is None or hdr[:2] != (MAGIC, VERSION):
+            return None
+        _m, _v, n_slots, slot_size = hdr
+        try:
+            fh = open(path, "rb")
+            mm = mmap.mmap(fh.fileno(), _size(n_slots, slot_size), access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        return cls(path, mm, fh, n_slots, slot_size)
+
+    def close(self) -> None:
+        self._mm.close()
+        self._fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def append(self, payloads: List[bytes]) -> None:
+        """Listener'ın biriktirdiği kayıtlar tek kilitte yazılır."""
+        mm = self._mm
+        with _lock(self.path):
+            nxt = NEXT.unpack_from(mm, NEXT_OFFSET)[0]
+            for b in payloads:
+                off = HEADER_SIZE + (nxt % self.n_slots) * self.slot_size
+                b = b[: self.slot_size - SLOT_HEAD.size]
+                SLOT_HEAD.pack_into(mm, off, 0, 0)
+                mm[off + SLOT_HEAD.size: off + SLOT_HEAD.size + len(b)] = b
+                SLOT_HEAD.pack_into(mm, off, nxt + 1, len(b))
+                nxt += 1
+            NEXT.pack_into(mm, NEXT_OFFSET, nxt)
+
+    def tail(self, n: int = 200) -> List[dict]:
+        """Son n kayıt, eskiden yeniye. Okuma sırasında üzerine yazılan slotlar atlanır."""
+        mm = self._mm
+        nxt = NEXT.unpack_from(mm, NEXT_OFFSET)[0]
+        out = []
+        for i in range(max(0, nxt - min(n, self.n_slots)), nxt):
+            off = HEADER_SIZE + (i % self.n_slots) * self.slot_size
+            idx, ln = SLOT_HEAD.unpack_from(mm, off)
+            if idx != i + 1:
+                continue
+            raw = mm[off + SLOT_HEAD.size: off + SLOT_HEAD.size + ln]
+            if SLOT_HEAD.unpack_from(mm, off)[0] != idx:
+                continue
+            try:
+                out.append(json.loads(raw))
+            except ValueError:
+                continue
+        return out
+
+
+def _header(path: str):
+    try:
+        with open(path, "rb") as f:
+            hdr = f.read(HEADER.size)
+            size = os.fstat(f.fileno()).st_size
+    except OSError:
+        return None
+    if len(hdr) != HEADER.size:
+        return None
+    magic, ver, n_slots, slot_size, _next = HEADER.unpack(hdr)
+    if magic != MAGIC or not n_slots or size != _size(n_slots, slot_size):
+        return None
+    return magic, ver, n_slots, slot_size
+
+
+def tail_logs(n: int = 200, path: Optional[str] = None, log_dir: Optional[str] = None) -> List[dict]:
+    """UI / CLI için: halka yoksa boş liste."""
+    ring = LogRing.open(path or ring_path(log_dir or os.getenv("LOG_DIR", "logs")))
+    if ring is None:
+        return []
+    with ring:
+        return ring.tail(n)
@@ -1,24 +1,185 @@
+"""
+Kuyruklu log hattı: çağıran thread yalnız kaydı kuyruğa koyar; dosya yazımı, rotasyon
+ve log halkası (utils/log_ring.py) süreç başına tek QueueListener thread'inde yapılır.
+
+Dosyalar JSON lines: `<log_dir>/<logger>.jsonl`, kayıt başına bir satır
+({"ts", "level", "logger", "msg", ...}). `extra={...}` ile verilen alanlar (tick_id,
+provider, latency_ms, assets, ...) ve `log_context(...)` bloğundaki alanlar kayda eklenir.
+Konsol çıktısı okunur metin olarak kalır.
+"""
 from __future__ import annotations
+
+import atexit
+import contextvars
+import json
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from utils.log_ring import LogRing, encode, ring_path, tail_logs
+from utils.time import TR_TZ
+
+TEXT_FMT = "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+
+# LogRecord'un kendi alanları; bunların dışındaki her öznitelik extra sayılır
+_STD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "log_dir"}
+
+_context: contextvars.ContextVar[Dict[str, object]] = contextvars.ContextVar("log_context", default={})
+
+
+@contextmanager
+def log_context(**fields):
+    """Blok içinde (aynı thread / context) atılan tüm kayıtlara alan ekler, ör. tick_id."""
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def record_dict(record: logging.LogRecord) -> dict:
+    out = {
+        "ts": datetime.fromtimestamp(record.created, TR_TZ).isoformat(timespec="milliseconds"),
+        "level": record.levelname,
+        "logger": record.name,
+        "msg": record.getMessage(),
+    }
+    for k, v in vars(record).items():
+        if k not in _STD_ATTRS and not k.startswith("_"):
+            out[k] = v
+    return out
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(record_dict(record), ensure_ascii=False, default=str)
+
+
+class _ContextQueueHandler(QueueHandler):
+    """Kayda log_dir ve log_context alanlarını çağıran thread'de ekler (listener'da context yok)."""
+
+    def __init__(self, q, log_dir: str):
+        super().__init__(q)
+        self.log_dir = log_dir
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        for k, v in _context.get().items():
+            if not hasattr(record, k):
+                setattr(record, k, v)
+        record = super().prepare(record)  # msg % args + traceback metni; exc_info düşer
+        record.log_dir = self.log_dir
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if _listener is None:  # flush_logging sonrası atılan kayıtlar için
+            _ensure_listener()
+        super().enqueue(record)
+
+
+class _RoutingHandler(logging.Handler):
+    """Listener tarafı: kaydı log_dir / logger adına göre JSONL dosyasına ve log halkasına yazar."""
+
+    def __init__(self):
+        super().__init__()
+        self._files: Dict[Tuple[str, str], RotatingFileHandler] = {}
+        self._rings: Dict[str, Optional[LogRing]] = {}
+        self._pending: Dict[str, List[bytes]] = {}
+        self._fmt = JsonFormatter()
+
+    def _file(self, log_dir: str, name: str) -> RotatingFileHandler:
+        fh = self._files.get((log_dir, name))
+        if fh is None:
+            Path(log_dir).mkdir(parents=True, exist_ok=True)
+            fh = RotatingFileHandler(os.path.join(log_dir, f"{name}.jsonl"), maxBytes=2_000_000, backupCount=5, encoding="utf-8")
+            fh.setFormatter(self._fmt)
+            self._files[(log_dir, name)] = fh
+        return fh
+
+    def _ring(self, log_dir: str) -> Optional[LogRing]:
+        if log_dir not in self._rings:
+            try:
+                self._rings[log_dir] = LogRing.open(ring_path(log_dir), write=True)
+            except Exception:
+                self._rings[log_dir] = None  # halka kurulamazsa yalnız dosyaya yazılır
+        return self._rings[log_dir]
+
+    def emit(self, record: logging.LogRecord) -> None:
+        log_dir = getattr(record, "log_dir", "logs")
+        self._file(log_dir, record.name).handle(record)
+        self._pending.setdefault(log_dir, []).append(encode(record_dict(record)))
+        # halkaya toplu yazım: kuyrukta bekleyen kayıt kalmayınca tek kilitte
+        if _queue.empty():
+            self.flush()
+
+    def flush(self) -> None:
+        pending, self._pending = self._pending, {}
+        for log_dir, payloads in pending.items():
+            ring = self._ring(log_dir)
+            if ring is not None:
+                try:
+                    ring.append(payloads)
+                except Exception:
+                    pass  # halka yazılamazsa kayıt yine dosyada
+
+    def close(self) -> None:
+        self.flush()
+        for fh in self._files.values():
+            fh.close()
+        for ring in self._rings.values():
+            if ring is not None:
+                ring.close()
+        super().close()
+
+
+_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_listener: Optional[QueueListener] = None
+_listener_lock = threading.Lock()
+
+
+def _ensure_listener() -> None:
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            return
+        console = logging.StreamHandler()
+        console.setFormatter(logging.Formatter(TEXT_FMT))
+        _listener = QueueListener(_queue, _RoutingHandler(), console, respect_handler_level=True)
+        _listener.start()
+
+
+def flush_logging() -> None:
+    """Kuyruğu boşaltıp listener'ı durdurur (çıkışta otomatik); sonraki log yeniden başlatır."""
+    global _listener
+    with _listener_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        for h in _listener.handlers:
+            h.close()
+        _listener = None
+
+
+atexit.register(flush_logging)
+
 
 def setup_logging(name: str, log_dir: str = "logs", level: int = logging.INFO) -> logging.Logger:
-    Path(log_dir).mkdir(parents=True, exist_ok=True)
     logger = logging.getLogger(name)
     logger.setLevel(level)
     logger.propagate = False
     if logger.handlers:
         return logger
+    logger.addHandler(_ContextQueueHandler(_queue, log_dir))
+    _ensure_listener()
+    return logger
 
-    fmt = logging.Formatter("%(asctime)s | %(levelname)s | %(name)s | %(message)s")
-
-    fh = RotatingFileHandler(os.path.join(log_dir, f"{name}.log"), maxBytes=2_000_000, backupCount=5, encoding="utf-8")
-    fh.setFormatter(fmt); fh.setLevel(level)
-
-    ch = logging.StreamHandler()
-    ch.setFormatter(fmt); ch.setLevel(level)
 
-    logger.addHandler(fh); logger.addHandler(ch)
-    return logger
+def tail(n: int = 200, min_level: str = "DEBUG", log_dir: Optional[str] = None) -> List[dict]:
+    """Log halkasından son kayıtlar (dosya okumaz), eskiden yeniye."""
+    floor = logging.getLevelName(min_level)
+    return [r for r in tail_logs(n, log_dir=log_dir) if logging.getLevelName(r.get("level", "INFO")) >= floor]
@@ -0,0 +1,47 @@
+"""
+Largest-Triangle-Three-Buckets (Steinarsson, 2013) ile grafik seyreltme.
+
+Seri n_out noktaya indirilir: ilk ve son nokta korunur, aradaki noktalar n_out-2 kovaya
+bölünür ve her kovadan, önceki seçilen nokta ile sonraki kovanın ortalamasıyla en büyük
+üçgeni kuran nokta seçilir. Tepe / dip gibi görsel olarak önemli noktalar kalır.
+
+Kova sınırları ve kova ortalamaları tek seferde (np.add.reduceat) hesaplanır; seçim
+önceki kovanın sonucuna bağlı olduğu için kova başına bir vektörel argmax kalır.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Seçilen noktaların (artan) indeksleri. n_out >= len(x) ise tüm indeksler."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)   # kova i = [edges[i], edges[i+1])
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[: n - 1], edges[:-1]) / counts
+    avg_y = np.add.reduceat(y[: n - 1], edges[:-1]) / counts
+    # kova i için üçgenin üçüncü köşesi: sonraki kovanın ortalaması (son kovada son nokta)
+    nx = np.append(avg_x[1:], x[-1])
+    ny = np.append(avg_y[1:], y[-1])
+
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        ax, ay = x[a], y[a]
+        area = np.abs((ax - nx[i]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (ny[i] - ay))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int):
+    """(x, y) -> seyreltilmiş (x, y)."""
+    idx = lttb_indices(x, y, n_out)
+    return np.asarray(x)[idx], np.asarray(y)[idx]
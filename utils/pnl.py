@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from decimal import Decimal
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, Mapping, Tuple
 
 from utils.decimal import D
 
@@ -13,35 +13,32 @@ class InventoryRow:
     avg_cost_try: Decimal
     realized_try: Decimal
 
-def compute_inventory_wavg(transactions: List[dict]) -> Dict[str, InventoryRow]:
+def apply_tx_wavg(row: InventoryRow, side: str, qty: Decimal, unit_price: Decimal, fee: Decimal) -> InventoryRow:
+    """Tek işlemi ağırlıklı ortalama maliyetle uygular (stok blokajlı, row yerinde güncellenir)."""
+    if side == "BUY":
+        total_cost = qty * unit_price + fee
+        new_qty = row.qty + qty
+        if new_qty > 0:
+            row.avg_cost_try = (row.avg_cost_try * row.qty + total_cost) / new_qty
+        row.qty = new_qty
+    else:
+        if qty > row.qty:
+            raise ValueError(f"{row.asset} stok yetersiz: elde {row.qty}, satılmak istenen {qty}")
+        proceeds = qty * unit_price - fee
+        cost = qty * row.avg_cost_try
+        row.realized_try += (proceeds - cost)
+        row.qty -= qty
+        if row.qty == 0:
+            row.avg_cost_try = Decimal("0")
+    return row
+
+def compute_inventory_wavg(transactions: Iterable[Mapping]) -> Dict[str, InventoryRow]:
     """Weighted-average inventory with stock blocking."""
     state: Dict[str, InventoryRow] = {}
     for r in transactions:
         asset = r["asset"]
-        side = r["side"]
-        qty = D(r["qty"])
-        unit_price = D(r["unit_price"])
-        fee = D(r.get("fee", "0"))
-
         row = state.get(asset, InventoryRow(asset=asset, qty=Decimal("0"), avg_cost_try=Decimal("0"), realized_try=Decimal("0")))
-
-        if side == "BUY":
-            total_cost = qty * unit_price + fee
-            new_qty = row.qty + qty
-            if new_qty > 0:
-                row.avg_cost_try = (row.avg_cost_try * row.qty + total_cost) / new_qty
-            row.qty = new_qty
-        else:
-            if qty > row.qty:
-                raise ValueError(f"{asset} stok yetersiz: elde {row.qty}, satılmak istenen {qty}")
-            proceeds = qty * unit_price - fee
-            cost = qty * row.avg_cost_try
-            row.realized_try += (proceeds - cost)
-            row.qty -= qty
-            if row.qty == 0:
-                row.avg_cost_try = Decimal("0")
-
-        state[asset] = row
+        state[asset] = apply_tx_wavg(row, r["side"], D(r["qty"]), D(r["unit_price"]), D(r.get("fee", "0")))
     return state
 
 def valuation_from_prices(inv: Dict[str, InventoryRow], mid_prices: Dict[str, Decimal]) -> Tuple[Dict[str, dict], Decimal, Decimal, Decimal]:
@@ -0,0 +1,230 @@
+"""
+Son fiyat panosu: servisin her tick sonrası yazdığı sabit düzenli, memory-mapped dosya.
+
+UI / CLI her rerun'da SQLite'a gitmek yerine panoyu okur. Tutarlılık seqlock ile:
+yazar `seq`'i tek sayıya çeker, slotları yazar, tekrar çift sayıya çeker; okur slotları
+doğrudan mmap üzerinden (kopyasız, struct.unpack_from) okur ve `seq` değişmediyse
+sonucu kabul eder. Birden çok yazar (servis, manuel fiyat, CLI refresh) FileLock ile
+sıralanır; okurlar kilit almaz.
+
+Düzen (little-endian):
+    header  64 B : magic, version, n_slots, layout_crc, seq, tick_seq, published_at
+    slot   192 B : mid, bid, ask (40 B Decimal string), ts (32 B), source (32 B), is_stale, valid
+Fiyatlar pipeline'daki Decimal string'leri olarak aynen saklanır (float'a çevrilmez; pano
+değerleri değerlemede kullanıldığı için SQLite ile birebir aynı olmalı).
+Slot sırası utils.assets.ASSETS; liste değişirse layout_crc tutmaz ve pano yeniden kurulur.
+"""
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, Mapping, Optional
+
+from utils.assets import ASSETS
+
+MAGIC = b"QBRD"
+VERSION = 2
+HEADER = struct.Struct("<4sHHI4xQQd")
+HEADER_SIZE = 64
+SEQ = struct.Struct("<Q")
+SEQ_OFFSET = 16
+PRICE_WIDTH = 40
+SLOT = struct.Struct(f"<{PRICE_WIDTH}s{PRICE_WIDTH}s{PRICE_WIDTH}s32s32sBB6x")
+LAYOUT_CRC = zlib.crc32(",".join(ASSETS).encode("ascii"))
+SIZE = HEADER_SIZE + SLOT.size * len(ASSETS)
+_SLOT_OF = {a: i for i, a in enumerate(ASSETS)}
+DEFAULT_MAX_AGE_S = 3600  # varsayılan update_interval_min=30 -> iki tick
+
+
+def board_path() -> str:
+    from db.paths import get_db_path
+
+    return os.getenv("QUOTE_BOARD_PATH") or str(Path(get_db_path()).with_suffix(".board"))
+
+
+def _s(b: bytes) -> str:
+    return b.rstrip(b"\0").decode("utf-8", "replace")
+
+
+def _b(s: Optional[str], n: int) -> bytes:
+    return (s or "").encode("utf-8")[:n]
+
+
+def _p(v) -> bytes:
+    """Fiyat -> sabit genişlikli ASCII; kırpmak sessizce yanlış fiyat demek olacağı için sığmazsa hata."""
+    if v is None or v != v:  # DataFrame kayıtlarında eksik fiyat NaN gelir
+        return b""
+    b = str(v).encode("ascii")
+    if len(b) > PRICE_WIDTH:
+        raise ValueError(f"price {v!r} longer than {PRICE_WIDTH} chars")
+    return b
+
+
+def _dec(b: bytes) -> Optional[str]:
+    return _s(b) or None  # boş slot -> None
+
+
+class QuoteBoard:
+    def __init__(self, path: str, mm: mmap.mmap, fh):
+        self.path = path
+        self._mm = mm
+        self._fh = fh
+
+    # ---------------- açma ----------------
+
+    @classmethod
+    def open_reader(cls, path: Optional[str] = None) -> Optional["QuoteBoard"]:
+        """Pano yoksa veya düzeni uyuşmuyorsa None (çağıran SQLite'a düşer)."""
+        path = path or board_path()
+        try:
+            fh = open(path, "rb")
+        except OSError:
+            return None
+        try:
+            if os.fstat(fh.fileno()).st_size != SIZE:
+                fh.close()
+                return None
+            mm = mmap.mmap(fh.fileno(), SIZE, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            fh.close()
+            return None
+        magic, ver, n, crc, *_ = HEADER.unpack_from(mm, 0)
+        if (magic, ver, n, crc) != (MAGIC, VERSION, len(ASSETS), LAYOUT_CRC):
+            mm.close()
+            fh.close()
+            return None
+        return cls(path, mm, fh)
+
+    @classmethod
+    def open_writer(cls, path: Optional[str] = None, create: bool = True) -> Optional["QuoteBoard"]:
+        """create=False: pano yoksa None — kısmi yazarlar (manuel fiyat vb.) eksik bir pano kurmaz."""
+        path = path or board_path()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with _lock(path):
+            if not _layout_ok(path):
+                if not create:
+                    return None
+                # yeni dosya + atomik rename: eski dosyayı map'lemiş okurlar eski inode'da kalır
+                tmp = f"{path}.{os.getpid()}.tmp"
+                with open(tmp, "wb") as f:
+                    f.write(HEADER.pack(MAGIC, VERSION, len(ASSETS), LAYOUT_CRC, 0, 0, 0.0).ljust(HEADER_SIZE, b"\0"))
+                    f.write(b"\0" * (SIZE - HEADER_SIZE))
+                os.replace(tmp, path)
+            fh = open(path, "r+b")
+            mm = mmap.mmap(fh.fileno(), SIZE, access=mmap.ACCESS_WRITE)
+        return cls(path, mm, fh)
+
+    def close(self) -> None:
+        self._mm.close()
+        self._fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------------- yazma ----------------
+
+    def publish(self, rows: Mapping[str, Mapping]) -> int:
+        """
+        rows: asset -> {price, price_buy, price_sell, ts, source, is_stale}. Verilmeyen slotlar
+        korunur (manuel fiyat tek varlık günceller). Yeni tick_seq döner.
+        """
+        mm = self._mm
+        # slotlar seq tek sayıya çekilmeden kodlanır: sığmayan fiyat panoyu yarım yazılı bırakmaz
+        slots = [
+            (HEADER_SIZE + _SLOT_OF[a] * SLOT.size, SLOT.pack(
+                _p(r.get("price")), _p(r.get("price_buy")), _p(r.get("price_sell")),
+                _b(r.get("ts"), 32), _b(r.get("source"), 32), 1 if r.get("is_stale") else 0, 1,
+            ))
+            for a, r in rows.items() if a in _SLOT_OF
+        ]
+        with _lock(self.path):
+            seq = SEQ.unpack_from(mm, SEQ_OFFSET)[0]
+            SEQ.pack_into(mm, SEQ_OFFSET, seq + 1)  # tek: yazım sürüyor
+            for off, packed in slots:
+                mm[off:off + SLOT.size] = packed
+            _magic, _v, _n, _crc, _seq, tick_seq, _at = HEADER.unpack_from(mm, 0)
+            struct.pack_into("<Qd", mm, SEQ_OFFSET + 8, tick_seq + 1, time.time())
+            SEQ.pack_into(mm, SEQ_OFFSET, seq + 2)  # çift: tutarlı
+        return tick_seq + 1
+
+    # ---------------- okuma ----------------
+
+    def read(self, retries: int = 1000) -> Optional[dict]:
+        """
+        {"tick_seq", "published_at", "rows": {asset: row}} — row anahtarları prices tablosuyla aynı.
+        Yazar sürekli araya girerse (retries tükenirse) None.
+        """
+        mm = self._mm
+        for _ in range(retries):
+            s1 = SEQ.unpack_from(mm, SEQ_OFFSET)[0]
+            if s1 & 1:
+                time.sleep(0)
+                continue
+            _m, _v, _n, _c, _s1, tick_seq, published_at = HEADER.unpack_from(mm, 0)
+            slots = [SLOT.unpack_from(mm, HEADER_SIZE + i * SLOT.size) for i in range(len(ASSETS))]
+            if SEQ.unpack_from(mm, SEQ_OFFSET)[0] != s1:
+                continue
+            rows = {}
+            for a, (mid, bid, ask, ts, src, stale, valid) in zip(ASSETS, slots):
+                if valid:
+                    rows[a] = {
+                        "asset": a, "price": _dec(mid), "price_buy": _dec(bid), "price_sell": _dec(ask),
+                        "ts": _s(ts), "source": _s(src), "is_stale": stale,
+                    }
+            return {"tick_seq": tick_seq, "published_at": published_at, "rows": rows}
+        return None
+
+
+def _layout_ok(path: str) -> bool:
+    try:
+        with open(path, "rb") as f:
+            hdr = f.read(HEADER.size)
+            size = os.fstat(f.fileno()).st_size
+    except OSError:
+        return False
+    return size == SIZE and len(hdr) == HEADER.size and HEADER.unpack(hdr)[:4] == (MAGIC, VERSION, len(ASSETS), LAYOUT_CRC)
+
+
+def _lock(path: str):
+    from filelock import FileLock
+
+    return FileLock(path + ".lock", timeout=5)
+
+
+def read_board(max_age_s: float, path: Optional[str] = None) -> Optional[Dict[str, dict]]:
+    """Taze pano varsa asset -> row; yoksa / max_age_s'den eskiyse None."""
+    b = QuoteBoard.open_reader(path)
+    if b is None:
+        return None
+    with b:
+        snap = b.read()
+    if not snap or not snap["tick_seq"] or time.time() - snap["published_at"] > max_age_s:
+        return None
+    return snap["rows"]
+
+
+def publish_rows(rows: Mapping[str, Mapping], path: Optional[str] = None, create: bool = True) -> None:
+    """
+    create=True yalnız tüm varlıkların son fiyatını yazan yazarlar içindir (servis tick'i,
+    SQLite'tan tohumlama); tek tük varlık yazanlar create=False ile mevcut panoyu günceller.
+    """
+    b = QuoteBoard.open_writer(path, create=create)
+    if b is None:
+        return
+    with b:
+        b.publish(rows)
+
+
+_ROW_FIELDS = ("price", "price_buy", "price_sell", "ts", "source", "is_stale")
+
+
+def price_rows(prices: Iterable) -> Dict[str, dict]:
+    """Price ORM nesneleri (veya aynı alanlara sahip nesneler) -> publish_rows girdisi."""
+    return {p.asset: {f: getattr(p, f) for f in _ROW_FIELDS} for p in prices}
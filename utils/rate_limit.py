@@ -0,0 +1,175 @@
+"""
+Anahtarlı (kotalı) provider'lar için süreçler arası token bucket.
+
+Durum SQLite'taki `rate_limits` tablosunda durur; UI, servis ve CLI aynı bütçeyi harcar.
+Token alma tek bir koşullu UPDATE'tir (SQLite yazımları serileştirir): satır ancak
+token >= 1, Retry-After bloğu bitmiş ve günlük/aylık sayaç kotanın altındaysa güncellenir,
+yani aynı anda gelen iki süreç kotayı birlikte aşamaz.
+
+Dolum hızı sabit değil: kalan aylık (ve varsa günlük) bütçe, dönemin kalan süresine
+bölünür. Bütçe erken harcanırsa hız düşer, kullanılmazsa artar; dönem sonuna kadar
+çağrılar eşit aralıklarla yayılır ve kota hiç 429 ile kesilmez.
+"""
+from __future__ import annotations
+
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from utils.logging import setup_logging
+from utils.time import TR_TZ
+
+logger = setup_logging("rate_limit", os.getenv("LOG_DIR", "logs"))
+
+
+@dataclass(frozen=True)
+class Quota:
+    monthly: int
+    daily: int = 0   # 0 -> yalnız aylık kota
+    burst: int = 2   # art arda harcanabilecek en fazla token (UI warmup + refresh)
+
+    @classmethod
+    def from_env(cls, prefix: str, monthly: int, daily: int = 0, burst: int = 2) -> "Quota":
+        """<PREFIX>_MONTHLY_QUOTA / _DAILY_QUOTA / _BURST ortam değişkenleri varsayılanları ezer."""
+        return cls(
+            monthly=int(os.getenv(f"{prefix}_MONTHLY_QUOTA", monthly)),
+            daily=int(os.getenv(f"{prefix}_DAILY_QUOTA", daily)),
+            burst=int(os.getenv(f"{prefix}_BURST", burst)),
+        )
+
+
+def _periods(ts: float):
+    """(gün anahtarı, ay anahtarı, günün bitimine sn, ayın bitimine sn) — TR saatine göre."""
+    now = datetime.fromtimestamp(ts, TR_TZ)
+    day_end = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    month_end = (now.replace(day=28) + timedelta(days=4)).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    return now.strftime("%Y-%m-%d"), now.strftime("%Y-%m"), (day_end - now).total_seconds(), (month_end - now).total_seconds()
+
+
+_INIT = text(
+    "INSERT OR IGNORE INTO rate_limits (provider, tokens, updated_at, day, day_count, month, month_count, blocked_until) "
+    "VALUES (:p, :burst, :now, :day, 0, :month, 0, 0)"
+)
+_STATE = text("SELECT tokens, updated_at, day, day_count, month, month_count, blocked_until FROM rate_limits WHERE provider = :p")
+
+# Dolum, sayaç sıfırlama ve kota kontrolü tek ifadede: okuma-yazma arasına başka süreç giremez.
+# Yeni dönemde (ay; günlük kota varsa gün) kova dolu başlar.
+_REFILL = (
+    "(CASE WHEN month != :month OR (:daily > 0 AND day != :day) THEN :burst "
+    "ELSE MIN(:burst, tokens + MAX(0, :now - updated_at) * :rate) END)"
+)
+_DAY_N = "(CASE WHEN day = :day THEN day_count ELSE 0 END)"
+_MONTH_N = "(CASE WHEN month = :month THEN month_count ELSE 0 END)"
+_ACQUIRE = text(
+    f"UPDATE rate_limits SET tokens = {_REFILL} - 1, updated_at = :now, "
+    f"day_count = {_DAY_N} + 1, day = :day, month_count = {_MONTH_N} + 1, month = :month "
+    f"WHERE provider = :p AND blocked_until <= :now AND {_REFILL} >= 1 "
+    f"AND (:daily = 0 OR {_DAY_N} < :daily) AND {_MONTH_N} < :monthly"
+)
+_BLOCK = text(
+    "UPDATE rate_limits SET tokens = 0, updated_at = :now, blocked_until = MAX(blocked_until, :until) WHERE provider = :p"
+)
+
+
+class RateLimiter:
+    def __init__(self, provider: str, quota: Quota, engine: Optional[Engine] = None, read_engine: Optional[Engine] = None):
+        self.provider = provider
+        self.quota = quota
+        self._engine = engine
+        # engine verilip read_engine verilmezse (testler) okumalar da o engine'den
+        self._read_engine = read_engine or engine
+
+    @property
+    def engine(self) -> Engine:
+        if self._engine is None:
+            from db.session import engine
+
+            self._engine = engine
+        return self._engine
+
+    @property
+    def read_engine(self) -> Engine:
+        """status() için: yazma engine'i BEGIN IMMEDIATE açar, servis yazarken okuma kilitlenirdi."""
+        if self._read_engine is None:
+            from db.session import read_engine
+
+            self._read_engine = read_engine
+        return self._read_engine
+
+    def _params(self, now: float) -> dict:
+        day, month, _, _ = _periods(now)
+        return {"p": self.provider, "now": now, "day": day, "month": month, "burst": self.quota.burst,
+                "daily": self.quota.daily, "monthly": self.quota.monthly}
+
+    def _rate(self, row, now: float) -> float:
+        """Token/sn: kalan bütçe / dönemin kalan süresi (günlük kota varsa ikisinin küçüğü)."""
+        day, month, day_left, month_left = _periods(now)
+        used_m = row.month_count if row.month == month else 0
+        rate = max(0, self.quota.monthly - used_m) / month_left
+        if self.quota.daily:
+            used_d = row.day_count if row.day == day else 0
+            rate = min(rate, max(0, self.quota.daily - used_d) / day_left)
+        return rate
+
+    def try_acquire(self, now: Optional[float] = None) -> bool:
+        """Token varsa harcar ve True döner; yoksa beklemeden False."""
+        now = time.time() if now is None else now
+        p = self._params(now)
+        with self.engine.begin() as conn:
+            conn.execute(_INIT, p)
+            row = conn.execute(_STATE, p).one()
+            p["rate"] = self._rate(row, now)
+            ok = conn.execute(_ACQUIRE, p).rowcount == 1
+        if not ok:
+            logger.info(f"{self.provider}: rate limited, next call in {self.next_in_s(now):.0f}s")
+        return ok
+
+    def block(self, seconds: float, now: Optional[float] = None) -> None:
+        """Sağlayıcı 429 döndürdüyse: kovayı boşalt, Retry-After süresince hiç çağrı yapma."""
+        now = time.time() if now is None else now
+        p = self._params(now)
+        with self.engine.begin() as conn:
+            conn.execute(_INIT, p)
+            conn.execute(_BLOCK, {**p, "until": now + seconds})
+        logger.warning(f"{self.provider}: blocked for {seconds:.0f}s")
+
+    def status(self, now: Optional[float] = None) -> dict:
+        """Gösterim / log için: kalan kota, anlık dolum aralığı ve sonraki çağrıya kalan süre."""
+        now = time.time() if now is None else now
+        day, month, day_left, month_left = _periods(now)
+        with self.read_engine.connect() as conn:
+            row = conn.execute(_STATE, {"p": self.provider}).one_or_none()
+        if row is None:
+            return {"provider": self.provider, "month_used": 0, "day_used": 0, "tokens": float(self.quota.burst),
+                    "interval_s": month_left / self.quota.monthly if self.quota.monthly else None, "next_in_s": 0.0}
+        rate = self._rate(row, now)
+        day_used = row.day_count if row.day == day else 0
+        month_used = row.month_count if row.month == month else 0
+        if row.month != month or (self.quota.daily and row.day != day):
+            tokens = float(self.quota.burst)
+        else:
+            tokens = min(self.quota.burst, row.tokens + max(0.0, now - row.updated_at) * rate)
+        if row.blocked_until > now:
+            wait = row.blocked_until - now
+        elif month_used >= self.quota.monthly:
+            wait = month_left
+        elif self.quota.daily and day_used >= self.quota.daily:
+            wait = day_left
+        else:
+            wait = max(0.0, (1 - tokens) / rate)
+        return {
+            "provider": self.provider,
+            "month_used": month_used,
+            "day_used": day_used,
+            "tokens": tokens,
+            "interval_s": 1 / rate if rate else None,
+            "next_in_s": wait,
+        }
+
+    def next_in_s(self, now: Optional[float] = None) -> float:
+        return self.status(now)["next_in_s"]
@@ -0,0 +1,183 @@
+"""
+Monte Carlo portföy riski: 1 / 5 / 30 günlük değer dağılımı, VaR / CVaR.
+
+Getiriler fiyat geçmişinden (prices tablosu, gün sonu kapanışları) alınır:
+- "bootstrap": geçmiş günlerin ortak log getiri vektörleri yerine koymalı çekilir
+  (varlıklar arası korelasyon ve kalın kuyruklar korunur),
+- "normal": aynı örneklemin ortalama / kovaryansıyla çok değişkenli normal (Cholesky).
+
+Yollar sabit boyutlu parçalara bölünür; her parçanın tohumu SeedSequence(seed).spawn()
+ile üretildiğinden sonuç, işçi sayısından bağımsız olarak tekrarlanabilir. Büyük yol
+sayılarında parçalar process pool'da (spawn) koşar.
+"""
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import get_context
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import bindparam, text
+
+HORIZONS: Tuple[int, ...] = (1, 5, 30)
+METHODS = ("bootstrap", "normal")
+CHUNK = 25_000             # parça başına yol (bellek: CHUNK x max(horizon) x varlık x 8 B)
+PARALLEL_MIN_PATHS = 250_000
+MIN_OBS = 20               # bir varlığın simülasyona girmesi için gereken en az günlük getiri
+
+
+def load_daily_returns(db, assets: Sequence[str], lookback_days: int = 730) -> Tuple[List[str], np.ndarray]:
+    """
+    Varlık başına gün sonu (günün son, stale olmayan) fiyatından günlük log getiriler.
+    Yalnız en az MIN_OBS getirisi olan varlıklar; satırlar hepsinin getirisi olan günler.
+    (varlıklar, T x k getiri matrisi) döner.
+    """
+    import pandas as pd
+
+    if not assets:
+        return [], np.empty((0, 0))
+    q = text(
+        "SELECT asset, substr(ts, 1, 10) AS d, price FROM prices "
+        "WHERE is_stale = 0 AND asset IN :assets AND ts >= date('now', :since) ORDER BY ts, id"
+    ).bindparams(bindparam("assets", expanding=True))
+    df = pd.read_sql(q, db.bind, params={"assets": list(assets), "since": f"-{int(lookback_days)} days"})
+    if df.empty:
+        return [], np.empty((0, 0))
+    df["price"] = df["price"].astype(float)
+    closes = df.groupby(["d", "asset"])["price"].last().unstack("asset").sort_index()
+    rets = np.log(closes).diff().iloc[1:]
+    keep = [a for a in assets if a in rets and rets[a].count() >= MIN_OBS]
+    rets = rets[keep].dropna()
+    return keep, rets.to_numpy(dtype=np.float64)
+
+
+@dataclass(frozen=True)
+class HorizonStats:
+    days: int
+    mean: float
+    p05: float
+    p50: float
+    p95: float
+    var95: float     # kayıp olarak pozitif (TL)
+    cvar95: float
+    var99: float
+    cvar99: float
+
+
+@dataclass(frozen=True)
+class ScenarioResult:
+    value_try: float
+    assets: Tuple[str, ...]
+    excluded: Tuple[str, ...]   # geçmişi yetersiz: sabit değerli kabul edildi
+    n_obs: int
+    n_paths: int
+    method: str
+    seed: int
+    stats: Tuple[HorizonStats, ...]
+    pnl: Dict[int, np.ndarray]  # ufuk -> yol başına PnL (TL)
+
+
+def _cov_factor(cov: np.ndarray) -> np.ndarray:
+    """
+    L @ L.T == cov. Tam korelasyonlu varlıklarda örneklem kovaryansı tekildir ve yuvarlama
+    hatasıyla Cholesky'de LinAlgError verebilir: köşegene ölçekli jitter, yine olmazsa
+    negatif özdeğerleri sıfırlayan özdeğer ayrışımı.
+    """
+    k = cov.shape[0]
+    jitter = 1e-10 * max(float(np.trace(cov)) / k, 1e-12)
+    try:
+        return np.linalg.cholesky(cov + np.eye(k) * jitter)
+    except np.linalg.LinAlgError:
+        w, v = np.linalg.eigh(cov)
+        return v * np.sqrt(np.clip(w, 0.0, None))
+
+
+def _chunk_pnl(args) -> np.ndarray:
+    """Tek parça: (len(horizons), n) PnL. Process pool'da da çalışır (modül seviyesinde)."""
+    returns, values, horizons, n, method, seed_seq = args
+    rng = np.random.default_rng(seed_seq)
+    h_max = max(horizons)
+    t, k = returns.shape
+    if method == "bootstrap":
+        steps = returns[rng.integers(0, t, size=(n, h_max))]            # n x h x k
+    else:
+        mu = returns.mean(axis=0)
+        cov = np.cov(returns, rowvar=False).reshape(k, k)
+        chol = _cov_factor(cov)
+        steps = mu + rng.standard_normal((n, h_max, k)) @ chol.T
+    cum = np.cumsum(steps, axis=1)[:, [h - 1 for h in horizons], :]   # n x H x k
+    pnl = np.expm1(cum) @ values                                         # n x H
+    return pnl.T
+
+
+def _tail(pnl: np.ndarray, level: float) -> Tuple[float, float]:
+    q = np.quantile(pnl, 1 - level)
+    return float(-q), float(-pnl[pnl <= q].mean())
+
+
+def simulate(
+    returns: np.ndarray,
+    values_try: np.ndarray,
+    horizons: Sequence[int] = HORIZONS,
+    n_paths: int = 100_000,
+    method: str = "bootstrap",
+    seed: int = 42,
+    workers: Optional[int] = None,
+) -> Dict[int, np.ndarray]:
+    """
+    returns: T x k günlük log getiri, values_try: k varlığın bugünkü TL değeri.
+    Ufuk başına n_paths uzunluğunda PnL dizisi döner. workers=None: yol sayısı
+    PARALLEL_MIN_PATHS üstündeyse CPU sayısı kadar, değilse tek süreç.
+    """
+    if method not in METHODS:
+        raise ValueError(f"unknown method {method!r}")
+    horizons = tuple(horizons)
+    sizes = [CHUNK] * (n_paths // CHUNK) + ([n_paths % CHUNK] if n_paths % CHUNK else [])
+    seqs = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(returns, values_try, horizons, n, method, s) for n, s in zip(sizes, seqs)]
+    if workers is None:
+        workers = (os.cpu_count() or 1) if n_paths >= PARALLEL_MIN_PATHS else 1
+    if workers > 1 and len(jobs) > 1:
+        # spawn: Streamlit / APScheduler thread'leri varken fork güvenli değil
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), mp_context=get_context("spawn")) as ex:
+            parts = list(ex.map(_chunk_pnl, jobs))
+    else:
+        parts = [_chunk_pnl(j) for j in jobs]
+    pnl = np.concatenate(parts, axis=1)
+    return {h: pnl[i] for i, h in enumerate(horizons)}
+
+
+def run_scenarios(
+    db,
+    values_try: Mapping[str, float],
+    n_paths: int = 100_000,
+    method: str = "bootstrap",
+    seed: int = 42,
+    horizons: Sequence[int] = HORIZONS,
+    workers: Optional[int] = None,
+) -> Optional[ScenarioResult]:
+    """Mevcut pozisyon değerlerine (varlık -> TL) geçmişten simüle edilmiş getirileri uygular."""
+    held = {a: float(v) for a, v in values_try.items() if v}
+    assets, rets = load_daily_returns(db, sorted(held))
+    if not assets or len(rets) < MIN_OBS:
+        return None
+    pnl = simulate(rets, np.array([held[a] for a in assets]), horizons, n_paths, method, seed, workers)
+    stats = []
+    for h, x in pnl.items():
+        v95, c95 = _tail(x, 0.95)
+        v99, c99 = _tail(x, 0.99)
+        p05, p50, p95 = np.quantile(x, [0.05, 0.5, 0.95])
+        stats.append(HorizonStats(h, float(x.mean()), float(p05), float(p50), float(p95), v95, c95, v99, c99))
+    return ScenarioResult(
+        value_try=sum(held.values()),
+        assets=tuple(assets),
+        excluded=tuple(a for a in sorted(held) if a not in assets),
+        n_obs=len(rets),
+        n_paths=n_paths,
+        method=method,
+        seed=seed,
+        stats=tuple(stats),
+        pnl=pnl,
+    )
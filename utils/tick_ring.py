@@ -0,0 +1,135 @@
+"""
+Yüksek frekanslı tick halkası: varlık başına sabit kapasiteli, np.memmap tabanlı dizi.
+
+Servis (lider) HF modunda her birkaç saniyede bir tick'i buraya ekler; SQLite'a yalnız
+toplu flush ile yazılır (service/hf_ticks.py). UI canlı grafikleri halkayı doğrudan okur.
+
+Düzen (little-endian):
+    header   64 B          : magic, version, n_assets, capacity, layout_crc
+    counts   8 B x n_assets : varlık başına şimdiye kadar yazılan tick sayısı (u64)
+    data     n_assets x capacity x (t, mid, bid, ask) f64
+
+Tek yazar vardır (lider). Yazar önce slotu, sonra sayacı günceller; okur sayacı kopyadan
+önce ve sonra okur ve kopya sırasında üzerine yazılmış olabilecek en eski slotları atar.
+"""
+from __future__ import annotations
+
+import os
+import struct
+import zlib
+from pathlib import Path
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+MAGIC = b"TRNG"
+VERSION = 1
+HEADER = struct.Struct("<4sHHII")
+HEADER_SIZE = 64
+DEFAULT_CAPACITY = 4096  # 5 sn aralıkla ~5.7 saat
+TICK = np.dtype([("t", "<f8"), ("mid", "<f8"), ("bid", "<f8"), ("ask", "<f8")])
+
+
+def ring_path() -> str:
+    from db.paths import get_db_path
+
+    return os.getenv("TICK_RING_PATH") or str(Path(get_db_path()).with_suffix(".ticks"))
+
+
+def _crc(assets: Sequence[str]) -> int:
+    return zlib.crc32(",".join(assets).encode("ascii"))
+
+
+def _size(n: int, capacity: int) -> int:
+    return HEADER_SIZE + 8 * n + n * capacity * TICK.itemsize
+
+
+class TickRing:
+    def __init__(self, path: str, assets: Sequence[str], capacity: int, counts: np.memmap, data: np.memmap):
+        self.path = path
+        self.assets = tuple(assets)
+        self.capacity = capacity
+        self._index = {a: i for i, a in enumerate(self.assets)}
+        self._counts = counts
+        self._data = data
+
+    @classmethod
+    def _map(cls, path: str, assets: Sequence[str], capacity: int, mode: str) -> "TickRing":
+        n = len(assets)
+        counts = np.memmap(path, dtype="<u8", mode=mode, offset=HEADER_SIZE, shape=(n,))
+        data = np.memmap(path, dtype=TICK, mode=mode, offset=HEADER_SIZE + 8 * n, shape=(n, capacity))
+        return cls(path, assets, capacity, counts, data)
+
+    @classmethod
+    def open_writer(cls, assets: Sequence[str], capacity: int = DEFAULT_CAPACITY, path: Optional[str] = None) -> "TickRing":
+        """Varlık listesi / kapasite değiştiyse halka sıfırdan kurulur (atomik rename)."""
+        path = path or ring_path()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        if _header(path) != (MAGIC, VERSION, len(assets), capacity, _crc(assets)):
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(HEADER.pack(MAGIC, VERSION, len(assets), capacity, _crc(assets)).ljust(HEADER_SIZE, b"\0"))
+                f.truncate(_size(len(assets), capacity))
+            os.replace(tmp, path)
+        return cls._map(path, assets, capacity, "r+")
+
+    @classmethod
+    def open_reader(cls, assets: Sequence[str], path: Optional[str] = None) -> Optional["TickRing"]:
+        """Halka yoksa veya bu varlık listesiyle yazılmamışsa None."""
+        path = path or ring_path()
+        hdr = _header(path)
+        if hdr is None or hdr[:3] != (MAGIC, VERSION, len(assets)) or hdr[4] != _crc(assets):
+            return None
+        return cls._map(path, assets, hdr[3], "r")
+
+    def append(self, asset: str, t: float, mid: float, bid: float, ask: float) -> None:
+        i = self._index[asset]
+        n = int(self._counts[i])
+        self._data[i, n % self.capacity] = (t, mid, bid, ask)
+        self._counts[i] = n + 1  # slot yazıldıktan sonra görünür
+
+    def count(self, asset: str) -> int:
+        return int(self._counts[self._index[asset]])
+
+    def since(self, asset: str, start: int = 0) -> Tuple[np.ndarray, int]:
+        """
+        start sırasından (dahil) bu yana tick'ler ve yeni sayaç. Halkadan düşmüş olanlar
+        (count - capacity + 1'den eskiler) dönmez.
+        """
+        i = self._index[asset]
+        n1 = int(self._counts[i])
+        # en eski slot, yazılmakta olan n1 sıralı tick'in yeridir: okunmaz
+        lo = max(start, n1 - self.capacity + 1, 0)
+        idx = np.arange(lo, n1) % self.capacity
+        out = self._data[i, idx].copy()
+        # kopya sırasında yazar ilerlediyse üzerine yazılmış olabilecek baştaki slotları at
+        n2 = int(self._counts[i])
+        drop = max(0, n2 + 1 - self.capacity - lo)
+        return out[drop:], n1
+
+    def window(self, asset: str, seconds: float, now: Optional[float] = None) -> np.ndarray:
+        """Son `seconds` saniyenin tick'leri (canlı grafik)."""
+        ticks, _ = self.since(asset)
+        if now is None:
+            now = float(ticks["t"][-1]) if len(ticks) else 0.0
+        return ticks[ticks["t"] >= now - seconds]
+
+    def flush(self) -> None:
+        self._data.flush()
+        self._counts.flush()
+
+
+def _header(path: str):
+    try:
+        with open(path, "rb") as f:
+            hdr = f.read(HEADER.size)
+            size = os.fstat(f.fileno()).st_size
+    except OSError:
+        return None
+    if len(hdr) != HEADER.size:
+        return None
+    magic, ver, n, capacity, crc = HEADER.unpack(hdr)
+    if magic != MAGIC or size != _size(n, capacity):
+        return None
+    return magic, ver, n, capacity, crc
+
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import IO, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert, select
+
+from db.models import Transaction
+from db.positions import rebuild_positions
+from utils.assets import ASSETS, ASSETS_META
+from utils.decimal import parse_decimal
+from utils.time import TR_TZ
+
+FIELDS = ["ts", "asset", "side", "qty", "unit_price", "fee", "note"]
+REQUIRED = ["ts", "asset", "side", "qty", "unit_price"]
+
+DEFAULT_SIDE_MAP = {
+    "BUY": "BUY", "B": "BUY", "AL": "BUY", "ALIŞ": "BUY", "ALIS": "BUY", "ALIM": "BUY",
+    "SELL": "SELL", "S": "SELL", "SAT": "SELL", "SATIŞ": "SELL", "SATIS": "SELL", "SATIM": "SELL",
+}
+
+
+@dataclass
+class ImportProfile:
+    """CSV kolon eşlemesi + sayı/tarih biçimi. columns: hedef alan -> dosyadaki kolon adı."""
+    name: str = "default"
+    columns: Dict[str, str] = field(default_factory=lambda: {f: f for f in FIELDS})
+    delimiter: str = ","
+    encoding: str = "utf-8-sig"
+    decimal_comma: bool = False
+    date_formats: List[str] = field(default_factory=lambda: ["%Y-%m-%d %H:%M:%S", "%Y-%m-%d"])
+    side_map: Dict[str, str] = field(default_factory=lambda: dict(DEFAULT_SIDE_MAP))
+    asset_map: Dict[str, str] = field(default_factory=dict)  # "GRAM ALTIN" -> "XAU_G"
+
+    @classmethod
+    def from_json(cls, path: str) -> "ImportProfile":
+        with open(path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        prof = cls(**{k: v for k, v in raw.items() if k != "side_map"})
+        prof.side_map.update({k.upper(): v for k, v in raw.get("side_map", {}).items()})
+        return prof
+
+
+PROFILES: Dict[str, ImportProfile] = {
+    # İşlem Geçmişi CSV export'u ile aynı kolonlar
+    "default": ImportProfile(),
+    # Tipik kuyumcu/aracı kurum dökümü: noktalı virgül, ondalık virgül, gg.aa.yyyy
+    "kuyumcu_tr": ImportProfile(
+        name="kuyumcu_tr",
+        columns={
+            "ts": "Tarih",
+            "asset": "Ürün",
+            "side": "İşlem",
+            "qty": "Miktar",
+            "unit_price": "Birim Fiyat",
+            "fee": "Komisyon",
+            "note": "Açıklama",
+        },
+        delimiter=";",
+        decimal_comma=True,
+        date_formats=["%d.%m.%Y %H:%M:%S", "%d.%m.%Y %H:%M", "%d.%m.%Y"],
+        asset_map={v["name"].upper(): k for k, v in ASSETS_META.items()},
+    ),
+}
+
+
+@dataclass
+class ImportReport:
+    total_rows: int = 0
+    inserted: int = 0
+    errors: List[Tuple[int, str]] = field(default_factory=list)     # (satır no, mesaj)
+    conflicts: List[str] = field(default_factory=list)              # bozulan mevcut kayıtlar
+
+    @property
+    def ok(self) -> bool:
+        return not self.conflicts
+
+
+def parse_ts(raw: str, profile: ImportProfile) -> str:
+    s = str(raw).strip()
+    dt: Optional[datetime] = None
+    try:
+        dt = datetime.fromisoformat(s)
+    except ValueError:
+        for fmt in profile.date_formats:
+            try:
+                dt = datetime.strptime(s, fmt)
+                break
+            except ValueError:
+                continue
+    if dt is None:
+        raise ValueError(f"tarih okunamadı: {raw!r}")
+    # DB'deki ts'ler hep +03:00 ISO; aynı biçim sayesinde string sıralama = zaman sıralaması
+    dt = dt.replace(tzinfo=TR_TZ) if dt.tzinfo is None else dt.astimezone(TR_TZ)
+    return dt.isoformat(timespec="seconds")
+
+
+def parse_row(row: Dict[str, str], profile: ImportProfile) -> dict:
+    def col(f: str) -> str:
+        v = row.get(profile.columns.get(f, f))
+        return "" if v is None else str(v).strip()
+
+    for f in REQUIRED:
+        if not col(f):
+            raise ValueError(f"'{profile.columns.get(f, f)}' boş")
+
+    asset_raw = col("asset")
+    asset = profile.asset_map.get(asset_raw.upper(), asset_raw.upper())
+    if asset not in ASSETS:
+        raise ValueError(f"bilinmeyen varlık: {asset_raw!r}")
+
+    side = profile.side_map.get(col("side").upper())
+    if side is None:
+        raise ValueError(f"bilinmeyen işlem yönü: {col('side')!r}")
+
+    qty = parse_decimal(col("qty"), profile.decimal_comma)
+    unit_price = parse_decimal(col("unit_price"), profile.decimal_comma)
+    fee = parse_decimal(col("fee") or "0", profile.decimal_comma)
+    if not (qty.is_finite() and unit_price.is_finite() and fee.is_finite()):
+        raise ValueError("miktar/fiyat/fee sonlu bir sayı olmalı")
+    if qty <= 0 or unit_price <= 0 or fee < 0:
+        raise ValueError("miktar/fiyat pozitif, fee negatif olmayan olmalı")
+
+    return {
+        "ts": parse_ts(col("ts"), profile),
+        "asset": asset,
+        "side": side,
+        "qty": str(qty),
+        "unit_price": str(unit_price),
+        "fee": str(fee),
+        "currency": "TRY",
+        "note": col("note") or None,
+    }
+
+
+def iter_rows(fileobj: IO, profile: ImportProfile) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """Dosyayı satır satır okur (ham metin belleğe alınmaz). Binary stream de kabul eder."""
+    text_stream = fileobj if isinstance(fileobj, io.TextIOBase) else io.TextIOWrapper(fileobj, encoding=profile.encoding, newline="")
+    reader = csv.DictReader(text_stream, delimiter=profile.delimiter)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def _iter_ledger(db) -> Iterator[tuple]:
+    stmt = (
+        select(Transaction.id, Transaction.ts, Transaction.asset, Transaction.side, Transaction.qty)
+        .order_by(Transaction.ts.asc(), Transaction.id.asc())
+        .execution_options(yield_per=1000)
+    )
+    yield from db.execute(stmt)
+
+
+def import_transactions(db, fileobj: IO, profile: ImportProfile, batch_size: int = 500, dry_run: bool = False) -> ImportReport:
+    """
+    CSV'yi satır satır ayrıştırır, geçerli satırları zamana göre sıralayıp mevcut defterle
+    (DB'den akış halinde) birleştirir ve stok blokajını tek geçişte doğrular; geçerli
+    satırları executemany ile toplu ekler. Dosya tarih sırasında olmak zorunda olmadığı için
+    ayrıştırılmış satırlar sıralama için bellekte tutulur: bellek dosya boyutuyla doğrusal artar.
+    Hatalı satırlar raporlanır, dosyanın geri kalanı işlenir. Mevcut bir kayıt
+    stoksuz kalacaksa (geçmişe eklenen satış) hiçbir şey yazılmaz.
+    """
+    rep = ImportReport()
+    parsed: List[Tuple[str, int, dict]] = []
+    for line_no, row in iter_rows(fileobj, profile):
+        rep.total_rows += 1
+        try:
+            r = parse_row(row, profile)
+        except Exception as e:
+            rep.errors.append((line_no, str(e)))
+            continue
+        parsed.append((r["ts"], line_no, r))
+    # Yalnız ayrıştırılmış küçük kayıtlar sıralanır; aynı ts'de dosya sırası korunur
+    parsed.sort(key=lambda x: (x[0], x[1]))
+
+    qty: Dict[str, Decimal] = {}
+    accepted: List[dict] = []
+    ledger = _iter_ledger(db)
+    cur = next(ledger, None)
+
+    def apply_ledger(upto_ts: Optional[str]):
+        nonlocal cur
+        while cur is not None and (upto_ts is None or cur.ts <= upto_ts):
+            have = qty.get(cur.asset, Decimal("0"))
+            q = Decimal(cur.qty)
+            if cur.side == "BUY":
+                qty[cur.asset] = have + q
+            elif q > have:
+                rep.conflicts.append(f"mevcut işlem #{cur.id} ({cur.asset}, {cur.ts}) stoksuz kalıyor: elde {have}, satış {q}")
+                qty[cur.asset] = Decimal("0")
+            else:
+                qty[cur.asset] = have - q
+            cur = next(ledger, None)
+
+    for ts, line_no, r in parsed:
+        apply_ledger(ts)
+        have = qty.get(r["asset"], Decimal("0"))
+        q = Decimal(r["qty"])
+        if r["side"] == "SELL" and q > have:
+            rep.errors.append((line_no, f"{r['asset']} stok yetersiz: elde {have}, satılmak istenen {q}"))
+            continue
+        qty[r["asset"]] = have + q if r["side"] == "BUY" else have - q
+        accepted.append(r)
+    apply_ledger(None)
+
+    rep.errors.sort()
+    if dry_run or not rep.ok or not accepted:
+        return rep
+
+    stmt = insert(Transaction.__table__)
+    for i in range(0, len(accepted), batch_size):
+        db.execute(stmt, accepted[i : i + batch_size])
+    # Geçmiş tarihli satırlar araya girdiği için etkilenen pozisyonlar yeniden hesaplanır
+    rebuild_positions(db, sorted({r["asset"] for r in accepted}))
+    db.commit()
+    rep.inserted = len(accepted)
+    return rep